@@ -0,0 +1,306 @@
+"""
+Benchmarks for the rules module.
+
+Times every rule and the rule engine entry points against synthetic meal plans and recipe books of
+several sizes, and writes the timings to a JSON report. A separate scenario times whole-plan validation
+with worker processes (--workers), alone and with concurrent validations, to show how it scales. Reports
+of two commits can be compared with --compare, which lists the timings that got slower and exits with a
+non-zero status if any did.
+
+Usage (from gusto2-app/backend):
+
+    uv run python -m benchmarks.bench_rules --output bench_output.json
+    uv run python -m benchmarks.bench_rules --quick --compare bench_baseline.json
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_meal_plan, generate_recipes
+from gusto2.rules.candidates import CandidateSet
+from gusto2.rules.definitions import DEFAULT_RULES_FILE, compile_rules, load_rules
+from gusto2.rules.rule_engine import PARALLEL_MIN_DAYS, RuleEngine
+from gusto2.rules.snapshot import PlanSnapshot
+from gusto2.rules.state import PlanState
+from gusto2.tags import split_tags
+
+REPORT_VERSION = 1
+
+YEARS = [1, 5, 20]
+RECIPE_COUNTS = [100, 1000, 5000]
+DENSITIES = ["sparse", "dense"]
+
+QUICK_YEARS = [1, 5]
+QUICK_RECIPE_COUNTS = [100, 1000]
+
+# Worker process counts of the parallel scenario, timed against a single process; its plan is long
+# enough for the engine to hand validation to the workers (at least PARALLEL_MIN_ROWS meals)
+WORKERS = [2, 4]
+PARALLEL_YEARS = 60
+PARALLEL_RECIPE_COUNT = 1000
+
+# Rules benchmarked on top of the bundled default rules, so every rule kind is covered
+EXTRA_RULES = {
+    "rules": [
+        {
+            "kind": "window_tag_maximum",
+            "name": "At most 2 pasta per week",
+            "tags": ["pasta"],
+            "window_days": 7,
+            "max_count": 2,
+        }
+    ]
+}
+
+# Timings faster than this (in ms) are too noisy to flag as regressions
+NOISE_FLOOR_MS = 0.05
+
+
+def time_call(function: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Call a function repeat times (after one warm-up call) and summarize the durations in milliseconds."""
+    function()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": min(durations),
+        "median_ms": statistics.median(durations),
+        "mean_ms": statistics.fmean(durations),
+        "repeat": repeat,
+    }
+
+
+def create_engine(workers: Optional[int] = None) -> RuleEngine:
+    engine = RuleEngine(workers=workers)
+    engine.set_rules(load_rules(DEFAULT_RULES_FILE) + compile_rules(EXTRA_RULES))
+    return engine
+
+
+def run_scenario(years: int, recipe_count: int, density: str, repeat: int, seed: int) -> List[Dict[str, Any]]:
+    """
+    Time all rules and engine entry points for one plan size, recipe book size and tag density.
+
+    Args:
+        years: Length of the synthetic meal plan in years
+        recipe_count: Number of recipes in the synthetic recipe book
+        density: Tag density of the recipes
+        repeat: Number of timed calls per benchmark
+        seed: Random seed for the synthetic data
+
+    Returns:
+        List of results, one per benchmark
+    """
+    recipes = generate_recipes(recipe_count, density, seed=seed)
+    meals_df = generate_meal_plan(recipes, years, seed=seed)
+    engine = create_engine()
+
+    # Validate around a date inside the plan, and add/suggest meals for the day after it ends
+    last_day = datetime.combine(meals_df["Date"].max(), datetime.min.time())
+    validate_date = last_day - timedelta(days=14)
+    next_day = last_day + timedelta(days=1)
+
+    meal = recipes[0]
+    meal_tags = list(split_tags(meal["tags"]))
+    snapshot = PlanSnapshot.from_dataframe(meals_df)
+    state = PlanState.from_dataframe(meals_df)
+    candidates = CandidateSet(recipes)
+
+    benchmarks: Dict[str, Callable[[], Any]] = {
+        "plan.snapshot": lambda: PlanSnapshot.from_dataframe(meals_df),
+        "plan.state": lambda: PlanState.from_dataframe(meals_df),
+        "candidates": lambda: CandidateSet(recipes),
+        "engine.validate_meal_plan": lambda: engine.validate_meal_plan(meals_df),
+        "engine.validate_meal_plan[date]": lambda: engine.validate_meal_plan(meals_df, validate_date),
+        "engine.validate_meal_plan[state]": lambda: engine.validate_meal_plan(state),
+        "engine.can_add_meal": lambda: engine.can_add_meal(meal["name"], meal_tags, next_day, meals_df),
+        "engine.can_add_meal[state]": lambda: engine.can_add_meal(meal["name"], meal_tags, next_day, state),
+        "engine.suggest_meals_for_date": lambda: engine.suggest_meals_for_date(next_day, recipes, meals_df),
+        "engine.suggest_meals_for_date[state]": lambda: engine.suggest_meals_for_date(next_day, candidates, state),
+    }
+    for rule in engine.get_enabled_rules():
+        benchmarks[f"rule[{rule.name}].validate"] = lambda rule=rule: rule.validate(snapshot)
+        benchmarks[f"rule[{rule.name}].validate[date]"] = lambda rule=rule: rule.validate(snapshot, validate_date)
+        benchmarks[f"rule[{rule.name}].can_add_meal"] = lambda rule=rule: rule.can_add_meal(
+            meal["name"], meal_tags, next_day, snapshot
+        )
+        benchmarks[f"rule[{rule.name}].evaluate_candidates"] = lambda rule=rule: rule.evaluate_candidates(
+            candidates, next_day, snapshot
+        )
+
+    scenario = f"{years}y-{recipe_count}r-{density}"
+    results = []
+    for name, function in benchmarks.items():
+        results.append({"scenario": scenario, "benchmark": name, **time_call(function, repeat)})
+    return results
+
+
+def run_parallel_scenario(worker_counts: List[int], repeat: int, seed: int) -> List[Dict[str, Any]]:
+    """
+    Time whole-plan validation in worker processes against a single process, for a plan large enough to use them.
+
+    Besides single validations, every worker count is timed with as many validations running at once, which
+    only scales if concurrent validations share the worker pool.
+
+    Args:
+        worker_counts: Numbers of worker processes to time
+        repeat: Number of timed calls per benchmark
+        seed: Random seed for the synthetic data
+
+    Returns:
+        List of results, one per benchmark
+    """
+    recipes = generate_recipes(PARALLEL_RECIPE_COUNT, "sparse", seed=seed)
+    meals_df = generate_meal_plan(recipes, PARALLEL_YEARS, seed=seed)
+    snapshot = PlanSnapshot.from_dataframe(meals_df)
+    last_day = datetime.combine(meals_df["Date"].max(), datetime.min.time())
+    first_day = last_day - timedelta(days=PARALLEL_MIN_DAYS - 1)
+
+    scenario = f"parallel-{PARALLEL_YEARS}y-{PARALLEL_RECIPE_COUNT}r-sparse"
+    results = []
+    for workers in [1, *worker_counts]:
+        engine = create_engine(workers)
+        benchmarks: Dict[str, Callable[[], Any]] = {
+            f"engine.validate_meal_plan[workers={workers}]": lambda engine=engine: engine.validate_meal_plan(snapshot),
+            f"engine.validate_days[workers={workers}]": lambda engine=engine: engine.validate_days(
+                snapshot, first_day, last_day
+            ),
+        }
+        if workers > 1:
+            benchmarks[f"engine.validate_meal_plan[workers={workers},concurrent={workers}]"] = (
+                lambda engine=engine, workers=workers: validate_concurrently(engine, snapshot, workers)
+            )
+        try:
+            for name, function in benchmarks.items():
+                results.append({"scenario": scenario, "benchmark": name, **time_call(function, repeat)})
+        finally:
+            engine.close()
+    return results
+
+
+def validate_concurrently(engine: RuleEngine, snapshot: PlanSnapshot, concurrency: int) -> None:
+    """Validate the same plan from several threads at once, returning when all validations are done."""
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(lambda _: engine.validate_meal_plan(snapshot), range(concurrency)))
+
+
+def git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def compare_reports(baseline: Dict[str, Any], report: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Compare the median timings of a report to a baseline report.
+
+    Args:
+        baseline: Earlier report
+        report: New report
+        threshold: Ratio of new to baseline median above which a benchmark counts as a regression
+
+    Returns:
+        List of regressions with both medians and their ratio, slowest first
+    """
+    baseline_medians = {
+        (result["scenario"], result["benchmark"]): result["median_ms"] for result in baseline["results"]
+    }
+    regressions = []
+    for result in report["results"]:
+        before = baseline_medians.get((result["scenario"], result["benchmark"]))
+        after = result["median_ms"]
+        if before is None or max(before, after) < NOISE_FLOOR_MS:
+            continue
+        ratio = after / max(before, NOISE_FLOOR_MS)
+        if ratio > threshold:
+            regressions.append(
+                {
+                    "scenario": result["scenario"],
+                    "benchmark": result["benchmark"],
+                    "baseline_ms": before,
+                    "median_ms": after,
+                    "ratio": ratio,
+                }
+            )
+    return sorted(regressions, key=lambda regression: regression["ratio"], reverse=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the meal plan rules against synthetic meal plans.")
+    parser.add_argument("--years", type=int, nargs="+", help=f"Plan lengths in years (default: {YEARS})")
+    parser.add_argument("--recipes", type=int, nargs="+", help=f"Recipe book sizes (default: {RECIPE_COUNTS})")
+    parser.add_argument("--density", nargs="+", choices=["sparse", "medium", "dense"], default=DENSITIES)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed calls per benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--workers", type=int, nargs="*", default=WORKERS, help="Worker counts of the parallel scenario (none: skip it)"
+    )
+    parser.add_argument("--quick", action="store_true", help="Only the smaller plans and recipe books")
+    parser.add_argument("--output", help="Write the JSON report to this file (default: stdout)")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio that counts as a regression")
+    args = parser.parse_args(argv)
+
+    years = args.years or (QUICK_YEARS if args.quick else YEARS)
+    recipe_counts = args.recipes or (QUICK_RECIPE_COUNTS if args.quick else RECIPE_COUNTS)
+
+    results = []
+    for plan_years, recipe_count, density in itertools.product(years, recipe_counts, args.density):
+        print(f"Benchmarking {plan_years}y-{recipe_count}r-{density}...", file=sys.stderr)
+        results.extend(run_scenario(plan_years, recipe_count, density, args.repeat, args.seed))
+    if args.workers:
+        print(f"Benchmarking parallel validation with {args.workers} workers...", file=sys.stderr)
+        results.extend(run_parallel_scenario(args.workers, args.repeat, args.seed))
+
+    report = {
+        "version": REPORT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {len(results)} results to {args.output}", file=sys.stderr)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, args.threshold)
+        for regression in regressions:
+            print(
+                f"REGRESSION {regression['scenario']} {regression['benchmark']}: "
+                f"{regression['baseline_ms']:.3f}ms -> {regression['median_ms']:.3f}ms ({regression['ratio']:.2f}x)",
+                file=sys.stderr,
+            )
+        print(f"{len(regressions)} regressions against {args.compare}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,451 @@
+"""
+Differential check of the optimized rules against the original rule engine.
+
+Generates small random meal plans full of edge cases (several meals per day, 'skip-validation',
+mixed-case and padded tags, meals without tags, ISO weeks spanning new year, the same ISO week
+number in two years) together with random rules of every kind, and asserts that the optimized rules
+return the same verdicts and messages as the original rules in benchmarks.baseline_rules (or, for
+rules added since, the loop-based references in benchmarks.reference_rules) for:
+
+- validate() over the whole plan and around dates,
+- can_add_meal() and the batched evaluate_candidates(), and the days since each candidate was last
+  served that the no-repeat rule reports,
+- validate_days() over a range of days,
+
+given the plan as a DataFrame, a PlanSnapshot, and a PlanState that is built and then edited
+incrementally. The plan is passed to the original rules unmodified. A difference is only accepted
+when it is one of the intentional differences listed in DIVERGENCES, and the report counts how often
+each was accepted. Every other difference is a mismatch and is printed with the seed that reproduces it.
+
+Usage (from gusto2-app/backend):
+
+    uv run python -m benchmarks.differential --seeds 500
+    uv run python -m benchmarks.differential --seed 1234 --seeds 1
+"""
+
+import argparse
+import random
+import sys
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from benchmarks.reference_rules import reference_rule
+from gusto2.rules import rule_engine
+from gusto2.rules.candidates import CandidateSet, CandidateVerdicts
+from gusto2.rules.snapshot import PlanSnapshot
+from gusto2.rules.state import PlanState
+
+# Tags as they show up in real plans: mixed case, padded, and the tag that disables the no-repeat rule
+TAGS = ["fish", "Fish", " pasta", "rice", "ASIAN", "comfort food", "steak", "veg", "skip-validation"]
+RULE_TAGS = ["fish", "pasta", "rice", "asian", "comfort food", "steak"]
+
+# Number of mismatches printed in full
+MAX_REPORTED = 20
+
+
+def generate_plan(rng: random.Random) -> pd.DataFrame:
+    """Random meal plan in the format database.read_meals() returns, sorted by date."""
+    # Start close to new year now and then, so ISO weeks of two calendar years are covered
+    start = date(rng.randint(2019, 2025), 12, rng.randint(20, 31)) if rng.random() < 0.4 else date(2024, 1, 1)
+    start += timedelta(days=rng.randint(0, 200) if start.month == 1 else 0)
+    names = [f"Meal {i}" for i in range(rng.randint(1, 25))]
+
+    rows = []
+    meal_date = start
+    for _ in range(rng.randint(0, 120)):
+        meal_date += timedelta(days=rng.choice([0, 1, 1, 1, 1, 2, 3, 9]))
+        if rng.random() < 0.01:
+            # A year later, usually in the same ISO week number
+            meal_date += timedelta(days=364)
+        tags = ",".join(rng.sample(TAGS, rng.randint(0, 3)))
+        name = rng.choice(names) if rng.random() < 0.98 else None
+        rows.append(
+            {
+                "Date": meal_date,
+                "Weekday": meal_date.strftime("%A"),
+                "Name": name,
+                "Tags": tags or None,
+                "Notes": None,
+            }
+        )
+    return pd.DataFrame(rows, columns=["Date", "Weekday", "Name", "Tags", "Notes"])
+
+
+def generate_rules(rng: random.Random) -> List[rule_engine.Rule]:
+    """One rule of every kind with random parameters."""
+    tags = rng.sample(RULE_TAGS, 2)
+    window_days = rng.randint(2, 20)
+    return [
+        rule_engine.NoRepeatInWindowRule("No repeat", "", rng.randint(1, 30)),
+        rule_engine.WeeklyRequirementRule("Weekly", "", rng.choice(RULE_TAGS).upper(), rng.randint(1, 3)),
+        rule_engine.MultiTagWeeklyRequirementRule("Weekly any", "", tags, rng.randint(1, 3)),
+        rule_engine.SpecificDayRequirementRule("Day", "", rng.randint(0, 6), rng.choice(RULE_TAGS)),
+        rule_engine.MonthlyRequirementRule("Monthly", "", rng.choice(RULE_TAGS), rng.randint(1, 4)),
+        rule_engine.RollingWindowTagCountRule("Rolling min", "", tags, window_days, min_count=rng.randint(1, 3)),
+        rule_engine.RollingWindowTagCountRule("Rolling max", "", tags, window_days, max_count=rng.randint(0, 3)),
+    ]
+
+
+def generate_candidates(rng: random.Random, meals_df: pd.DataFrame, count: int = 12) -> List[Dict[str, Any]]:
+    """Candidate recipes: mostly meals of the plan, with random tags, some of them new."""
+    names = [name for name in meals_df["Name"].dropna().unique()] if len(meals_df) else []
+    candidates = []
+    for i in range(count):
+        name = rng.choice(names) if names and rng.random() < 0.8 else f"New meal {i}"
+        tags = ",".join(rng.sample(TAGS, rng.randint(0, 3)))
+        candidates.append({"name": name, "tags": tags})
+    return candidates
+
+
+def check_dates(rng: random.Random, meals_df: pd.DataFrame) -> List[Optional[datetime]]:
+    """None (the whole plan) plus dates before, in and after the plan, including planned dates."""
+    if len(meals_df) == 0:
+        return [None, datetime(2025, 1, 1)]
+    first = datetime.combine(meals_df["Date"].min(), datetime.min.time())
+    last = datetime.combine(meals_df["Date"].max(), datetime.min.time())
+    span = (last - first).days
+    dates = [None, first - timedelta(days=rng.randint(1, 40)), last + timedelta(days=rng.randint(1, 40))]
+    dates += [first + timedelta(days=rng.randint(0, span)) for _ in range(4)]
+    return dates
+
+
+def incremental_state(rng: random.Random, meals_df: pd.DataFrame) -> PlanState:
+    """PlanState of the plan, loaded with part of it and then brought up to date with apply_changes()."""
+    split = rng.randint(0, len(meals_df))
+    state = PlanState.from_dataframe(meals_df.iloc[:split])
+    rows = [(row.Date, row.Name, row.Tags) for row in meals_df.iloc[split:].itertuples()]
+    stray = (date(2025, 6, 1), "Stray meal", "fish")
+    state.apply_changes([(None, row) for row in rows] + [(None, stray), (stray, None)])
+    return state
+
+
+# Intentional differences from the original rules. A result that differs from the original one is only
+# accepted when one of these explains it, and every accepted difference is counted in the report.
+FULL_PLAN_REPEATS = "full-plan no-repeat report"
+EMPTY_WINDOW = "no-repeat around a date without meals"
+DIVERGENCES = {
+    FULL_PLAN_REPEATS: "validating the whole plan reports every repeating meal with all the dates of its repeats, "
+    "where the original rule stopped at the first repeat (user-002)",
+    EMPTY_WINDOW: "validating around a date without any meal within the window reports the window as valid, "
+    "where the original rule raised KeyError",
+}
+
+NO_REPEAT_AROUND_DATE = "No meals repeat within the sliding window around the specified date"
+EMPTY_WINDOW_ERROR = "KeyError: 'Name'"
+
+
+def empty_window(rule: rule_engine.Rule, meals_df: pd.DataFrame, check_date: datetime) -> bool:
+    """Whether the rule is a no-repeat rule and no meal is planned within its window around a date."""
+    if not isinstance(rule, rule_engine.NoRepeatInWindowRule):
+        return False
+    window = timedelta(days=rule.window_days)
+    dates = pd.to_datetime(meals_df["Date"])
+    return not ((dates >= check_date - window) & (dates <= check_date + window)).any()
+
+
+def empty_window_result(expected: Any, actual: Any) -> bool:
+    """Whether a no-repeat result around a date without meals is the original KeyError turned into a pass."""
+    return expected == EMPTY_WINDOW_ERROR and actual == (True, NO_REPEAT_AROUND_DATE)
+
+
+def repeated_dates(message: str) -> Tuple[Dict[str, Set[str]], str]:
+    """Dates per meal, and the closing window phrase, of a full-plan no-repeat violation."""
+    details, _, window = message.rpartition(", which includes ")
+    repeats = {}
+    for detail in details.split("; "):
+        name, _, dates = detail.partition(" repeats on dates: ")
+        repeats[name] = set(dates.split(", "))
+    return repeats, window
+
+
+def full_plan_repeats(expected: Any, actual: Any) -> bool:
+    """
+    Whether a full-plan no-repeat violation reports the repeat the original rule found.
+
+    The original rule stopped at the first repeat and listed the earlier dates of that meal within the
+    window. The vectorized validation reports every repeating meal, with all the dates involved in its
+    repeats, so the original meal has to be reported with at least the original dates.
+    """
+    if not (isinstance(expected, tuple) and isinstance(actual, tuple)) or expected[0] or actual[0]:
+        return False
+    expected_repeats, expected_window = repeated_dates(expected[1])
+    actual_repeats, actual_window = repeated_dates(actual[1])
+    (name, dates), *others = expected_repeats.items()
+    return not others and expected_window == actual_window and dates <= actual_repeats.get(name, set())
+
+
+def outcome(function: Callable[..., Any], *args: Any) -> Any:
+    """Result of a call, or the exception it raised as 'Type: message', so that it can be compared too."""
+    try:
+        return function(*args)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+class Differ:
+    """Collects mismatches between optimized and reference results, and counts the accepted divergences."""
+
+    def __init__(self):
+        self.checks = 0
+        self.mismatches: List[Dict[str, Any]] = []
+        self.divergences: Counter = Counter()
+
+    def compare(
+        self,
+        expected: Any,
+        function: Callable[..., Any],
+        args: Tuple,
+        divergence: Optional[Tuple[str, Callable[[Any, Any], bool]]] = None,
+        **context: Any,
+    ) -> None:
+        """
+        Call the optimized implementation and record its result if it differs from the expected one (or raises).
+
+        A difference is accepted (and counted) instead if divergence is given as a (name in DIVERGENCES,
+        check) pair and check(expected, actual) holds.
+        """
+        self.checks += 1
+        actual = outcome(function, *args)
+        if expected == actual:
+            return
+        if divergence is not None and divergence[1](expected, actual):
+            self.divergences[divergence[0]] += 1
+            return
+        self.mismatches.append({"expected": expected, "actual": actual, **context})
+
+
+def candidate_verdict(verdicts: CandidateVerdicts, index: int) -> Tuple[bool, str]:
+    """A batched verdict in the form can_add_meal() returns."""
+    return bool(verdicts.can_add[index]), verdicts.reason(index)
+
+
+def served_days(verdicts: CandidateVerdicts) -> List[float]:
+    return [float(days) for days in verdicts.days_since_served]
+
+
+def expected_served_days(meals_df: pd.DataFrame, candidates: CandidateSet, check_date: datetime) -> List[float]:
+    """Days since each candidate was last planned in the plan, infinite if it never was."""
+    last_planned = {}
+    for meal_date, name in zip(meals_df["Date"], meals_df["Name"], strict=True):
+        if not pd.isna(name):
+            last_planned[name] = max(last_planned.get(name, meal_date), meal_date)
+    return [
+        float((check_date.date() - last_planned[name]).days) if name in last_planned else float("inf")
+        for name in candidates.names
+    ]
+
+
+def day_verdict(result: Any) -> Any:
+    """Verdict of a validate() outcome, or the exception it raised."""
+    return result[0] if isinstance(result, tuple) else result
+
+
+def day_verdicts(rule: rule_engine.Rule, plan: Any, start: datetime, end: datetime) -> List[bool]:
+    return [bool(is_valid) for is_valid in rule.validate_days(plan, start, end)]
+
+
+def check_rule(
+    differ: Differ,
+    rule: rule_engine.Rule,
+    meals_df: pd.DataFrame,
+    plans: Dict[str, Any],
+    dates: List[Optional[datetime]],
+    candidate_set: CandidateSet,
+    seed: int,
+) -> None:
+    """Compare one rule to its reference on every plan representation."""
+    reference = reference_rule(rule)
+
+    for check_date in dates:
+        expected = outcome(reference.validate, meals_df, check_date)
+        divergence = None
+        if check_date is None and isinstance(rule, rule_engine.NoRepeatInWindowRule):
+            divergence = (FULL_PLAN_REPEATS, full_plan_repeats)
+        elif check_date is not None and empty_window(rule, meals_df, check_date):
+            divergence = (EMPTY_WINDOW, empty_window_result)
+        for plan_kind, plan in plans.items():
+            differ.compare(
+                expected,
+                rule.validate,
+                (plan, check_date),
+                divergence=divergence,
+                seed=seed,
+                rule=rule.name,
+                check="validate",
+                plan=plan_kind,
+                date=check_date,
+            )
+        if check_date is not None:
+            check_candidates(differ, rule, reference, meals_df, plans, check_date, candidate_set, seed)
+
+    # A range of days around the plan, checked day by day by the reference
+    start = next((check_date for check_date in dates if check_date is not None)) - timedelta(days=10)
+    check_days(differ, rule, reference, meals_df, plans, start, start + timedelta(days=45), seed)
+
+
+def check_candidates(
+    differ: Differ,
+    rule: rule_engine.Rule,
+    reference: Any,
+    meals_df: pd.DataFrame,
+    plans: Dict[str, Any],
+    check_date: datetime,
+    candidate_set: CandidateSet,
+    seed: int,
+) -> None:
+    """Compare can_add_meal() and evaluate_candidates() for every candidate on a date."""
+    candidates = candidate_set.meals
+    expected_verdicts = [
+        outcome(reference.can_add_meal, candidate["name"], candidate_set.tag_lists[i], check_date, meals_df)
+        for i, candidate in enumerate(candidates)
+    ]
+    no_repeat = isinstance(rule, rule_engine.NoRepeatInWindowRule)
+    expected_served = expected_served_days(meals_df, candidate_set, check_date) if no_repeat else None
+    for plan_kind, plan in plans.items():
+        verdicts = rule.evaluate_candidates(candidate_set, check_date, plan)
+        if no_repeat:
+            differ.compare(
+                expected_served,
+                served_days,
+                (verdicts,),
+                seed=seed,
+                rule=rule.name,
+                check="days_since_served",
+                plan=plan_kind,
+                date=check_date,
+            )
+        for i, candidate in enumerate(candidates):
+            context = {
+                "seed": seed,
+                "rule": rule.name,
+                "plan": plan_kind,
+                "date": check_date,
+                "candidate": candidate,
+            }
+            differ.compare(
+                expected_verdicts[i],
+                rule.can_add_meal,
+                (candidate["name"], candidate_set.tag_lists[i], check_date, plan),
+                check="can_add_meal",
+                **context,
+            )
+            differ.compare(
+                expected_verdicts[i],
+                candidate_verdict,
+                (verdicts, i),
+                check="evaluate_candidates",
+                **context,
+            )
+
+
+def check_days(
+    differ: Differ,
+    rule: rule_engine.Rule,
+    reference: Any,
+    meals_df: pd.DataFrame,
+    plans: Dict[str, Any],
+    start: datetime,
+    end: datetime,
+    seed: int,
+) -> None:
+    """Compare validate_days() over a range of days to the reference validating day by day."""
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    expected_days = [day_verdict(outcome(reference.validate, meals_df, day)) for day in days]
+    empty_days = {i for i, day in enumerate(days) if empty_window(rule, meals_df, day)}
+
+    def empty_window_days(expected: List[Any], actual: Any) -> bool:
+        return isinstance(actual, list) and all(
+            expected_day == actual_day or (i in empty_days and expected_day == EMPTY_WINDOW_ERROR and actual_day)
+            for i, (expected_day, actual_day) in enumerate(zip(expected, actual, strict=True))
+        )
+
+    for plan_kind, plan in plans.items():
+        differ.compare(
+            expected_days,
+            day_verdicts,
+            (rule, plan, start, end),
+            divergence=(EMPTY_WINDOW, empty_window_days) if empty_days else None,
+            seed=seed,
+            rule=rule.name,
+            check="validate_days",
+            plan=plan_kind,
+            date=start,
+        )
+
+
+def edit_plan(rng: random.Random, meals_df: pd.DataFrame, state: PlanState) -> pd.DataFrame:
+    """Apply the same random additions and removals to a DataFrame and a PlanState."""
+    changes = []
+    keep = [True] * len(meals_df)
+    for _ in range(rng.randint(1, 6)):
+        if len(meals_df) and rng.random() < 0.5:
+            index = rng.randrange(len(meals_df))
+            if keep[index]:
+                keep[index] = False
+                row = meals_df.iloc[index]
+                changes.append(((row["Date"], row["Name"], row["Tags"]), None))
+    additions = []
+    for candidate in generate_candidates(rng, meals_df, count=rng.randint(0, 4)):
+        meal_date = date(2024, 1, 1) + timedelta(days=rng.randint(-30, 400))
+        if len(meals_df):
+            meal_date = meals_df["Date"].iloc[rng.randrange(len(meals_df))] + timedelta(days=rng.randint(-5, 5))
+        additions.append(
+            {
+                "Date": meal_date,
+                "Weekday": meal_date.strftime("%A"),
+                "Name": candidate["name"],
+                "Tags": candidate["tags"] or None,
+                "Notes": None,
+            }
+        )
+        changes.append((None, (meal_date, candidate["name"], candidate["tags"] or None)))
+
+    state.apply_changes(changes)
+    edited = pd.concat([meals_df[keep], pd.DataFrame(additions, columns=meals_df.columns)], ignore_index=True)
+    return edited.sort_values("Date", kind="stable").reset_index(drop=True)
+
+
+def check_seed(differ: Differ, seed: int, edits: int = 3) -> None:
+    """Generate a plan, rules and candidates from a seed and compare all rules, also after editing the plan."""
+    rng = random.Random(seed)
+    meals_df = generate_plan(rng)
+    rules = generate_rules(rng)
+    # The same candidate set throughout, so the state keeps its eligibility matrices up to date across edits
+    candidate_set = CandidateSet(generate_candidates(rng, meals_df))
+    state = incremental_state(rng, meals_df)
+
+    for _ in range(edits + 1):
+        plans = {"dataframe": meals_df, "snapshot": PlanSnapshot.from_dataframe(meals_df), "state": state}
+        dates = check_dates(rng, meals_df)
+        for rule in rules:
+            check_rule(differ, rule, meals_df, plans, dates, candidate_set, seed)
+        meals_df = edit_plan(rng, meals_df, state)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the optimized rules against the reference rules.")
+    parser.add_argument("--seeds", type=int, default=100, help="Number of random plans to check")
+    parser.add_argument("--seed", type=int, default=0, help="First seed")
+    parser.add_argument("--edits", type=int, default=3, help="Rounds of incremental edits per plan")
+    args = parser.parse_args(argv)
+
+    differ = Differ()
+    for seed in range(args.seed, args.seed + args.seeds):
+        check_seed(differ, seed, args.edits)
+
+    for mismatch in differ.mismatches[:MAX_REPORTED]:
+        print("MISMATCH", {key: value for key, value in mismatch.items() if key not in ("expected", "actual")})
+        print("  expected:", mismatch["expected"])
+        print("  actual:  ", mismatch["actual"])
+    print("Accepted divergences from the original rules:", file=sys.stderr)
+    for name, description in DIVERGENCES.items():
+        print(f"  {differ.divergences[name]:>6} x {name}: {description}", file=sys.stderr)
+    print(f"{differ.checks} checks, {len(differ.mismatches)} mismatches", file=sys.stderr)
+    return 1 if differ.mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+Reference implementations that benchmarks.differential checks the optimized meal plan rules against.
+
+Rules that already existed in the original rule engine are checked against that engine itself, kept as a
+verbatim copy in benchmarks.baseline_rules. The rules added since (monthly and rolling-window requirements)
+have no original version, so they get deliberately naive references here: every check walks the meal rows
+of a DataFrame one by one, without snapshots, tag indexes or prefix sums. These define the expected verdicts
+and messages, so they must only change when the intended semantics change.
+"""
+
+from datetime import date as Date
+from datetime import datetime, timedelta
+from typing import List, Optional, Set, Tuple
+
+import pandas as pd
+
+from benchmarks import baseline_rules
+from gusto2.rules import rule_engine
+
+MealRow = Tuple[Date, Optional[str], Set[str]]
+
+
+def meal_rows(meals_df: pd.DataFrame) -> List[MealRow]:
+    """(date, name, lowercase tags) of every meal with a date, sorted by date (stable)."""
+    rows = []
+    for meal_date, name, tags in zip(meals_df["Date"], meals_df["Name"], meals_df["Tags"], strict=True):
+        if pd.isna(meal_date):
+            continue
+        name = None if pd.isna(name) else name
+        tag_set = set() if pd.isna(tags) else {tag.strip().lower() for tag in tags.split(",")}
+        rows.append((pd.Timestamp(meal_date).date(), name, tag_set))
+    return sorted(rows, key=lambda row: row[0])
+
+
+def has_any(tag_set: Set[str], tags: List[str]) -> bool:
+    return any(tag in tag_set for tag in tags)
+
+
+def window_count(rows: List[MealRow], tags: List[str], first: Date, last: Date) -> int:
+    """Meals with any of the tags from first to last (inclusive)."""
+    return sum(1 for meal_date, _, tag_set in rows if first <= meal_date <= last and has_any(tag_set, tags))
+
+
+class ReferenceMonthlyRequirementRule:
+    def __init__(self, tag: str, occurrences: int):
+        self.tag = tag.lower()
+        self.occurrences = occurrences
+
+    def _month_count(self, rows: List[MealRow], year: int, month: int) -> int:
+        return sum(
+            1
+            for meal_date, _, tag_set in rows
+            if (meal_date.year, meal_date.month) == (year, month) and self.tag in tag_set
+        )
+
+    def validate(self, meals_df: pd.DataFrame, date: Optional[datetime] = None) -> Tuple[bool, str]:
+        rows = meal_rows(meals_df)
+        if not rows:
+            return False, f"No meals to validate for {self.tag} requirement"
+
+        if date is None:
+            for year, month in sorted({(meal_date.year, meal_date.month) for meal_date, _, _ in rows}):
+                tag_count = self._month_count(rows, year, month)
+                if tag_count < self.occurrences:
+                    return (
+                        False,
+                        f"Month {year:04d}-{month:02d} has only {tag_count} meals with tag '{self.tag}', but "
+                        f"{self.occurrences} are required",
+                    )
+            return True, f"All months have at least {self.occurrences} meals with tag '{self.tag}'"
+
+        tag_count = self._month_count(rows, date.year, date.month)
+        if tag_count < self.occurrences:
+            return (
+                False,
+                f"Month {date.strftime('%Y-%m')} has only {tag_count} meals with tag '{self.tag}', but "
+                f"{self.occurrences} are required",
+            )
+        return True, f"Month has at least {self.occurrences} meals with tag '{self.tag}'"
+
+    def can_add_meal(
+        self, meal_name: str, meal_tags: List[str], date: datetime, meals_df: pd.DataFrame
+    ) -> Tuple[bool, str]:
+        if self.tag not in [tag.lower() for tag in meal_tags or []]:
+            return True, f"Meal doesn't have the '{self.tag}' tag, so doesn't help meet the monthly requirement"
+        tag_count = self._month_count(meal_rows(meals_df), date.year, date.month)
+        if tag_count >= self.occurrences:
+            return (
+                True,
+                f"Monthly requirement for '{self.tag}' ({self.occurrences} meals) already met ({tag_count} meals)",
+            )
+        return (
+            True,
+            f"Adding this meal helps meet the monthly requirement for '{self.tag}' "
+            f"({tag_count + 1}/{self.occurrences})",
+        )
+
+
+class ReferenceRollingWindowTagCountRule:
+    def __init__(self, tags: List[str], window_days: int, min_count: Optional[int], max_count: Optional[int]):
+        self.tags = [tag.lower() for tag in tags]
+        self.window_days = window_days
+        self.min_count = min_count
+        self.max_count = max_count
+        self.tag_label = " or ".join(f"'{tag}'" for tag in self.tags)
+
+    def _count(self, rows: List[MealRow], start: Date) -> int:
+        return window_count(rows, self.tags, start, start + timedelta(days=self.window_days - 1))
+
+    def _window_label(self, start: Date) -> str:
+        end = start + timedelta(days=self.window_days - 1)
+        return f"{self.window_days}-day window {start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')}"
+
+    def _starts(self, first: Date, last: Date) -> List[Date]:
+        return [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+
+    def validate(self, meals_df: pd.DataFrame, date: Optional[datetime] = None) -> Tuple[bool, str]:
+        rows = meal_rows(meals_df)
+        if not rows:
+            if self.max_count is not None:
+                return True, "No meals to validate"
+            return False, f"No meals to validate for {self.tag_label} requirement"
+
+        if date is None:
+            return self._validate_plan(rows)
+        return self._validate_date(rows, date)
+
+    def _validate_plan(self, rows: List[MealRow]) -> Tuple[bool, str]:
+        first, last = rows[0][0], rows[-1][0]
+        if self.max_count is not None:
+            for start in self._starts(first - timedelta(days=self.window_days - 1), last):
+                tag_count = self._count(rows, start)
+                if tag_count > self.max_count:
+                    return (
+                        False,
+                        f"{self._window_label(start)} has {tag_count} meals with tag {self.tag_label}, but at most "
+                        f"{self.max_count} are allowed",
+                    )
+            return (
+                True,
+                f"No {self.window_days}-day window has more than {self.max_count} meals with tag {self.tag_label}",
+            )
+
+        if (last - first).days + 1 < self.window_days:
+            return True, f"Less than {self.window_days} days planned, so there is no complete window to check"
+        for start in self._starts(first, last - timedelta(days=self.window_days - 1)):
+            tag_count = self._count(rows, start)
+            if tag_count < self.min_count:
+                return (
+                    False,
+                    f"{self._window_label(start)} has only {tag_count} meals with tag {self.tag_label}, but "
+                    f"{self.min_count} are required",
+                )
+        return (
+            True,
+            f"Every {self.window_days}-day window has at least {self.min_count} meals with tag {self.tag_label}",
+        )
+
+    def _validate_date(self, rows: List[MealRow], date: datetime) -> Tuple[bool, str]:
+        if self.max_count is not None:
+            worst, worst_count = None, -1
+            for start in self._starts((date - timedelta(days=self.window_days - 1)).date(), date.date()):
+                tag_count = self._count(rows, start)
+                if tag_count > worst_count:
+                    worst, worst_count = start, tag_count
+            if worst_count > self.max_count:
+                return (
+                    False,
+                    f"{self._window_label(worst)} has {worst_count} meals with tag {self.tag_label}, but at most "
+                    f"{self.max_count} are allowed",
+                )
+            return (
+                True,
+                f"No {self.window_days}-day window around this date has more than {self.max_count} meals with tag "
+                f"{self.tag_label}",
+            )
+
+        start = (date - timedelta(days=self.window_days - 1)).date()
+        tag_count = self._count(rows, start)
+        if tag_count < self.min_count:
+            return (
+                False,
+                f"{self._window_label(start)} has only {tag_count} meals with tag {self.tag_label}, but "
+                f"{self.min_count} are required",
+            )
+        return (
+            True,
+            f"The {self.window_days} days up to this date have at least {self.min_count} meals with tag "
+            f"{self.tag_label}",
+        )
+
+    def can_add_meal(
+        self, meal_name: str, meal_tags: List[str], date: datetime, meals_df: pd.DataFrame
+    ) -> Tuple[bool, str]:
+        if not has_any({tag.lower() for tag in meal_tags or []}, self.tags):
+            return True, f"Meal doesn't have tag {self.tag_label}, so this rule doesn't apply"
+
+        rows = meal_rows(meals_df)
+        if self.max_count is not None:
+            starts = self._starts((date - timedelta(days=self.window_days - 1)).date(), date.date())
+            tag_count = max(self._count(rows, start) for start in starts)
+            if tag_count + 1 > self.max_count:
+                return (
+                    False,
+                    f"Adding this meal would exceed {self.max_count} meals with tag {self.tag_label} within "
+                    f"{self.window_days} days",
+                )
+            return (
+                True,
+                f"Meal with tag {self.tag_label} fits within {self.max_count} per {self.window_days} days "
+                f"({tag_count + 1}/{self.max_count})",
+            )
+
+        tag_count = self._count(rows, (date - timedelta(days=self.window_days - 1)).date())
+        if tag_count >= self.min_count:
+            return (
+                True,
+                f"Requirement for {self.tag_label} ({self.min_count} per {self.window_days} days) already met "
+                f"({tag_count} meals)",
+            )
+        return (
+            True,
+            f"Adding this meal helps meet the requirement for {self.tag_label} ({tag_count + 1}/{self.min_count} per "
+            f"{self.window_days} days)",
+        )
+
+
+def reference_rule(rule: rule_engine.Rule):
+    """Reference implementation with the same parameters as an optimized rule."""
+    if isinstance(rule, rule_engine.NoRepeatInWindowRule):
+        return baseline_rules.NoRepeatInWindowRule(rule.name, rule.description, rule.window_days)
+    if isinstance(rule, rule_engine.MultiTagWeeklyRequirementRule):
+        return baseline_rules.MultiTagWeeklyRequirementRule(rule.name, rule.description, rule.tags, rule.occurrences)
+    if isinstance(rule, rule_engine.WeeklyRequirementRule):
+        return baseline_rules.WeeklyRequirementRule(rule.name, rule.description, rule.tag, rule.occurrences)
+    if isinstance(rule, rule_engine.SpecificDayRequirementRule):
+        return baseline_rules.SpecificDayRequirementRule(rule.name, rule.description, rule.day_of_week, rule.tag)
+    if isinstance(rule, rule_engine.MonthlyRequirementRule):
+        return ReferenceMonthlyRequirementRule(rule.tag, rule.occurrences)
+    if isinstance(rule, rule_engine.RollingWindowTagCountRule):
+        return ReferenceRollingWindowTagCountRule(rule.tags, rule.window_days, rule.min_count, rule.max_count)
+    raise ValueError(f"No reference implementation for {type(rule).__name__}")
@@ -0,0 +1,114 @@
+"""
+Synthetic recipe books and meal plans for benchmarks and tests of the rules module.
+
+Everything is generated from a seed, so the same parameters always produce the same data.
+"""
+
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+import pandas as pd
+
+# Tags used by the default rules, so they have something to find
+RULE_TAGS = ["fish", "pasta", "rice", "asian", "comfort food", "steak"]
+
+FILLER_TAGS = [
+    "vegetarian",
+    "vegan",
+    "chicken",
+    "beef",
+    "pork",
+    "soup",
+    "salad",
+    "quick",
+    "oven",
+    "spicy",
+    "italian",
+    "mexican",
+    "indian",
+    "french",
+    "greek",
+    "thai",
+    "japanese",
+    "stew",
+    "bbq",
+    "healthy",
+    "kids",
+    "summer",
+    "winter",
+    "leftovers",
+]
+
+# Number of tags per recipe (min, max) for each tag density
+TAG_DENSITIES = {"sparse": (1, 2), "medium": (2, 4), "dense": (4, 8)}
+
+# Share of recipes that skip the no-repeat rule
+SKIP_VALIDATION_SHARE = 0.01
+
+
+def generate_recipes(count: int, density: str = "medium", seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Generate a recipe book.
+
+    Args:
+        count: Number of recipes
+        density: Tag density, one of TAG_DENSITIES
+        seed: Random seed
+
+    Returns:
+        List of recipes, each a dict with 'name' and comma-separated 'tags' (the format the rule engine expects)
+    """
+    rng = random.Random(seed)
+    min_tags, max_tags = TAG_DENSITIES[density]
+    all_tags = RULE_TAGS + FILLER_TAGS
+
+    recipes = []
+    for index in range(count):
+        tags = rng.sample(all_tags, rng.randint(min_tags, max_tags))
+        if rng.random() < SKIP_VALIDATION_SHARE:
+            tags.append("skip-validation")
+        recipes.append({"name": f"Recipe {index:05d}", "tags": ",".join(tags)})
+    return recipes
+
+
+def generate_meal_plan(
+    recipes: List[Dict[str, Any]],
+    years: float,
+    end: date = date(2025, 12, 31),
+    empty_day_share: float = 0.05,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    Generate a meal plan with (at most) one meal per day, in the format database.read_meals() returns.
+
+    Args:
+        recipes: Recipe book to pick meals from
+        years: Length of the plan in years
+        end: Last day of the plan
+        empty_day_share: Share of days without a meal
+        seed: Random seed
+
+    Returns:
+        DataFrame with Date, Weekday, Name, Tags and Notes columns
+    """
+    rng = random.Random(seed)
+    days = int(round(years * 365))
+    start = end - timedelta(days=days - 1)
+
+    rows = []
+    for offset in range(days):
+        if rng.random() < empty_day_share:
+            continue
+        day = start + timedelta(days=offset)
+        recipe = rng.choice(recipes)
+        rows.append(
+            {
+                "Date": day,
+                "Weekday": day.strftime("%A"),
+                "Name": recipe["name"],
+                "Tags": recipe["tags"],
+                "Notes": pd.NA,
+            }
+        )
+    return pd.DataFrame(rows, columns=["Date", "Weekday", "Name", "Tags", "Notes"])
@@ -1,10 +1,29 @@
 import os
-from datetime import datetime
+import threading
+from datetime import date, datetime
 
+import numpy as np
 import pandas as pd
-from sqlalchemy import Column, Date, Integer, String, Text, ForeignKey, create_engine
+from sqlalchemy import (
+    Column,
+    Date,
+    Integer,
+    String,
+    Text,
+    ForeignKey,
+    create_engine,
+    delete,
+    func,
+    insert,
+    select,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship, joinedload
+from sqlalchemy.orm import sessionmaker, relationship
+
+from gusto2.tags import normalize_tags, split_tags
 
 # Path to the data directory - with fallback to a writable location
 DEFAULT_DATA_DIR = "/app/data"
@@ -23,6 +42,11 @@ DATABASE_URL = f"sqlite:///{os.path.join(DATA_DIR, 'gusto2.db')}"
 
 # Global variables
 notion_page_ids = {}  # Map dates to Notion page IDs (in-memory cache)
+meals_listeners = []  # Callbacks notified when meals change, see add_meals_listener()
+meals_version = 0  # Bumped on every write to the meals (or recipe tags), see notify_meals_changed()
+recipes_version = 0  # Bumped on every write to the recipes, see notify_recipes_changed()
+read_cache = {}  # Parsed meals and recipes per table: (version, DataFrame), see _read_cached()
+read_cache_lock = threading.Lock()
 
 # SQLAlchemy setup
 engine = create_engine(DATABASE_URL)
@@ -37,7 +61,7 @@ class MealModel(Base):
     id = Column(Integer, primary_key=True, index=True)
     date = Column(Date, index=True)
     weekday = Column(String)
-    recipe_id = Column(Integer, ForeignKey("recipes.id"), nullable=False)
+    recipe_id = Column(Integer, ForeignKey("recipes.id"), nullable=False, index=True)
     notes = Column(Text)
     notion_page_id = Column(String, index=True)
 
@@ -52,6 +76,22 @@ class RecipeModel(Base):
     tags = Column(String)
 
 
+class TagModel(Base):
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True)
+
+
+class RecipeTagModel(Base):
+    """Normalized tags of a recipe, kept in sync with RecipeModel.tags by every write to the recipes"""
+
+    __tablename__ = "recipe_tags"
+
+    recipe_id = Column(Integer, ForeignKey("recipes.id"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id"), primary_key=True, index=True)
+
+
 class NotionPageIdModel(Base):
     __tablename__ = "notion_page_ids"
 
@@ -67,6 +107,13 @@ class ChangedIndexModel(Base):
     index = Column(Integer, unique=True, index=True)
 
 
+class ChangedMealModel(Base):
+    __tablename__ = "changed_meals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    meal_id = Column(Integer, unique=True, index=True)
+
+
 class IngredientModel(Base):
     __tablename__ = "ingredients"
 
@@ -76,15 +123,63 @@ class IngredientModel(Base):
     last_updated = Column(Date, default=datetime.now)
 
 
+# Columns of the meals DataFrame
+MEAL_COLUMNS = {
+    "Id": MealModel.id,
+    "Date": MealModel.date,
+    "Weekday": MealModel.weekday,
+    "Name": RecipeModel.name,
+    "Tags": RecipeModel.tags,
+    "Notes": MealModel.notes,
+}
+
+
 # Create tables if they don't exist
 def init_db():
     try:
         # Only create tables if they don't exist, don't drop existing tables
         Base.metadata.create_all(bind=engine)
+
+        # create_all() skips existing tables, so add indexes introduced after a table was created
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+
+        # Migrate the comma-separated recipe tags into recipe_tags, once
+        with SessionLocal() as db:
+            migrated = db.query(RecipeTagModel).first() is not None
+            tagged = db.query(RecipeModel.id).filter(RecipeModel.tags.isnot(None), RecipeModel.tags != "").first()
+        if tagged and not migrated:
+            sync_recipe_tags()
     except Exception:
         raise
 
 
+def add_meals_listener(callback):
+    """Register a callback that is notified after meals are written.
+
+    The callback receives a list of (old, new) meal rows, each row being a (date, name, tags) tuple and
+    old/new being None for inserts/deletes. It receives None when the whole meal plan was replaced."""
+    meals_listeners.append(callback)
+
+
+def notify_meals_changed(changes=None):
+    """Notify meals listeners about changed meal rows (None: everything may have changed)"""
+    global meals_version
+    meals_version += 1
+    for callback in meals_listeners:
+        try:
+            callback(changes)
+        except Exception:
+            pass
+
+
+def notify_recipes_changed():
+    """Mark the recipes as changed, so caches derived from them are rebuilt"""
+    global recipes_version
+    recipes_version += 1
+
+
 # Load Notion page IDs from database to in-memory cache
 def load_notion_page_ids():
     global notion_page_ids
@@ -174,47 +269,74 @@ def get_notion_page_id(date_str):
 
 
 def read_meals():
-    """Read all meals from the database"""
+    """Read all meals from the database (a read-only snapshot shared until the meals change)"""
 
     try:
-        with SessionLocal() as db:
-            meals = db.query(MealModel).options(joinedload(MealModel.recipe)).order_by(MealModel.date).all()
-
-        # Convert to pandas DataFrame for compatibility with existing code
-        meals_data = []
-        for i, meal in enumerate(meals):
-            recipe = meal.recipe
-            if recipe is None:
-                continue  # Skip meals with no valid recipe
-            meals_data.append(
-                {
-                    "Date": meal.date,
-                    "Weekday": meal.weekday,
-                    "Name": recipe.name,
-                    "Tags": recipe.tags,
-                    "Notes": meal.notes,
-                    "notion_page_id": meal.notion_page_id,
-                }
-            )
-
-        # Create DataFrame
-        if not meals_data:
-            # Return empty dataframe with expected columns
-            return pd.DataFrame(columns=["Date", "Weekday", "Name", "Tags", "Notes"])
-
-        meals_df = pd.DataFrame(meals_data)
-
-        # Replace None with NaN for pandas operations
-        meals_df = meals_df.replace({None: pd.NA})
-
-        # Drop notion_page_id column as it's not needed for the frontend
-        if "notion_page_id" in meals_df.columns:
-            meals_df = meals_df.drop("notion_page_id", axis=1)
-
-        return meals_df
+        return _read_cached("meals", lambda: meals_version, _read_meals_df)
     except Exception as e:
         # Return empty dataframe
-        return pd.DataFrame(columns=["Date", "Weekday", "Name", "Tags", "Notes"])
+        return pd.DataFrame(columns=list(MEAL_COLUMNS))
+
+
+def read_meals_between(start_date, end_date):
+    """Read the meals from start_date to end_date (inclusive), using the index on the meal date"""
+    return _read_meals_df(MealModel.date >= start_date, MealModel.date <= end_date)
+
+
+def read_meal(meal_id):
+    """Read a single meal by its primary key, as a dict in the format of the meals DataFrame rows (None if not found)"""
+    meals_df = _read_meals_df(MealModel.id == meal_id)
+    return meals_df.iloc[0].to_dict() if len(meals_df) else None
+
+
+def read_meals_by_ids(meal_ids):
+    """Read the meals with the given primary keys, ordered by date"""
+    return _read_meals_df(MealModel.id.in_(list(meal_ids)))
+
+
+def meal_id_at(index):
+    """Primary key of the meal at a position of the date-ordered meal plan (None if out of range)"""
+    if index < 0:
+        return None
+    with SessionLocal() as db:
+        row = db.query(MealModel.id).order_by(MealModel.date, MealModel.id).offset(index).limit(1).first()
+    return row[0] if row else None
+
+
+def count_meals():
+    """Number of meals in the database"""
+    with SessionLocal() as db:
+        return db.query(func.count(MealModel.id)).scalar()
+
+
+def _read_meals_df(*criteria):
+    """
+    Read the meals matching the criteria, ordered by date, into the meals DataFrame.
+
+    The meals are read with a single Core join on their recipe and go straight into columns, without building
+    ORM objects or a dict per row. Meals without a valid recipe are skipped.
+    """
+    statement = (
+        select(*MEAL_COLUMNS.values())
+        .join(RecipeModel, MealModel.recipe_id == RecipeModel.id)
+        .where(*criteria)
+        .order_by(MealModel.date, MealModel.id)
+    )
+    with engine.connect() as connection:
+        rows = connection.execute(statement).all()
+
+    if not rows:
+        # Return empty dataframe with expected columns
+        return pd.DataFrame(columns=list(MEAL_COLUMNS))
+
+    columns = zip(*rows, strict=True)
+    meals_df = pd.DataFrame({name: list(values) for name, values in zip(MEAL_COLUMNS, columns, strict=True)})
+
+    # Replace None with NaN for pandas operations (string columns already hold NaN)
+    for name in ("Date", "Weekday", "Name", "Tags", "Notes"):
+        if meals_df[name].dtype == object:
+            meals_df[name] = meals_df[name].astype(object).where(meals_df[name].notna(), pd.NA)
+    return meals_df
 
 
 def get_changed_indices():
@@ -245,136 +367,430 @@ def save_changed_indices(indices_set):
         return False
 
 
+def get_changed_meal_ids():
+    """Load the set of primary keys of changed meals from the database"""
+    try:
+        with SessionLocal() as db:
+            return {record.meal_id for record in db.query(ChangedMealModel).all()}
+    except Exception:
+        return set()
+
+
+def save_changed_meal_ids(meal_ids):
+    """Save the set of primary keys of changed meals to the database"""
+    try:
+        with SessionLocal() as db:
+            db.query(ChangedMealModel).delete()
+            for meal_id in meal_ids:
+                db.add(ChangedMealModel(meal_id=meal_id))
+            db.commit()
+        return True
+    except Exception:
+        return False
+
+
 def df_to_json(df):
     """Convert DataFrame to JSON format suitable for API responses"""
-    # Handle NaT/NaN values before converting to JSON
-    df_copy = df.replace({pd.NA: None, pd.NaT: None})
-
-    # Convert datetime columns to string format
-    if "Date" in df_copy.columns:
-        df_copy["Date"] = df_copy["Date"].apply(
-            lambda x: x.strftime("%Y/%m/%d") if pd.notna(x) and x is not None else None
-        )
+    columns = {}
+    for name in df.columns:
+        values = df[name]
+        if name == "Date":
+            values = _format_dates(values)
+        # Handle NaT/NaN values, column by column
+        columns[name] = values.astype(object).where(values.notna(), None).tolist()
 
     # Convert to records format (list of dicts)
-    return df_copy.to_dict("records")
+    return [dict(zip(columns, row, strict=True)) for row in zip(*columns.values(), strict=True)]
 
 
-def update_changeset(index, meal):
-    """Update a single meal in the database"""
+def _format_dates(dates):
+    """Format a column of dates as YYYY/MM/DD strings (NaN where missing), vectorized"""
+    days = pd.to_datetime(dates).to_numpy().astype("datetime64[D]")
+    formatted = pd.Series(np.datetime_as_string(days, unit="D"), index=dates.index).str.replace("-", "/", regex=False)
+    return formatted.where(~np.isnat(days))
+
+
+def update_meal(meal_id, meal):
+    """Update a single meal in the database, looked up by its primary key"""
     try:
         with SessionLocal() as db:
-            # Get all meals to find the one at the specified index
-            meals = db.query(MealModel).order_by(MealModel.date).all()
-
-            if index < 0 or index >= len(meals):
+            db_meal = db.get(MealModel, meal_id)
+            if db_meal is None:
                 return False
-
-            db_meal = meals[index]
-
-            # Update recipe reference if Name is provided
-            if "Name" in meal and meal["Name"] is not None:
-                recipe = db.query(RecipeModel).filter_by(name=meal["Name"]).first()
-                if not recipe:
-                    # Create new recipe if it doesn't exist
-                    recipe = RecipeModel(name=meal["Name"], tags=meal.get("Tags"))
-                    db.add(recipe)
-                    db.commit()
-                db_meal.recipe_id = recipe.id
-
-            # Update tags on the recipe if provided
-            if "Tags" in meal and meal["Tags"] is not None:
-                recipe = db.query(RecipeModel).filter_by(id=db_meal.recipe_id).first()
-                if recipe:
-                    # Normalize tags to lowercase
-                    if meal["Tags"]:
-                        meal["Tags"] = ",".join([tag.strip().lower() for tag in meal["Tags"].split(",") if tag.strip()])
-                    recipe.tags = meal["Tags"]
-
-            if "Notes" in meal and meal["Notes"] is not None:
-                db_meal.notes = meal["Notes"]
-            if "Date" in meal and meal["Date"] is not None:
-                try:
-                    if isinstance(meal["Date"], str):
-                        date_obj = pd.to_datetime(meal["Date"], format="%Y/%m/%d")
-                    else:
-                        date_obj = pd.to_datetime(meal["Date"])
-                    db_meal.date = date_obj
-                    db_meal.weekday = date_obj.strftime("%A")
-                except Exception:
-                    return False
-
-            # Check if index already exists in changed_indices
-            existing_index = db.query(ChangedIndexModel).filter_by(index=index).first()
-            if not existing_index:
-                changed_index = ChangedIndexModel(index=index)
-                db.add(changed_index)
-
-            db.commit()
-
-        return True
+            return _update_meal(db, db_meal, meal, ChangedMealModel(meal_id=meal_id))
     except Exception:
         return False
 
 
-def read_recipes():
-    """Read recipes from database"""
+def update_changeset(index, meal):
+    """Update the meal at a position of the date-ordered meal plan (for the positional /api/meal/{index} routes)"""
     try:
         with SessionLocal() as db:
-            recipes = db.query(RecipeModel).order_by(RecipeModel.name).all()
+            if index < 0:
+                return False
+            db_meal = db.query(MealModel).order_by(MealModel.date, MealModel.id).offset(index).limit(1).first()
+            if db_meal is None:
+                return False
+            return _update_meal(db, db_meal, meal, ChangedIndexModel(index=index))
+    except Exception:
+        return False
 
-        # Convert to pandas DataFrame for compatibility with existing code
-        recipes_data = []
-        for recipe in recipes:
-            recipes_data.append({"Name": recipe.name, "Tags": recipe.tags})
 
-        # Create DataFrame
-        if not recipes_data:
-            # Return empty dataframe with expected columns
-            return pd.DataFrame(columns=["Name", "Tags"])
+def _update_meal(db, db_meal, meal, changed):
+    """Apply the fields of meal to a meal model, mark it as changed (unless it already is) and notify listeners"""
+    # Remember the meal as it was, so listeners can update incrementally
+    old_recipe = db_meal.recipe
+    old_row = (db_meal.date, old_recipe.name, old_recipe.tags) if old_recipe else (db_meal.date, None, None)
+    retagged, recipes_changed = _update_meal_recipe(db, db_meal, meal)
 
-        recipes_df = pd.DataFrame(recipes_data)
+    if "Notes" in meal and meal["Notes"] is not None:
+        db_meal.notes = meal["Notes"]
+    if "Date" in meal and meal["Date"] is not None:
+        try:
+            if isinstance(meal["Date"], str):
+                date_obj = pd.to_datetime(meal["Date"], format="%Y/%m/%d")
+            else:
+                date_obj = pd.to_datetime(meal["Date"])
+            db_meal.date = date_obj
+            db_meal.weekday = date_obj.strftime("%A")
+        except Exception:
+            if recipes_changed:
+                # The new recipe was committed already
+                notify_recipes_changed()
+            return False
+
+    # Remember the change for the next sync to Notion
+    changed_model = type(changed)
+    key = {"meal_id": changed.meal_id} if changed_model is ChangedMealModel else {"index": changed.index}
+    if not db.query(changed_model).filter_by(**key).first():
+        db.add(changed)
+
+    db.commit()
+
+    changes = _meal_changes(db, db_meal, old_row, retagged)
+    if recipes_changed:
+        notify_recipes_changed()
+    notify_meals_changed(changes)
+    return True
+
+
+def _update_meal_recipe(db, db_meal, meal):
+    """
+    Point a meal model at the recipe named in meal and apply the tags of meal to that recipe. A recipe that doesn't
+    exist yet is created and committed right away.
+
+    Returns:
+        Tuple of (retagged, recipes_changed): (id, name, old tags) of the recipe if its tags changed, else None, and
+        whether a recipe was created or retagged
+    """
+    retagged = None
+    recipes_changed = False
+
+    # Update recipe reference if Name is provided
+    if "Name" in meal and meal["Name"] is not None:
+        recipe = db.query(RecipeModel).filter_by(name=meal["Name"]).first()
+        if not recipe:
+            # Create new recipe if it doesn't exist
+            recipe = RecipeModel(name=meal["Name"], tags=meal.get("Tags"))
+            db.add(recipe)
+            db.flush()
+            _sync_recipe_tags(db, RecipeModel.id == recipe.id)
+            db.commit()
+            recipes_changed = True
+        db_meal.recipe_id = recipe.id
+
+    # Update tags on the recipe if provided
+    if "Tags" in meal and meal["Tags"] is not None:
+        recipe = db.query(RecipeModel).filter_by(id=db_meal.recipe_id).first()
+        if recipe:
+            # Normalize tags to lowercase
+            if meal["Tags"]:
+                meal["Tags"] = normalize_tags(meal["Tags"])
+            if recipe.tags != meal["Tags"]:
+                retagged = (recipe.id, recipe.name, recipe.tags)
+                recipes_changed = True
+                recipe.tags = meal["Tags"]
+                _sync_recipe_tags(db, RecipeModel.id == recipe.id)
+
+    return retagged, recipes_changed
+
+
+def _meal_changes(db, db_meal, old_row, retagged):
+    """
+    (old row, new row) pairs of (date, name, tags) for the meal listeners, after an update of a meal was committed.
+
+    Args:
+        db: Session the meal was updated in
+        db_meal: The updated meal model
+        old_row: (date, name, tags) of the meal before the update
+        retagged: (id, name, old tags) of the meal's recipe if the update changed its tags, else None
+
+    Returns:
+        List of changed rows: the meal itself and, if its recipe was retagged, every other meal of that recipe
+    """
+    new_recipe = db.query(RecipeModel).filter_by(id=db_meal.recipe_id).first()
+    changes = [(old_row, (db_meal.date, new_recipe.name, new_recipe.tags))]
+
+    # Changing a recipe's tags changes every other meal of that recipe as well
+    if retagged:
+        recipe_id, recipe_name, old_tags = retagged
+        other_dates = db.query(MealModel.date).filter(MealModel.recipe_id == recipe_id, MealModel.id != db_meal.id)
+        for (meal_date,) in other_dates:
+            changes.append(((meal_date, recipe_name, old_tags), (meal_date, recipe_name, new_recipe.tags)))
+    return changes
+
+
+def sync_recipe_tags():
+    """Rebuild recipe_tags from the tags column of all recipes (for writes that bypass this module)"""
+    with SessionLocal() as db:
+        _sync_recipe_tags(db)
+        db.commit()
+
+
+def _sync_recipe_tags(db, *criteria):
+    """
+    Rebuild the recipe_tags rows of the recipes matching the criteria (all recipes without criteria) from their
+    comma-separated tags column, creating missing tags. Flushes pending changes first; the caller commits.
+    """
+    db.flush()
+    recipe_tags = {
+        recipe_id: split_tags(tags) for recipe_id, tags in db.query(RecipeModel.id, RecipeModel.tags).filter(*criteria)
+    }
+    if criteria:
+        db.query(RecipeTagModel).filter(RecipeTagModel.recipe_id.in_(list(recipe_tags))).delete()
+    else:
+        db.query(RecipeTagModel).delete()
+
+    names = {tag for tags in recipe_tags.values() for tag in tags}
+    if not names:
+        return
+    statement = sqlite_insert(TagModel).on_conflict_do_nothing(index_elements=[TagModel.name])
+    db.execute(statement, [{"name": name} for name in names])
+    tag_ids = dict(db.query(TagModel.name, TagModel.id).filter(TagModel.name.in_(list(names))))
+    db.execute(
+        insert(RecipeTagModel),
+        [{"recipe_id": recipe_id, "tag_id": tag_ids[tag]} for recipe_id, tags in recipe_tags.items() for tag in tags],
+    )
+
+
+def read_tags(prefix=None, limit=None):
+    """
+    Read the tags in use with the number of recipes and meals that have them, most used first.
+
+    Args:
+        prefix: Only tags starting with this prefix (e.g. what was typed so far), case-insensitive
+        limit: Maximum number of tags
+
+    Returns:
+        DataFrame with Name, Recipes and Meals columns
+    """
+    meal_counts = (
+        select(RecipeTagModel.tag_id, func.count(MealModel.id).label("meals"))
+        .join(MealModel, MealModel.recipe_id == RecipeTagModel.recipe_id)
+        .group_by(RecipeTagModel.tag_id)
+        .subquery()
+    )
+    statement = (
+        select(TagModel.name, func.count(RecipeTagModel.recipe_id), func.coalesce(meal_counts.c.meals, 0))
+        .join(RecipeTagModel, RecipeTagModel.tag_id == TagModel.id)
+        .outerjoin(meal_counts, meal_counts.c.tag_id == TagModel.id)
+        .group_by(TagModel.id)
+        .order_by(func.count(RecipeTagModel.recipe_id).desc(), TagModel.name)
+        .limit(limit)
+    )
+    if prefix:
+        # A range on the (normalized) name rather than LIKE, so the unique index on it is used
+        prefix = prefix.strip().lower()
+        statement = statement.where(TagModel.name >= prefix, TagModel.name < prefix + "\uffff")
+
+    with engine.connect() as connection:
+        rows = connection.execute(statement).all()
+    return pd.DataFrame(rows, columns=["Name", "Recipes", "Meals"])
+
+
+def read_recipes_with_tags(tags, match_all=False):
+    """
+    Read the recipes that have any (or all) of the given tags, using the index on the tag id.
+
+    Args:
+        tags: Tags to look for (normalized like stored tags)
+        match_all: Only recipes that have every one of the tags
+
+    Returns:
+        DataFrame with Name and Tags columns, ordered by name
+    """
+    tags = {tag for tag in split_tags(",".join(tags))}
+    if not tags:
+        return pd.DataFrame(columns=["Name", "Tags"])
+
+    statement = (
+        select(RecipeModel.name, RecipeModel.tags)
+        .join(RecipeTagModel, RecipeTagModel.recipe_id == RecipeModel.id)
+        .join(TagModel, TagModel.id == RecipeTagModel.tag_id)
+        .where(TagModel.name.in_(list(tags)))
+        .group_by(RecipeModel.id)
+        .order_by(RecipeModel.name)
+    )
+    if match_all:
+        statement = statement.having(func.count(RecipeTagModel.tag_id) == len(tags))
 
-        # Replace None with NaN for pandas operations
-        recipes_df = recipes_df.replace({None: pd.NA})
+    with engine.connect() as connection:
+        rows = connection.execute(statement).all()
+    return pd.DataFrame(rows, columns=["Name", "Tags"]).replace({None: pd.NA})
 
-        return recipes_df
+
+def read_recipes():
+    """Read recipes from database (a read-only snapshot shared until the recipes change)"""
+    try:
+        return _read_cached("recipes", lambda: recipes_version, _read_recipes_df)
     except Exception:
         # Return empty dataframe
         return pd.DataFrame(columns=["Name", "Tags"])
 
 
+def _read_recipes_df():
+    with SessionLocal() as db:
+        recipes = db.query(RecipeModel).order_by(RecipeModel.name).all()
+
+    # Convert to pandas DataFrame for compatibility with existing code
+    recipes_data = []
+    for recipe in recipes:
+        recipes_data.append({"Name": recipe.name, "Tags": recipe.tags})
+
+    # Create DataFrame
+    if not recipes_data:
+        # Return empty dataframe with expected columns
+        return pd.DataFrame(columns=["Name", "Tags"])
+
+    recipes_df = pd.DataFrame(recipes_data)
+
+    # Replace None with NaN for pandas operations
+    recipes_df = recipes_df.replace({None: pd.NA})
+
+    return recipes_df
+
+
+def _read_cached(table, version, load):
+    """
+    DataFrame of a table, loaded once per version of the table and shared by all readers.
+
+    Args:
+        table: Key of the table in the read cache
+        version: Returns the current version of the table (bumped after every write)
+        load: Reads the table from the database
+
+    Returns:
+        A shallow copy of the cached DataFrame: it shares the cached data, but with copy-on-write (always on
+        from pandas 3) changes to it copy the affected columns and never reach the cache
+    """
+    cached = read_cache.get(table)
+    if cached is None or cached[0] != version():
+        with read_cache_lock:
+            cached = read_cache.get(table)
+            if cached is None or cached[0] != version():
+                # Read the version before the table, so a write that lands in between reloads it next time
+                loaded_version = version()
+                cached = (loaded_version, load())
+                read_cache[table] = cached
+    return cached[1].copy(deep=False)
+
+
 def save_recipes(df):
-    """Save recipes to database"""
+    """Save recipes to database, inserting new recipes and updating the tags of existing ones in one upsert"""
     try:
-        with SessionLocal() as db:
-            # For each recipe in the dataframe
-            for _, row in df.iterrows():
-                # Handle NA/NaN values by converting them to None
-                name = row.get("Name") if pd.notna(row.get("Name")) else None
-                tags = row.get("Tags") if pd.notna(row.get("Tags")) else None
+        recipes = {}
+        all_tags = df["Tags"].tolist() if "Tags" in df.columns else [None] * len(df)
+        for name, tags in zip(df["Name"].tolist(), all_tags, strict=True):
+            # Handle NA/NaN values by converting them to None
+            if pd.isna(name) or not name:  # Skip if no name provided
+                continue
+            recipes[name] = tags if pd.notna(tags) else None
+
+        if recipes:
+            with SessionLocal() as db:
+                statement = sqlite_insert(RecipeModel)
+                statement = statement.on_conflict_do_update(
+                    index_elements=[RecipeModel.name], set_={"tags": statement.excluded.tags}
+                )
+                db.execute(statement, [{"name": name, "tags": tags} for name, tags in recipes.items()])
+                _sync_recipe_tags(db, RecipeModel.name.in_(list(recipes)))
+                db.commit()
 
-                if not name:  # Skip if no name provided
-                    continue
+        # Recipe tags are shared by all meals of the recipe
+        notify_recipes_changed()
+        notify_meals_changed()
+        return True
+    except Exception:
+        return False
 
-                # Check if recipe already exists
-                existing_recipe = db.query(RecipeModel).filter_by(name=name).first()
 
-                if existing_recipe:
-                    # Update existing recipe
-                    existing_recipe.tags = tags
-                else:
-                    # Create new recipe
-                    recipe = RecipeModel(name=name, tags=tags)
-                    db.add(recipe)
+def read_recipe(name):
+    """Read a single recipe by name, as a dict with Name and Tags (None if not found)"""
+    with SessionLocal() as db:
+        recipe = db.query(RecipeModel).filter_by(name=name).first()
+        return {"Name": recipe.name, "Tags": recipe.tags} if recipe else None
 
-            # Commit the transaction
+
+def count_recipe_meals(name):
+    """Number of meals planned with a recipe"""
+    with SessionLocal() as db:
+        return db.query(func.count(MealModel.id)).join(RecipeModel).filter(RecipeModel.name == name).scalar()
+
+
+def create_recipe(name, tags):
+    """Create a single recipe (False if a recipe with that name already exists)"""
+    try:
+        with SessionLocal() as db:
+            db.add(RecipeModel(name=name, tags=tags))
+            _sync_recipe_tags(db, RecipeModel.name == name)
             db.commit()
+    except IntegrityError:
+        return False
+    notify_recipes_changed()
+    return True
 
-        return True
-    except Exception:
+
+def update_recipe(name, new_name, tags):
+    """
+    Rename a single recipe and set its tags, updating the meals planned with it.
+
+    Returns:
+        False if the recipe doesn't exist (or new_name is taken by another recipe)
+    """
+    try:
+        with SessionLocal() as db:
+            recipe = db.query(RecipeModel).filter_by(name=name).first()
+            if recipe is None:
+                return False
+            old_name, old_tags = recipe.name, recipe.tags
+            recipe.name = new_name
+            recipe.tags = tags
+            _sync_recipe_tags(db, RecipeModel.id == recipe.id)
+            db.commit()
+
+            meal_dates = [meal_date for (meal_date,) in db.query(MealModel.date).filter_by(recipe_id=recipe.id)]
+    except IntegrityError:
         return False
 
+    notify_recipes_changed()
+    if meal_dates and (old_name, old_tags) != (new_name, tags):
+        notify_meals_changed(
+            [((meal_date, old_name, old_tags), (meal_date, new_name, tags)) for meal_date in meal_dates]
+        )
+    return True
+
+
+def delete_recipe(name):
+    """Delete a single recipe that isn't planned in any meal (False if it doesn't exist)"""
+    with SessionLocal() as db:
+        recipe_ids = select(RecipeModel.id).where(RecipeModel.name == name).scalar_subquery()
+        db.query(RecipeTagModel).filter(RecipeTagModel.recipe_id == recipe_ids).delete(synchronize_session=False)
+        deleted = db.query(RecipeModel).filter_by(name=name).delete()
+        db.commit()
+    if deleted:
+        notify_recipes_changed()
+    return bool(deleted)
+
 
 def populate_recipes_from_meals():
     """Populate recipes database with unique meals from the meal plan"""
@@ -403,8 +819,7 @@ def populate_recipes_from_meals():
         # Get tags and normalize to lowercase
         tags = row.get("Tags")
         if pd.notna(tags) and tags:
-            # Split tags, trim whitespace, convert to lowercase, then rejoin
-            tags = ",".join([tag.strip().lower() for tag in tags.split(",") if tag.strip()])
+            tags = normalize_tags(tags)
 
         # If recipe exists, we'll update it with new tags from meals
         # If multiple meals have the same name but different tags, the last one will be used
@@ -418,63 +833,194 @@ def populate_recipes_from_meals():
     return read_recipes()
 
 
-def save_meals_to_db(meals_df):
-    """Save meals DataFrame to database"""
-    try:
-        with SessionLocal() as db:
-            # Delete all existing meals
-            db.query(MealModel).delete()
-            db.commit()
+def _parse_meal_rows(meals_df):
+    """
+    Parse posted meal rows, skipping meals without a recipe name or with an invalid date.
 
-            # Insert new meals
-            for _, row in meals_df.iterrows():
-                date_obj = None
-                weekday = None
-                date_str = None
-
-                # Handle date conversion
-                if "Date" in row and pd.notna(row["Date"]) and not pd.isna(row["Date"]):
-                    try:
-                        if isinstance(row["Date"], str):
-                            date_obj = pd.to_datetime(row["Date"], format="%Y/%m/%d")
-                        else:
-                            date_obj = pd.to_datetime(row["Date"])
-                        weekday = date_obj.strftime("%A")
-                        date_str = date_obj.strftime("%Y/%m/%d")
-                    except Exception:
-                        continue
-
-                notion_page_id = get_notion_page_id(date_str) if date_str else None
-
-                # Get or create recipe by name
-                name = row.get("Name") if pd.notna(row.get("Name")) else None
-                tags = row.get("Tags") if pd.notna(row.get("Tags")) else None
-                notes = row.get("Notes") if pd.notna(row.get("Notes")) else None
-
-                if not name:
-                    continue  # Skip meals without a recipe name
-
-                recipe = db.query(RecipeModel).filter_by(name=name).first()
-                if not recipe:
-                    recipe = RecipeModel(name=name, tags=tags)
-                    db.add(recipe)
-                    db.commit()
+    Returns:
+        (rows, recipe_tags): (id, date, name, notes) per meal, and the tags per recipe name (the tags of the
+        last meal that has them)
+    """
+    columns = {}
+    for column in ("Id", "Name", "Tags", "Notes", "Date"):
+        if column not in meals_df.columns:
+            columns[column] = [None] * len(meals_df)
+            continue
+        values = meals_df[column]
+        if column == "Date" and pd.api.types.is_datetime64_any_dtype(values):
+            # Convert parsed dates in one go rather than boxing a Timestamp per row
+            values = values.dt.date
+        # Missing values (NaN, NaT, None) become None, checked once per column rather than per value
+        columns[column] = values.astype(object).where(values.notna(), None).tolist()
+
+    rows = []
+    recipe_tags = {}
+    for meal_id, name, tags, notes, meal_date in zip(*columns.values(), strict=True):
+        if not name:
+            continue  # Skip meals without a recipe name
+
+        date_obj = meal_date if type(meal_date) is date else None
+        if date_obj is None and meal_date is not None:
+            try:
+                if isinstance(meal_date, str):
+                    date_obj = pd.to_datetime(meal_date, format="%Y/%m/%d").date()
                 else:
-                    # Optionally update tags if changed
-                    if tags is not None:
-                        recipe.tags = tags
-
-                meal = MealModel(
-                    date=date_obj,
-                    weekday=weekday,
-                    recipe_id=recipe.id,
-                    notes=notes,
-                    notion_page_id=notion_page_id,
-                )
-                db.add(meal)
+                    date_obj = pd.to_datetime(meal_date).date()
+            except Exception:
+                continue
+
+        meal_id = int(meal_id) if meal_id is not None else None
+        rows.append((meal_id, date_obj, name, notes))
+        if tags is not None or name not in recipe_tags:
+            recipe_tags[name] = tags
+    return rows, recipe_tags
+
+
+def _match_meals(rows, stored):
+    """
+    Match parsed meal rows to stored meals: by id first, then by date in order of id.
+
+    Returns:
+        (matches, unmatched): the stored meal per row (None for new meals), and the stored meals by id that
+        no row matched
+    """
+    unmatched = dict(stored)
+    matches = [None] * len(rows)
+    for i, (meal_id, _, _, _) in enumerate(rows):
+        if meal_id in unmatched:
+            matches[i] = unmatched.pop(meal_id)
+
+    by_date = {}
+    for meal in unmatched.values():
+        by_date.setdefault(meal.date, []).append(meal)
+    for i, (_, date_obj, _, _) in enumerate(rows):
+        if matches[i] is None and by_date.get(date_obj):
+            matches[i] = by_date[date_obj].pop(0)
+            del unmatched[matches[i].id]
+    return matches, unmatched
+
+
+def _upsert_recipes(db, recipes, recipe_tags):
+    """
+    Create missing recipes and update changed tags, in bulk.
+
+    Args:
+        db: Session to write to
+        recipes: (id, tags) per recipe name, updated with the created recipes
+        recipe_tags: Tags per recipe name of the posted meals (None: keep the recipe's tags)
+
+    Returns:
+        (recipes_changed, new_tags): whether any recipe was written, and the new tags per retagged recipe id
+    """
+    new_recipes = [{"name": name, "tags": tags} for name, tags in recipe_tags.items() if name not in recipes]
+    retagged = [
+        {"id": recipes[name][0], "tags": tags}
+        for name, tags in recipe_tags.items()
+        if name in recipes and tags is not None and recipes[name][1] != tags
+    ]
+    if new_recipes:
+        db.execute(insert(RecipeModel), new_recipes)
+        created = db.query(RecipeModel.id, RecipeModel.name, RecipeModel.tags).filter(
+            RecipeModel.name.in_([recipe["name"] for recipe in new_recipes])
+        )
+        recipes.update({name: (recipe_id, tags) for recipe_id, name, tags in created})
+    if retagged:
+        db.execute(update(RecipeModel), retagged)
+    if new_recipes or retagged:
+        names = [recipe["name"] for recipe in new_recipes]
+        _sync_recipe_tags(db, RecipeModel.name.in_(names) | RecipeModel.id.in_([recipe["id"] for recipe in retagged]))
+    return bool(new_recipes or retagged), {recipe["id"]: recipe["tags"] for recipe in retagged}
+
+
+def _diff_meals(rows, matches, unmatched, recipes, new_tags, page_ids):
+    """
+    Column values of the meals to insert and update, and the changes to notify meals listeners of.
+
+    Args:
+        rows: Parsed meal rows, see _parse_meal_rows()
+        matches: Stored meal per row, see _match_meals()
+        unmatched: Stored meals by id that are deleted
+        recipes: (id, tags) per recipe name
+        new_tags: New tags per retagged recipe id
+        page_ids: Notion page id per date string
+
+    Returns:
+        (inserts, updates, changes)
+    """
+    recipe_names = {recipe_id: (name, tags) for name, (recipe_id, tags) in recipes.items()}
+    inserts, updates, changes = [], [], []
+    for (_, date_obj, name, notes), old in zip(rows, matches, strict=True):
+        values = {
+            "date": date_obj,
+            "weekday": date_obj.strftime("%A") if date_obj else None,
+            "recipe_id": recipes[name][0],
+            "notes": notes,
+            "notion_page_id": page_ids.get(date_obj.strftime("%Y/%m/%d")) if date_obj else None,
+        }
+        new_row = (date_obj, name, new_tags.get(values["recipe_id"], recipes[name][1]))
+        if old is None:
+            inserts.append(values)
+            changes.append((None, new_row))
+        elif any(getattr(old, key) != value for key, value in values.items()):
+            updates.append({"id": old.id, **values})
+            if (old.date, old.recipe_id) != (date_obj, values["recipe_id"]):
+                changes.append(((old.date, *recipe_names.get(old.recipe_id, (None, None))), new_row))
+    for old in unmatched.values():
+        changes.append(((old.date, *recipe_names.get(old.recipe_id, (None, None))), None))
+
+    return inserts, updates, changes
+
 
+def save_meals_to_db(meals_df):
+    """
+    Save meals DataFrame to database.
+
+    Only the difference with the stored meals is written: posted rows are matched to stored meals by their
+    "Id" (if the DataFrame has one) or else by date, and the inserts, updates and deletes are each applied as
+    one bulk statement in a single transaction.
+    """
+    try:
+        with SessionLocal() as db:
+            recipes = {
+                name: (recipe_id, tags)
+                for recipe_id, name, tags in db.query(RecipeModel.id, RecipeModel.name, RecipeModel.tags)
+            }
+            page_ids = {record.date_str: record.page_id for record in db.query(NotionPageIdModel)}
+            page_ids.update(notion_page_ids)
+
+            rows, recipe_tags = _parse_meal_rows(meals_df)
+            recipes_changed, new_tags = _upsert_recipes(db, recipes, recipe_tags)
+
+            # Diff the posted rows against the stored meals
+            stored = {
+                meal.id: meal
+                for meal in db.query(
+                    MealModel.id,
+                    MealModel.date,
+                    MealModel.weekday,
+                    MealModel.recipe_id,
+                    MealModel.notes,
+                    MealModel.notion_page_id,
+                ).order_by(MealModel.id)
+            }
+            matches, unmatched = _match_meals(rows, stored)
+            inserts, updates, changes = _diff_meals(rows, matches, unmatched, recipes, new_tags, page_ids)
+
+            if unmatched:
+                db.execute(delete(MealModel).where(MealModel.id.in_(list(unmatched))))
+            if updates:
+                db.execute(update(MealModel), updates)
+            if inserts:
+                db.execute(insert(MealModel), inserts)
             db.commit()
 
+        if recipes_changed:
+            notify_recipes_changed()
+        if new_tags:
+            # Retagging a recipe changes meals that weren't posted as changed as well
+            notify_meals_changed()
+        elif inserts or updates or unmatched:
+            notify_meals_changed(changes)
         return True
     except Exception:
         return False
@@ -1,13 +1,14 @@
 import json
 import logging
 import random
-from datetime import datetime  # Removed unused timedelta
+from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
 import pandas as pd
 import requests
 from fastapi import Body, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from openai import AsyncOpenAI
 from pydantic import BaseModel
 from supermarktconnector.ah import AHConnector
@@ -21,6 +22,21 @@ from gusto2.settings import settings
 # Store history of previously suggested recipes to avoid repetition
 SUGGESTED_RECIPES_HISTORY = []
 
+# Maximum number of days the meal planner fills in one request
+MAX_PLAN_DAYS = 366
+
+# Maximum number of days returned by a single /api/rules/calendar request
+MAX_CALENDAR_DAYS = 366
+
+# Maximum number of edits evaluated by a single /api/rules/what-if request
+MAX_WHAT_IF_EDITS = 100
+
+# Maximum number of days a single /api/rules/repair request searches edits for
+MAX_REPAIR_DAYS = 366
+
+# Available meals for the rule engine, rebuilt when database.recipes_version changes
+available_meals_cache = {}
+
 # Example recipes will be loaded from database, but if database is empty, use these fallback examples
 FALLBACK_EXAMPLE_RECIPES = [
     {"name": "Mediterranean Quinoa Bowl", "tags": ["mediterranean", "vegetarian", "healthy", "lunch", "bowl"]},
@@ -32,7 +48,15 @@ FALLBACK_EXAMPLE_RECIPES = [
 
 # Import from our rules module
 try:
-    from gusto2.rules.rule_engine import RuleType, default_rule_engine
+    from gusto2.rules.candidates import CandidateSet
+    from gusto2.rules.definitions import RuleDefinitionError, default_rule_engine, load_rules
+    from gusto2.rules.planner import MealPlanner
+    from gusto2.rules.repair import PlanRepairer
+    from gusto2.rules.rule_engine import RuleType
+    from gusto2.rules.snapshot import PlanSnapshot
+    from gusto2.rules.state import PlanState
+    from gusto2.rules.trace import ValidationTrace
+    from gusto2.rules.what_if import PlanEdit, WhatIfEvaluator
 except ImportError as e:
     # Configure logging if not already configured
     logging.basicConfig(level=logging.INFO)
@@ -45,18 +69,34 @@ except ImportError as e:
         def validate_meal_plan(self, *args, **kwargs):
             return []
 
+        def validate_days(self, *args, **kwargs):
+            return []
+
         def can_add_meal(self, *args, **kwargs):
             return {"can_add": True, "constraint_results": [], "requirement_results": []}
 
         def suggest_meals_for_date(self, *args, **kwargs):
             return []
 
+        def clear_validation_cache(self):
+            pass
+
     default_rule_engine = DummyRuleEngine()
 
     class RuleType:
         CONSTRAINT = "CONSTRAINT"
         REQUIREMENT = "REQUIREMENT"
 
+    PlanState = None
+    MealPlanner = None
+    PlanRepairer = None
+    CandidateSet = None
+    load_rules = None
+    ValidationTrace = None
+    PlanSnapshot = None
+    PlanEdit = None
+    WhatIfEvaluator = None
+
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -122,6 +162,37 @@ class MealSuggestionRequest(BaseModel):
 
 class MealValidator(BaseModel):
     date: Optional[str] = None
+    trace: bool = False
+
+
+class CalendarRequest(BaseModel):
+    start_date: str
+    end_date: str
+
+
+class WhatIfEdit(BaseModel):
+    action: str  # "set", "swap" or "clear"
+    date: str
+    other_date: Optional[str] = None  # Day to swap with
+    recipe: Optional[str] = None  # Recipe name to set
+
+
+class WhatIfRequest(BaseModel):
+    edits: List[WhatIfEdit]
+
+
+class MealPlanRequest(BaseModel):
+    start_date: str
+    end_date: str
+    time_budget_ms: Optional[int] = None
+    seed: Optional[int] = None
+
+
+class RepairRequest(BaseModel):
+    start_date: str
+    end_date: str
+    time_budget_ms: Optional[int] = None
+    seed: Optional[int] = None
 
 
 # Albert Heijn product search models
@@ -273,6 +344,10 @@ def fetch_from_notion():
                 db.add(meal_obj)
             db.commit()
 
+        database.sync_recipe_tags()
+        database.notify_recipes_changed()
+        database.notify_meals_changed()
+
         logger.info(f"Successfully saved {len(meals_data)} meals from Notion to database")
         return True
 
@@ -281,7 +356,32 @@ def fetch_from_notion():
         return False
 
 
-def save_to_notion(meals_df, changed_indices_set):
+def changed_meal_rows(meals_df):
+    """
+    Rows of the changed meals, as (label, row) pairs for logging and saving to Notion.
+
+    Meals changed through the positional routes are looked up by their index in meals_df, meals changed by
+    primary key by their Id in meals_df (falling back to the database when meals_df doesn't include them).
+    """
+    rows = []
+    for idx in sorted(database.get_changed_indices()):
+        if idx < 0 or idx >= len(meals_df):
+            logger.warning(f"Invalid index {idx}, skipping")
+            continue
+        rows.append((f"index {idx}", meals_df.iloc[idx]))
+
+    changed_ids = database.get_changed_meal_ids()
+    if changed_ids:
+        posted = meals_df[meals_df["Id"].isin(changed_ids)] if "Id" in meals_df.columns else meals_df.iloc[0:0]
+        missing = changed_ids - set(posted["Id"]) if len(posted) else changed_ids
+        stored = database.read_meals_by_ids(missing) if missing else posted.iloc[0:0]
+        for frame in (posted, stored):
+            for _, meal_row in frame.iterrows():
+                rows.append((f"id {meal_row['Id']}", meal_row))
+    return rows
+
+
+def save_to_notion(meal_rows):
     """Save changed meal rows back to Notion"""
     if not settings.notion_api_token:
         logger.warning("Notion API token not provided. Skipping Notion update.")
@@ -297,18 +397,12 @@ def save_to_notion(meals_df, changed_indices_set):
     update_success_count = 0
     update_count = 0
 
-    # Process each changed index
-    for idx in changed_indices_set:
+    # Process each changed meal
+    for label, meal_row in meal_rows:
         try:
-            if idx < 0 or idx >= len(meals_df):
-                logger.warning(f"Invalid index {idx}, skipping")
-                continue
-
-            meal_row = meals_df.iloc[idx]
-
             # Skip if no date (we need it to find the corresponding Notion page)
             if pd.isna(meal_row.get("Date")) or pd.isnull(meal_row.get("Date")):
-                logger.warning(f"No date for meal at index {idx}, skipping")
+                logger.warning(f"No date for meal at {label}, skipping")
                 continue
 
             # Handle date formatting
@@ -319,7 +413,7 @@ def save_to_notion(meals_df, changed_indices_set):
                     date_obj = pd.to_datetime(meal_row["Date"])
                 date_str = date_obj.strftime("%Y/%m/%d")
             except Exception as e:
-                logger.error(f"Error parsing date for index {idx}: {e}")
+                logger.error(f"Error parsing date for {label}: {e}")
                 continue
 
             # Find Notion page ID for this date
@@ -346,7 +440,7 @@ def save_to_notion(meals_df, changed_indices_set):
 
             # Skip if no properties to update
             if not properties:
-                logger.info(f"No properties to update for meal at index {idx}, skipping")
+                logger.info(f"No properties to update for meal at {label}, skipping")
                 continue
 
             update_count += 1
@@ -364,7 +458,7 @@ def save_to_notion(meals_df, changed_indices_set):
                 logger.info(f"Updated meal at date {date_str} in Notion")
 
         except Exception as e:
-            logger.error(f"Error updating meal at index {idx} in Notion: {str(e)}")
+            logger.error(f"Error updating meal at {label} in Notion: {str(e)}")
 
     logger.info(f"Updated {update_success_count}/{update_count} meals in Notion")
     return update_success_count > 0
@@ -376,6 +470,14 @@ database.init_db()
 # Initialize by loading page IDs from database
 database.load_notion_page_ids()
 
+# In-memory meal plan for the rule engine, kept up to date by the database write paths
+plan_state = PlanState(loader=database.read_meals) if PlanState else None
+if plan_state:
+    database.add_meals_listener(plan_state.apply_changes)
+
+# Cached validation results are keyed by database.meals_version, drop them on any write as well
+database.add_meals_listener(lambda changes: default_rule_engine.clear_validation_cache())
+
 # Initialize Albert Heijn connector
 ah_connector = AHConnector()
 
@@ -391,7 +493,10 @@ async def get_meals():
         # Read meals directly from the database
         meals = database.read_meals()
 
-        return {"status": "success", "message": "Meals retrieved from database", "meals": database.df_to_json(meals)}
+        # The records are plain JSON values already, so skip FastAPI's per-value encoding of the response
+        return JSONResponse(
+            {"status": "success", "message": "Meals retrieved from database", "meals": database.df_to_json(meals)}
+        )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get meals: {str(e)}")
@@ -399,7 +504,7 @@ async def get_meals():
 
 @app.put("/api/meal/{index}")
 async def update_meal(index: int, meal: Dict[str, Any] = Body(...)):
-    """Update a meal at the given index."""
+    """Update a meal at the given index (see PUT /api/meals/{meal_id})."""
     try:
         update_successful = database.update_changeset(index, meal)
         if not update_successful:
@@ -422,21 +527,20 @@ async def save_meals(meals: List[Dict[str, Any]] = Body(...)):
         if "Date" in meals_df.columns:
             meals_df["Date"] = pd.to_datetime(meals_df["Date"], format="%Y/%m/%d", errors="coerce")
 
-        # Get the set of changed indices before saving
-        changed_indices_set = database.get_changed_indices()
-
         # Update Notion with only the changed rows
         notion_updated = False
-        if changed_indices_set:
-            notion_updated = save_to_notion(meals_df, changed_indices_set)
+        meal_rows = changed_meal_rows(meals_df)
+        if meal_rows:
+            notion_updated = save_to_notion(meal_rows)
 
         # Save to database
         db_save_successful = database.save_meals_to_db(meals_df)
         if not db_save_successful:
             raise HTTPException(status_code=500, detail="Failed to save meals to database")
 
-        # Reset changed indices after saving
+        # Reset changed meals after saving
         database.save_changed_indices(set())
+        database.save_changed_meal_ids(set())
 
         return {
             "status": "success",
@@ -455,8 +559,9 @@ async def reload_meals():
     Also attempts to fetch updated data from Notion if configured.
     Also reloads recipes based on the reloaded meals."""
     try:
-        # Force reload by resetting changed indices
+        # Force reload by resetting changed meals
         database.save_changed_indices(set())
+        database.save_changed_meal_ids(set())
 
         # First try to fetch fresh data from Notion
         notion_fetch_success = fetch_from_notion()
@@ -487,13 +592,38 @@ async def reload_meals():
 
 @app.get("/api/meals/changes")
 async def get_changes():
-    """Get the current changeset and changed indices."""
+    """Get the current changeset: changed indices (positional routes) and changed meal IDs."""
     try:
-        return {"status": "success", "changedIndices": list(database.get_changed_indices())}
+        return {
+            "status": "success",
+            "changedIndices": list(database.get_changed_indices()),
+            "changedMealIds": list(database.get_changed_meal_ids()),
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get changes: {str(e)}")
 
 
+@app.get("/api/meals/{meal_id}")
+async def get_meal(meal_id: int):
+    """Get a single meal by its ID."""
+    meal = database.read_meal(meal_id)
+    if meal is None:
+        raise HTTPException(status_code=404, detail=f"Meal {meal_id} not found")
+    return {"status": "success", "meal": database.df_to_json(pd.DataFrame([meal]))[0]}
+
+
+@app.put("/api/meals/{meal_id}")
+async def update_meal_by_id(meal_id: int, meal: Dict[str, Any] = Body(...)):
+    """Update a single meal by its ID."""
+    try:
+        update_successful = database.update_meal(meal_id, meal)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update meal: {str(e)}")
+    if not update_successful:
+        raise HTTPException(status_code=404, detail=f"Meal {meal_id} not found")
+    return {"status": "success", "message": "Meal updated", "changedMealIds": list(database.get_changed_meal_ids())}
+
+
 @app.post("/api/meals/add-to-changeset")
 async def add_to_changeset(meals: List[Dict[str, Any]] = Body(...)):
     """Add meals to the changeset."""
@@ -505,32 +635,33 @@ async def add_to_changeset(meals: List[Dict[str, Any]] = Body(...)):
 
 
 @app.get("/api/recipes")
-async def get_recipes():
-    """Get all recipes"""
+async def get_recipes(tags: Optional[str] = None, match_all: bool = False):
+    """Get all recipes, or only those with any (or all, with match_all) of the comma-separated tags"""
     try:
-        recipes = database.read_recipes()
+        recipes = database.read_recipes_with_tags(tags.split(","), match_all) if tags else database.read_recipes()
         return {"recipes": database.df_to_json(recipes)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get recipes: {str(e)}")
 
 
+@app.get("/api/tags")
+async def get_tags(prefix: Optional[str] = None, limit: Optional[int] = None):
+    """Get the tags in use with their number of recipes and meals, most used first (optionally by prefix)"""
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="Limit must be at least 1")
+    try:
+        return {"tags": database.df_to_json(database.read_tags(prefix, limit))}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get tags: {str(e)}")
+
+
 @app.post("/api/recipes")
 async def create_recipe(recipe: Recipe):
     """Create a new recipe"""
     try:
-        # Read existing recipes
-        recipes_df = database.read_recipes()
-
-        # Check if recipe already exists
-        if not recipes_df.empty and recipe.Name in recipes_df["Name"].values:
+        if not database.create_recipe(recipe.Name, recipe.Tags):
             raise HTTPException(status_code=400, detail=f"Recipe '{recipe.Name}' already exists")
 
-        # Add new recipe
-        new_recipe = pd.DataFrame({"Name": [recipe.Name], "Tags": [recipe.Tags]})
-
-        updated_recipes = pd.concat([recipes_df, new_recipe], ignore_index=True)
-        database.save_recipes(updated_recipes)
-
         return {"status": "success", "message": f"Recipe '{recipe.Name}' created successfully"}
     except HTTPException as e:
         raise e
@@ -540,18 +671,18 @@ async def create_recipe(recipe: Recipe):
 
 @app.delete("/api/recipes/{name}")
 async def delete_recipe(name: str):
-    """Delete a recipe by name"""
+    """Delete a recipe by name, unless meals are planned with it"""
     try:
-        # Read existing recipes
-        recipes_df = database.read_recipes()
-
         # Check if recipe exists
-        if recipes_df.empty or name not in recipes_df["Name"].values:
+        if database.read_recipe(name) is None:
             raise HTTPException(status_code=404, detail=f"Recipe '{name}' not found")
 
-        # Delete recipe
-        updated_recipes = recipes_df[recipes_df["Name"] != name]
-        database.save_recipes(updated_recipes)
+        meal_count = database.count_recipe_meals(name)
+        if meal_count:
+            raise HTTPException(status_code=409, detail=f"Recipe '{name}' is used by {meal_count} meal(s)")
+
+        if not database.delete_recipe(name):
+            raise HTTPException(status_code=404, detail=f"Recipe '{name}' not found")
 
         return {"status": "success", "message": f"Recipe '{name}' deleted successfully"}
     except HTTPException as e:
@@ -562,24 +693,18 @@ async def delete_recipe(name: str):
 
 @app.put("/api/recipes/{name}")
 async def update_recipe(name: str, recipe: Recipe):
-    """Update a recipe by name"""
+    """Update a recipe by name (renaming it renames its meals as well)"""
     try:
-        # Read existing recipes
-        recipes_df = database.read_recipes()
-
         # Check if recipe exists
-        if recipes_df.empty or name not in recipes_df["Name"].values:
+        if database.read_recipe(name) is None:
             raise HTTPException(status_code=404, detail=f"Recipe '{name}' not found")
 
         # If name changed, check if new name already exists
-        if name != recipe.Name and recipe.Name in recipes_df["Name"].values:
+        if name != recipe.Name and database.read_recipe(recipe.Name) is not None:
             raise HTTPException(status_code=400, detail=f"Recipe '{recipe.Name}' already exists")
 
-        # Update recipe
-        recipes_df.loc[recipes_df["Name"] == name, "Name"] = recipe.Name
-        recipes_df.loc[recipes_df["Name"] == recipe.Name, "Tags"] = recipe.Tags
-
-        database.save_recipes(recipes_df)
+        if not database.update_recipe(name, recipe.Name, recipe.Tags):
+            raise HTTPException(status_code=500, detail=f"Failed to update recipe '{name}'")
 
         return {"status": "success", "message": f"Recipe '{name}' updated successfully"}
     except HTTPException as e:
@@ -625,12 +750,28 @@ async def get_rules():
         raise HTTPException(status_code=500, detail=f"Failed to get rules: {str(e)}")
 
 
+@app.post("/api/rules/reload")
+async def reload_rules():
+    """Reload the rule definitions file, without restarting the backend"""
+    if load_rules is None:
+        raise HTTPException(status_code=500, detail="Rule engine not available")
+
+    try:
+        default_rule_engine.set_rules(load_rules())
+        return {"status": "success", "message": f"Loaded {len(default_rule_engine.get_rules())} rules"}
+    except RuleDefinitionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to reload rules: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to reload rules: {str(e)}")
+
+
 @app.post("/api/rules/validate")
 async def validate_meal_plan(validator: MealValidator):
     """Validate a meal plan against rules"""
     try:
-        # Get meals from database
-        meals_df = database.read_meals()
+        # Read the version first, so cached results are never newer than the plan they're keyed on
+        plan_version = database.meals_version
 
         date = None
         if validator.date:
@@ -639,8 +780,21 @@ async def validate_meal_plan(validator: MealValidator):
             except ValueError:
                 raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY/MM/DD")
 
-        # Validate against rules
-        validation_results = default_rule_engine.validate_meal_plan(meals_df, date)
+        # Use the in-memory plan if it's loaded. Otherwise, when validating around a date, only read the
+        # dates the rules need from the database; read the whole plan if any rule needs it
+        span = default_rule_engine.date_span(date) if date and load_rules else None
+        if plan_state and plan_state.is_loaded or span is None:
+            meals_df = plan_state if plan_state else database.read_meals()
+        else:
+            meals_df = PlanSnapshot.from_dataframe(
+                database.read_meals_between(span[0].date(), span[1].date()), row_count=database.count_meals()
+            )
+
+        # Validate against rules, recording per-rule timings if asked for
+        trace = ValidationTrace() if validator.trace and ValidationTrace else None
+        validation_results = default_rule_engine.validate_meal_plan(
+            meals_df, date, plan_version=plan_version, trace=trace
+        )
 
         # Group results by rule type
         constraints = []
@@ -652,13 +806,16 @@ async def validate_meal_plan(validator: MealValidator):
             else:
                 requirements.append(result)
 
-        return {
+        response = {
             "status": "success",
             "constraints": constraints,
             "requirements": requirements,
             "all_constraints_met": all(r["is_valid"] for r in constraints),
             "all_requirements_met": all(r["is_valid"] for r in requirements),
         }
+        if trace is not None:
+            response["trace"] = trace.to_dict()
+        return response
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -666,6 +823,82 @@ async def validate_meal_plan(validator: MealValidator):
         raise HTTPException(status_code=500, detail=f"Failed to validate meal plan: {str(e)}")
 
 
+@app.post("/api/rules/calendar")
+async def rules_calendar(calendar_request: CalendarRequest):
+    """Per-day rule status for every day in a date range, as /api/rules/validate would report it for each day"""
+    try:
+        try:
+            start_date = datetime.strptime(calendar_request.start_date, "%Y/%m/%d")
+            end_date = datetime.strptime(calendar_request.end_date, "%Y/%m/%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY/MM/DD")
+
+        if end_date < start_date:
+            raise HTTPException(status_code=400, detail="End date must not be before start date")
+        if (end_date - start_date).days >= MAX_CALENDAR_DAYS:
+            raise HTTPException(status_code=400, detail=f"Can return at most {MAX_CALENDAR_DAYS} days at once")
+
+        # Use the in-memory plan, falling back to reading all meals from the database
+        meals_df = plan_state if plan_state else database.read_meals()
+
+        # Every rule checks all days at once
+        rule_results = default_rule_engine.validate_days(meals_df, start_date, end_date)
+
+        days = []
+        for index in range((end_date - start_date).days + 1):
+            constraints = []
+            requirements = []
+            for result in rule_results:
+                day_result = {"rule_name": result["rule_name"], "is_valid": bool(result["is_valid"][index])}
+                if result["rule_type"] == RuleType.CONSTRAINT.name:
+                    constraints.append(day_result)
+                else:
+                    requirements.append(day_result)
+
+            days.append(
+                {
+                    "date": (start_date + timedelta(days=index)).strftime("%Y/%m/%d"),
+                    "constraints": constraints,
+                    "requirements": requirements,
+                    "all_constraints_met": all(r["is_valid"] for r in constraints),
+                    "all_requirements_met": all(r["is_valid"] for r in requirements),
+                }
+            )
+
+        return {
+            "status": "success",
+            "start_date": calendar_request.start_date,
+            "end_date": calendar_request.end_date,
+            "days": days,
+        }
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Failed to validate meal plan calendar: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to validate meal plan calendar: {str(e)}")
+
+
+def recipes_to_available_meals(recipes_df):
+    """Convert recipes to the list of meals (dicts with 'name' and 'tags') the rule engine expects"""
+    available_meals = []
+    for _, recipe in recipes_df.iterrows():
+        if pd.notna(recipe["Name"]):
+            meal = {"name": recipe["Name"], "tags": recipe["Tags"] if pd.notna(recipe["Tags"]) else ""}
+            available_meals.append(meal)
+    return available_meals
+
+
+def get_available_meals():
+    """Available recipes for the rule engine, parsed once per version of the recipes table"""
+    version = database.recipes_version
+    if available_meals_cache.get("version") != version:
+        available_meals = recipes_to_available_meals(database.read_recipes())
+        # Parse tags once into a CandidateSet when the rule engine is available
+        available_meals_cache["meals"] = CandidateSet(available_meals) if CandidateSet else available_meals
+        available_meals_cache["version"] = version
+    return available_meals_cache["meals"]
+
+
 @app.post("/api/rules/suggest-meals")
 async def suggest_meals(suggestion_request: MealSuggestionRequest):
     """Get meal suggestions based on rules"""
@@ -676,22 +909,15 @@ async def suggest_meals(suggestion_request: MealSuggestionRequest):
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY/MM/DD")
 
-        # Get meals from database for context
-        meals_df = database.read_meals()
+        # Get meals for context, from the in-memory plan if available
+        meals_df = plan_state if plan_state else database.read_meals()
 
-        # Get available recipes
-        recipes_df = database.read_recipes()
+        # Get available recipes, parsed for the rule engine
+        available_meals = get_available_meals()
 
-        if recipes_df.empty:
+        if len(available_meals) == 0:
             raise HTTPException(status_code=404, detail="No recipes found")
 
-        # Convert recipes to the format expected by the rule engine
-        available_meals = []
-        for _, recipe in recipes_df.iterrows():
-            if pd.notna(recipe["Name"]):
-                meal = {"name": recipe["Name"], "tags": recipe["Tags"] if pd.notna(recipe["Tags"]) else ""}
-                available_meals.append(meal)
-
         # Get suggestions
         count = suggestion_request.count or 3
         suggestions = default_rule_engine.suggest_meals_for_date(
@@ -721,6 +947,165 @@ async def suggest_meals(suggestion_request: MealSuggestionRequest):
         raise HTTPException(status_code=500, detail=f"Failed to get meal suggestions: {str(e)}")
 
 
+@app.post("/api/rules/what-if")
+async def what_if(what_if_request: WhatIfRequest):
+    """Evaluate hypothetical edits of the meal plan against the rules, without saving them"""
+    if WhatIfEvaluator is None:
+        raise HTTPException(status_code=500, detail="What-if evaluation not available")
+
+    try:
+        if len(what_if_request.edits) > MAX_WHAT_IF_EDITS:
+            raise HTTPException(status_code=400, detail=f"Can evaluate at most {MAX_WHAT_IF_EDITS} edits at once")
+
+        recipe_tags = {meal["name"]: meal["tags"] for meal in get_available_meals().meals}
+
+        edits = []
+        for edit in what_if_request.edits:
+            try:
+                date = datetime.strptime(edit.date, "%Y/%m/%d")
+                other_date = datetime.strptime(edit.other_date, "%Y/%m/%d") if edit.other_date else None
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY/MM/DD")
+            if edit.recipe is not None and edit.recipe not in recipe_tags:
+                raise HTTPException(status_code=404, detail=f"Recipe '{edit.recipe}' not found")
+            try:
+                edits.append(PlanEdit(edit.action, date, other_date, edit.recipe, recipe_tags.get(edit.recipe)))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        # Evaluate all edits against the same copy of the current plan
+        meals_df = plan_state if plan_state else database.read_meals()
+        results = WhatIfEvaluator(default_rule_engine, meals_df).evaluate(edits)
+
+        return {
+            "status": "success",
+            "results": [
+                {"edit": edit.model_dump(), **result}
+                for edit, result in zip(what_if_request.edits, results, strict=True)
+            ],
+        }
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Failed to evaluate meal plan edits: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to evaluate meal plan edits: {str(e)}")
+
+
+@app.post("/api/rules/plan")
+async def plan_meals(plan_request: MealPlanRequest):
+    """Plan meals for every empty day in a date range, without saving them"""
+    if MealPlanner is None:
+        raise HTTPException(status_code=500, detail="Meal planner not available")
+
+    try:
+        try:
+            start_date = datetime.strptime(plan_request.start_date, "%Y/%m/%d")
+            end_date = datetime.strptime(plan_request.end_date, "%Y/%m/%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY/MM/DD")
+
+        if end_date < start_date:
+            raise HTTPException(status_code=400, detail="End date must not be before start date")
+        if (end_date - start_date).days >= MAX_PLAN_DAYS:
+            raise HTTPException(status_code=400, detail=f"Can plan at most {MAX_PLAN_DAYS} days at once")
+
+        # Get meals for context, from the in-memory plan if available
+        meals_df = plan_state if plan_state else database.read_meals()
+
+        available_meals = get_available_meals()
+        if len(available_meals) == 0:
+            raise HTTPException(status_code=404, detail="No recipes found")
+
+        time_budget_ms = plan_request.time_budget_ms or settings.planner_time_budget_ms
+        planner = MealPlanner(default_rule_engine, time_budget_ms=time_budget_ms, seed=plan_request.seed)
+        result = planner.plan(start_date, end_date, available_meals, meals_df)
+
+        return {
+            "status": "success",
+            "start_date": plan_request.start_date,
+            "end_date": plan_request.end_date,
+            "plan": [
+                {
+                    "date": day["date"].strftime("%Y/%m/%d"),
+                    "meal": day["meal"],
+                    "score": day["requirement_score"],
+                }
+                for day in result["plan"]
+            ],
+            "unfilled": [day.strftime("%Y/%m/%d") for day in result["unfilled"]],
+            "rule_scores": result["rule_scores"],
+            "all_constraints_met": all(
+                r["is_valid"] for r in result["rule_scores"] if r["rule_type"] == RuleType.CONSTRAINT.name
+            ),
+            "all_requirements_met": all(
+                r["is_valid"] for r in result["rule_scores"] if r["rule_type"] == RuleType.REQUIREMENT.name
+            ),
+        }
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Failed to plan meals: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to plan meals: {str(e)}")
+
+
+@app.post("/api/rules/repair")
+async def repair_meal_plan(repair_request: RepairRequest):
+    """Suggest swaps and substitutions that clear the rule violations in a date range, without saving them"""
+    if PlanRepairer is None:
+        raise HTTPException(status_code=500, detail="Plan repair not available")
+
+    try:
+        try:
+            start_date = datetime.strptime(repair_request.start_date, "%Y/%m/%d")
+            end_date = datetime.strptime(repair_request.end_date, "%Y/%m/%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY/MM/DD")
+
+        if end_date < start_date:
+            raise HTTPException(status_code=400, detail="End date must not be before start date")
+        if (end_date - start_date).days >= MAX_REPAIR_DAYS:
+            raise HTTPException(status_code=400, detail=f"Can repair at most {MAX_REPAIR_DAYS} days at once")
+
+        # Get meals for context, from the in-memory plan if available
+        meals_df = plan_state if plan_state else database.read_meals()
+
+        available_meals = get_available_meals()
+        if len(available_meals) == 0:
+            raise HTTPException(status_code=404, detail="No recipes found")
+
+        time_budget_ms = repair_request.time_budget_ms or settings.repair_time_budget_ms
+        repairer = PlanRepairer(default_rule_engine, time_budget_ms=time_budget_ms, seed=repair_request.seed)
+        result = repairer.repair(start_date, end_date, available_meals, meals_df)
+
+        return {
+            "status": "success",
+            "start_date": repair_request.start_date,
+            "end_date": repair_request.end_date,
+            # In the format of /api/rules/what-if edits; each edit applies on top of the ones before it
+            "edits": [
+                {
+                    "action": edit["action"],
+                    "date": edit["date"].strftime("%Y/%m/%d"),
+                    "other_date": edit["other_date"].strftime("%Y/%m/%d") if edit["other_date"] else None,
+                    "recipe": edit["recipe"],
+                }
+                for edit in result["edits"]
+            ],
+            "violations_before": result["violations_before"],
+            "violations_after": result["violations_after"],
+            "remaining": [
+                {**rule, "dates": [day.strftime("%Y/%m/%d") for day in rule["dates"]]} for rule in result["remaining"]
+            ],
+            "all_constraints_met": result["all_constraints_met"],
+            "complete": result["complete"],
+        }
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Failed to repair meal plan: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to repair meal plan: {str(e)}")
+
+
 @app.get("/api/suggest-recipe")
 async def suggest_recipe():
     """Get a recipe suggestion using OpenAI"""
@@ -795,98 +1180,140 @@ async def suggest_recipe():
         raise HTTPException(status_code=500, detail=f"Failed to get recipe suggestion: {str(e)}")
 
 
-@app.get("/api/meal/{index}/reload-from-notion")
-async def reload_meal_from_notion(index: int):
-    """Reload a single meal from Notion based on its index."""
-    try:
-        # First check if the index is valid
-        meals_df = database.read_meals()
-        if index < 0 or index >= len(meals_df):
-            raise HTTPException(status_code=404, detail=f"Meal at index {index} not found")
+def fetch_meal_from_notion(meal_row, label):
+    """
+    Fetch the Notion page of a meal and parse it into meal fields.
 
-        # Get the meal at this index
-        meal_row = meals_df.iloc[index]
+    Args:
+        meal_row: The meal as stored in the database (its date locates the Notion page)
+        label: How to refer to the meal in error messages
 
-        # Skip if no date (we need it to find the corresponding Notion page)
-        if pd.isna(meal_row.get("Date")) or pd.isnull(meal_row.get("Date")):
-            raise HTTPException(status_code=400, detail=f"Meal at index {index} has no date, cannot reload from Notion")
+    Returns:
+        (date_str, meal) with the Name, Tags and Notes from Notion and the Date from the database
+    """
+    # Skip if no date (we need it to find the corresponding Notion page)
+    if pd.isna(meal_row.get("Date")) or pd.isnull(meal_row.get("Date")):
+        raise HTTPException(status_code=400, detail=f"Meal {label} has no date, cannot reload from Notion")
 
-        # Format the date for lookup
-        try:
-            if isinstance(meal_row["Date"], str):
-                date_obj = pd.to_datetime(meal_row["Date"], format="%Y/%m/%d")
-            else:
-                date_obj = pd.to_datetime(meal_row["Date"])
-            date_str = date_obj.strftime("%Y/%m/%d")
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Error parsing date for meal at index {index}: {str(e)}")
+    # Format the date for lookup
+    try:
+        if isinstance(meal_row["Date"], str):
+            date_obj = pd.to_datetime(meal_row["Date"], format="%Y/%m/%d")
+        else:
+            date_obj = pd.to_datetime(meal_row["Date"])
+        date_str = date_obj.strftime("%Y/%m/%d")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error parsing date for meal {label}: {str(e)}")
 
-        # Find Notion page ID for this date
-        page_id = database.get_notion_page_id(date_str)
-        if not page_id:
-            raise HTTPException(status_code=404, detail=f"No Notion page ID found for date {date_str}")
+    # Find Notion page ID for this date
+    page_id = database.get_notion_page_id(date_str)
+    if not page_id:
+        raise HTTPException(status_code=404, detail=f"No Notion page ID found for date {date_str}")
 
-        # Set up headers for Notion API
-        if not settings.notion_api_token:
-            raise HTTPException(status_code=500, detail="Notion API token not configured")
+    # Set up headers for Notion API
+    if not settings.notion_api_token:
+        raise HTTPException(status_code=500, detail="Notion API token not configured")
 
-        headers = {
-            "Authorization": f"Bearer {settings.notion_api_token}",
-            "Content-Type": "application/json",
-            "Notion-Version": "2022-06-28",  # Use the current Notion API version
-        }
+    headers = {
+        "Authorization": f"Bearer {settings.notion_api_token}",
+        "Content-Type": "application/json",
+        "Notion-Version": "2022-06-28",  # Use the current Notion API version
+    }
 
-        # Fetch the page from Notion
-        url = f"https://api.notion.com/v1/pages/{page_id}"
-        response = requests.get(url, headers=headers)
+    # Fetch the page from Notion
+    url = f"https://api.notion.com/v1/pages/{page_id}"
+    response = requests.get(url, headers=headers)
 
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=500, detail=f"Failed to fetch from Notion API: {response.status_code} - {response.text}"
-            )
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to fetch from Notion API: {response.status_code} - {response.text}"
+        )
 
-        # Parse the response
-        page_data = response.json()
-        properties = page_data.get("properties", {})
+    # Parse the response
+    page_data = response.json()
+    properties = page_data.get("properties", {})
 
-        # Extract properties from Notion response
-        updated_meal = {}
+    # Extract properties from Notion response
+    updated_meal = {}
 
-        # Extract name if exists
-        if "Name" in properties:
-            name_prop = properties["Name"]
-            if name_prop["type"] == "title" and name_prop.get("title"):
-                title_parts = [part.get("plain_text", "") for part in name_prop.get("title", [])]
-                updated_meal["Name"] = " ".join(title_parts).strip()
-            else:
-                updated_meal["Name"] = ""  # Clear name if empty in Notion
+    # Extract name if exists
+    if "Name" in properties:
+        name_prop = properties["Name"]
+        if name_prop["type"] == "title" and name_prop.get("title"):
+            title_parts = [part.get("plain_text", "") for part in name_prop.get("title", [])]
+            updated_meal["Name"] = " ".join(title_parts).strip()
         else:
-            updated_meal["Name"] = ""
-
-        # Extract tags if exists
-        if "Tags" in properties:
-            tags_prop = properties["Tags"]
-            if tags_prop["type"] == "multi_select" and tags_prop.get("multi_select"):
-                tags = [tag.get("name", "") for tag in tags_prop.get("multi_select", [])]
-                updated_meal["Tags"] = ", ".join(tags)
-            else:
-                updated_meal["Tags"] = ""  # Clear tags if empty in Notion
+            updated_meal["Name"] = ""  # Clear name if empty in Notion
+    else:
+        updated_meal["Name"] = ""
+
+    # Extract tags if exists
+    if "Tags" in properties:
+        tags_prop = properties["Tags"]
+        if tags_prop["type"] == "multi_select" and tags_prop.get("multi_select"):
+            tags = [tag.get("name", "") for tag in tags_prop.get("multi_select", [])]
+            updated_meal["Tags"] = ", ".join(tags)
         else:
-            updated_meal["Tags"] = ""
-
-        # Extract notes if exists
-        if "Notes" in properties:
-            notes_prop = properties["Notes"]
-            if notes_prop["type"] == "rich_text" and notes_prop.get("rich_text"):
-                notes_parts = [part.get("plain_text", "") for part in notes_prop.get("rich_text", [])]
-                updated_meal["Notes"] = " ".join(notes_parts).strip()
-            else:
-                updated_meal["Notes"] = ""  # Clear notes if empty in Notion
+            updated_meal["Tags"] = ""  # Clear tags if empty in Notion
+    else:
+        updated_meal["Tags"] = ""
+
+    # Extract notes if exists
+    if "Notes" in properties:
+        notes_prop = properties["Notes"]
+        if notes_prop["type"] == "rich_text" and notes_prop.get("rich_text"):
+            notes_parts = [part.get("plain_text", "") for part in notes_prop.get("rich_text", [])]
+            updated_meal["Notes"] = " ".join(notes_parts).strip()
         else:
-            updated_meal["Notes"] = ""
+            updated_meal["Notes"] = ""  # Clear notes if empty in Notion
+    else:
+        updated_meal["Notes"] = ""
+
+    # Preserve the date field from our database
+    updated_meal["Date"] = meal_row.get("Date")
+    return date_str, updated_meal
+
+
+@app.get("/api/meals/{meal_id}/reload-from-notion")
+async def reload_meal_from_notion_by_id(meal_id: int):
+    """Reload a single meal from Notion based on its ID."""
+    try:
+        meal_row = database.read_meal(meal_id)
+        if meal_row is None:
+            raise HTTPException(status_code=404, detail=f"Meal {meal_id} not found")
+
+        date_str, updated_meal = fetch_meal_from_notion(meal_row, meal_id)
+
+        # Update the meal in our database
+        update_successful = database.update_meal(meal_id, updated_meal)
+        if not update_successful:
+            raise HTTPException(status_code=500, detail="Failed to update meal in database")
+
+        return {
+            "status": "success",
+            "message": f"Meal at date {date_str} reloaded from Notion",
+            "meal": updated_meal,
+            "changedMealIds": list(database.get_changed_meal_ids()),
+        }
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Failed to reload meal from Notion: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to reload meal from Notion: {str(e)}")
+
+
+@app.get("/api/meal/{index}/reload-from-notion")
+async def reload_meal_from_notion(index: int):
+    """Reload a single meal from Notion based on its index (see /api/meals/{meal_id}/reload-from-notion)."""
+    try:
+        # First check if the index is valid
+        meal_id = database.meal_id_at(index)
+        meal_row = database.read_meal(meal_id) if meal_id is not None else None
+        if meal_row is None:
+            raise HTTPException(status_code=404, detail=f"Meal at index {index} not found")
 
-        # Preserve the date field from our database
-        updated_meal["Date"] = meal_row.get("Date")
+        date_str, updated_meal = fetch_meal_from_notion(meal_row, f"at index {index}")
 
         # Update the meal in our database
         update_successful = database.update_changeset(index, updated_meal)
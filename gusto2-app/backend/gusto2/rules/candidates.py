@@ -0,0 +1,83 @@
+"""
+Batched evaluation of candidate meals.
+
+Instead of asking every rule about every recipe one at a time, the rule engine parses the candidate
+list once into a CandidateSet and each rule scores all candidates in one pass, returning a
+CandidateVerdicts with per-candidate arrays. Human-readable reasons are only built on demand.
+"""
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from gusto2.rules.snapshot import SKIP_VALIDATION_TAG
+from gusto2.tags import TagMatrix, parse_tags
+
+
+@lru_cache(maxsize=8192)
+def _candidate_tags(tags: str) -> FrozenSet[str]:
+    # Lowercased but deliberately not trimmed: Rule.can_add_meal() compares candidate tags this way, so e.g.
+    # ' fish' does not count as 'fish' for a candidate and the batch checks must give the same answers
+    return frozenset(tag.lower() for tag in tags.split(",")) if tags else frozenset()
+
+
+class CandidateSet:
+    """Candidate meals (dicts with 'name' and comma-separated 'tags'), parsed once for all rules."""
+
+    def __init__(self, meals: List[Dict[str, Any]]):
+        self.meals = meals
+        self.names = np.array([meal["name"] for meal in meals], dtype=object)
+        raw_tags = [meal.get("tags") or "" for meal in meals]
+        # Tag lists exactly as Rule.can_add_meal receives them
+        self.tag_lists: Tuple[List[str], ...] = tuple(tags.split(",") if tags else [] for tags in raw_tags)
+        # Lowercased tags, matched the same way the single-meal rule checks do
+        self.tags: Tuple[FrozenSet[str], ...] = tuple(_candidate_tags(tags) for tags in raw_tags)
+        self.tag_matrix = TagMatrix.from_tag_sets(self.tags)
+        self.skip_mask = np.fromiter((SKIP_VALIDATION_TAG in parse_tags(tags) for tags in raw_tags), bool, len(meals))
+        self._tag_masks: Dict[Tuple[str, ...], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.meals)
+
+    def tag_mask(self, tags: Iterable[str]) -> np.ndarray:
+        """Boolean array marking candidates that carry any of the given (lowercase) tags."""
+        key = tuple(sorted(tags))
+        mask = self._tag_masks.get(key)
+        if mask is None:
+            mask = self.tag_matrix.has_any(key)
+            self._tag_masks[key] = mask
+        return mask
+
+
+class CandidateVerdicts:
+    """
+    Outcome of a single rule for every candidate.
+
+    Attributes:
+        can_add: Whether each candidate can be added without violating the rule
+        helps: Whether each candidate helps meet the rule (only meaningful for requirements)
+        days_since_served: Days since each candidate was last planned, for rules that know it (see
+            EligibilityMatrix.days_since_last_planned()), otherwise None
+    """
+
+    def __init__(
+        self,
+        can_add: np.ndarray,
+        helps: np.ndarray,
+        reason: Callable[[int], str],
+        days_since_served: Optional[np.ndarray] = None,
+    ):
+        self.can_add = can_add
+        self.helps = helps
+        self._reason = reason
+        self.days_since_served = days_since_served
+
+    @classmethod
+    def uniform(cls, count: int, can_add: bool, reason: str) -> "CandidateVerdicts":
+        """Same verdict and reason for every candidate."""
+        return cls(np.full(count, can_add), np.zeros(count, dtype=bool), lambda i: reason)
+
+    def reason(self, index: int) -> str:
+        """Explanation for the candidate at the given index."""
+        return self._reason(index)
@@ -0,0 +1,186 @@
+"""
+Declarative rule definitions.
+
+Rule sets are JSON files with a list of rule definitions, each naming one of the rule kinds below
+and its parameters, e.g.:
+
+    {"rules": [{"kind": "weekly_tag", "name": "Weekly fish", "description": "...", "tag": "fish", "occurrences": 1}]}
+
+Definitions are compiled into the rule classes of the rule engine, which all evaluate against the
+pre-parsed plan with array operations, so adding rules never adds per-meal Python loops. Rule sets
+can be reloaded at runtime with default_rule_engine.set_rules(load_rules()).
+"""
+
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from gusto2.rules.rule_engine import (
+    MonthlyRequirementRule,
+    MultiTagWeeklyRequirementRule,
+    NoRepeatInWindowRule,
+    RollingWindowTagCountRule,
+    Rule,
+    RuleEngine,
+    SpecificDayRequirementRule,
+    WeeklyRequirementRule,
+)
+from gusto2.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Rule set used when no rules file is configured
+DEFAULT_RULES_FILE = os.path.join(os.path.dirname(__file__), "default_rules.json")
+
+DAY_NAMES = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+class RuleDefinitionError(ValueError):
+    """Raised when a rule definition is invalid."""
+
+
+def _positive_int(value: Any) -> int:
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError("must be a positive integer")
+    return value
+
+
+def _non_negative_int(value: Any) -> int:
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError("must be a non-negative integer")
+    return value
+
+
+def _tag(value: Any) -> str:
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("must be a non-empty string")
+    return value.strip()
+
+
+def _tags(value: Any) -> List[str]:
+    if not isinstance(value, list) or not value:
+        raise ValueError("must be a non-empty list of tags")
+    return [_tag(tag) for tag in value]
+
+
+def _day_of_week(value: Any) -> int:
+    """Day of the week as 0 (Monday) to 6 (Sunday), or its English name."""
+    if isinstance(value, str) and value.strip().lower() in DAY_NAMES:
+        return DAY_NAMES.index(value.strip().lower())
+    if not isinstance(value, bool) and isinstance(value, int) and 0 <= value <= 6:
+        return value
+    raise ValueError("must be a day name or a number from 0 (Monday) to 6 (Sunday)")
+
+
+# Rule kind -> (rule class, parameter name -> parser)
+RULE_KINDS: Dict[str, Tuple[Callable[..., Rule], Dict[str, Callable[[Any], Any]]]] = {
+    "no_repeat": (NoRepeatInWindowRule, {"window_days": _positive_int}),
+    "weekly_tag": (WeeklyRequirementRule, {"tag": _tag, "occurrences": _positive_int}),
+    "weekly_any_tag": (MultiTagWeeklyRequirementRule, {"tags": _tags, "occurrences": _positive_int}),
+    "day_of_week_tag": (SpecificDayRequirementRule, {"day_of_week": _day_of_week, "tag": _tag}),
+    "monthly_tag": (MonthlyRequirementRule, {"tag": _tag, "occurrences": _positive_int}),
+    "window_tag_minimum": (
+        RollingWindowTagCountRule,
+        {"tags": _tags, "window_days": _positive_int, "min_count": _positive_int},
+    ),
+    "window_tag_maximum": (
+        RollingWindowTagCountRule,
+        {"tags": _tags, "window_days": _positive_int, "max_count": _non_negative_int},
+    ),
+}
+
+
+def compile_rule(definition: Dict[str, Any]) -> Rule:
+    """
+    Compile a single rule definition into a rule.
+
+    Args:
+        definition: Dictionary with 'kind', 'name', optional 'description' and 'enabled', and the kind's parameters
+
+    Returns:
+        The compiled rule
+
+    Raises:
+        RuleDefinitionError: If the definition is invalid
+    """
+    if not isinstance(definition, dict):
+        raise RuleDefinitionError("Rule definition must be an object")
+
+    name = definition.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise RuleDefinitionError("Rule definition needs a 'name'")
+
+    kind = definition.get("kind")
+    if kind not in RULE_KINDS:
+        raise RuleDefinitionError(f"Rule '{name}' has unknown kind '{kind}', expected one of: {', '.join(RULE_KINDS)}")
+    rule_class, parameters = RULE_KINDS[kind]
+
+    unknown = set(definition) - set(parameters) - {"kind", "name", "description", "enabled"}
+    if unknown:
+        raise RuleDefinitionError(f"Rule '{name}' has unknown fields: {', '.join(sorted(unknown))}")
+
+    kwargs = {}
+    for parameter, parse in parameters.items():
+        if parameter not in definition:
+            raise RuleDefinitionError(f"Rule '{name}' is missing '{parameter}'")
+        try:
+            kwargs[parameter] = parse(definition[parameter])
+        except ValueError as e:
+            raise RuleDefinitionError(f"Rule '{name}': '{parameter}' {e}") from e
+
+    enabled = definition.get("enabled", True)
+    if not isinstance(enabled, bool):
+        raise RuleDefinitionError(f"Rule '{name}': 'enabled' must be true or false")
+
+    rule = rule_class(name=name, description=definition.get("description", ""), **kwargs)
+    rule.enabled = enabled
+    return rule
+
+
+def compile_rules(definitions: Dict[str, Any]) -> List[Rule]:
+    """Compile a rule set ({"rules": [...]}) into rules, rejecting duplicate rule names."""
+    if not isinstance(definitions, dict) or not isinstance(definitions.get("rules"), list):
+        raise RuleDefinitionError("Rule set must be an object with a 'rules' list")
+
+    rules = [compile_rule(definition) for definition in definitions["rules"]]
+
+    names = [rule.name for rule in rules]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise RuleDefinitionError(f"Duplicate rule names: {', '.join(duplicates)}")
+    return rules
+
+
+def load_rules(path: Optional[str] = None) -> List[Rule]:
+    """
+    Load and compile a rule definitions file.
+
+    Args:
+        path: JSON file to load; defaults to the configured rules file, or the bundled default rules
+
+    Returns:
+        List of compiled rules
+    """
+    path = path or settings.rules_file or DEFAULT_RULES_FILE
+    try:
+        with open(path) as f:
+            definitions = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise RuleDefinitionError(f"Failed to read rules file {path}: {str(e)}") from e
+    return compile_rules(definitions)
+
+
+def create_rule_engine(path: Optional[str] = None) -> RuleEngine:
+    """Create a rule engine with the rules of a rule definitions file (see load_rules())."""
+    engine = RuleEngine(rule_time_budget_ms=settings.rule_time_budget_ms, workers=settings.rule_workers)
+    engine.set_rules(load_rules(path))
+    return engine
+
+
+# Create a default instance with the configured rules, falling back to the bundled ones if those are invalid
+try:
+    default_rule_engine = create_rule_engine()
+except RuleDefinitionError as e:
+    logger.error(f"Invalid rules file, using the default rules instead: {str(e)}")
+    default_rule_engine = create_rule_engine(DEFAULT_RULES_FILE)
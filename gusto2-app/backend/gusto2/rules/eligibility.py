@@ -0,0 +1,120 @@
+"""
+Recipe x date eligibility for the no-repeat rule.
+
+An EligibilityMatrix holds, for every candidate recipe and every day of a horizon, how many times
+the recipe is planned (without 'skip-validation') within the no-repeat window around that day, and
+the date each recipe was last planned. PlanState keeps its matrices up to date with every meal
+change, so checking which recipes are blocked on a day, or how long ago they were last served, is a
+row lookup instead of a plan scan.
+"""
+
+from typing import Dict, FrozenSet, List, Optional, Sequence
+
+import numpy as np
+
+from gusto2.rules.candidates import CandidateSet
+from gusto2.rules.snapshot import SKIP_VALIDATION_TAG, PlanSnapshot
+
+# Days covered by a matrix, starting a little before the first day it was asked for
+DEFAULT_HORIZON_DAYS = 120
+HORIZON_LEAD_DAYS = 7
+
+# Last-planned ordinal of recipes that were never planned
+NEVER = np.iinfo(np.int64).min
+
+
+class EligibilityMatrix:
+    """
+    Window counts per (candidate, day) for one candidate set and no-repeat window.
+
+    Args:
+        candidates: Candidate recipes, one matrix row each
+        window_days: No-repeat window in days (before and after each day)
+        start: Date ordinal of the first day of the horizon
+        days: Number of days in the horizon
+    """
+
+    def __init__(self, candidates: CandidateSet, window_days: int, start: int, days: int = DEFAULT_HORIZON_DAYS):
+        self.candidates = candidates
+        self.window_days = window_days
+        self.start = start
+        self.days = days
+        self.counts = np.zeros((len(candidates), days), dtype=np.int32)
+        self.last_planned = np.full(len(candidates), NEVER, dtype=np.int64)
+        self._rows: Dict[str, List[int]] = {}
+        for index, name in enumerate(candidates.names):
+            self._rows.setdefault(name, []).append(index)
+
+    def covers(self, ordinal: int) -> bool:
+        return self.start <= ordinal < self.start + self.days
+
+    def load(self, rows: PlanSnapshot, recipe_dates: Dict[str, Sequence[int]]) -> None:
+        """
+        Fill the matrix from scratch.
+
+        Args:
+            rows: Planned meals from window_days before the horizon up to window_days after it
+            recipe_dates: Sorted date ordinals per recipe name, for the whole plan
+        """
+        self.counts[:] = 0
+        counted = ~rows.skip_mask
+        indexes, lows, highs = [], [], []
+        for name, ordinal in zip(rows.names[counted], rows.ordinals[counted], strict=True):
+            for index in self._rows.get(name, ()):
+                indexes.append(index)
+                lows.append(ordinal - self.window_days - self.start)
+                highs.append(ordinal + self.window_days - self.start + 1)
+
+        # Add every occurrence to the days within the window around it with a difference array
+        indexes = np.asarray(indexes, dtype=np.int64)
+        coverage = np.zeros((len(self.candidates), self.days + 1), dtype=np.int32)
+        np.add.at(coverage, (indexes, np.clip(np.asarray(lows, dtype=np.int64), 0, self.days)), 1)
+        np.add.at(coverage, (indexes, np.clip(np.asarray(highs, dtype=np.int64), 0, self.days)), -1)
+        np.cumsum(coverage[:, :-1], axis=1, out=self.counts)
+
+        self.last_planned[:] = NEVER
+        for name, indexes in self._rows.items():
+            dates = recipe_dates.get(name)
+            if dates:
+                self.last_planned[indexes] = dates[-1]
+
+    def update(self, ordinal: int, name: Optional[str], tags: FrozenSet[str], sign: int, dates: Sequence[int]) -> None:
+        """
+        Apply a single added (sign 1) or removed (sign -1) meal.
+
+        Args:
+            ordinal: Date ordinal of the meal
+            name: Recipe name of the meal
+            tags: Tags of the meal
+            sign: 1 for an added meal, -1 for a removed one
+            dates: Sorted date ordinals of the recipe after the change
+        """
+        indexes = self._rows.get(name)
+        if not indexes:
+            return
+        if SKIP_VALIDATION_TAG not in tags:
+            low = max(ordinal - self.window_days - self.start, 0)
+            high = min(ordinal + self.window_days - self.start + 1, self.days)
+            if low < high:
+                self.counts[indexes, low:high] += sign
+        self.last_planned[indexes] = dates[-1] if dates else NEVER
+
+    def blocked(self, ordinal: int) -> np.ndarray:
+        """Candidates planned within the window around a day (the day must be covered)."""
+        return self.counts[:, ordinal - self.start] > 0
+
+    def days_since_last_planned(self, ordinal: int) -> np.ndarray:
+        """
+        Days between the last date each candidate is planned and a day.
+
+        Negative if a candidate is planned after the day, infinite if it was never planned.
+        """
+        return days_since(self.last_planned, ordinal)
+
+
+def days_since(last_planned: np.ndarray, ordinal: int) -> np.ndarray:
+    """Days from last-planned ordinals (NEVER for never planned) to a day, infinite for never planned."""
+    planned = last_planned != NEVER
+    days = np.full(len(last_planned), np.inf)
+    days[planned] = ordinal - last_planned[planned]
+    return days
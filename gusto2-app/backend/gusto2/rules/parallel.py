@@ -0,0 +1,216 @@
+"""
+Process-pool evaluation of rules for large meal plans.
+
+Validating a long history runs every rule over the whole plan, one after another on a single core.
+ParallelRuleRunner fans the rules (and, for per-day validation, shards of the date range) out to a
+pool of worker processes instead. The plan isn't pickled per task: its numeric arrays are copied
+once into a shared memory block (SharedPlan), and workers rebuild a PlanSnapshot on top of that
+block once per plan. Results are collected in rule and shard order, so they don't depend on which
+worker finishes first.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from gusto2.rules.snapshot import PlanSnapshot
+
+# Arrays of a PlanSnapshot stored in shared memory, one int64 row each
+_SHARED_ARRAYS = ("ordinals", "iso_years", "iso_weeks", "weekdays", "recipe_ids", "tag_set_ids")
+
+# Number of shared plans a worker keeps attached
+_WORKER_CACHE_SIZE = 2
+
+# Plans attached in this (worker) process: shared memory name -> (shared memory, snapshot)
+_attached: Dict[str, Tuple[shared_memory.SharedMemory, PlanSnapshot]] = {}
+
+
+class SharedPlan:
+    """
+    A PlanSnapshot copied into shared memory, for worker processes to read without pickling it.
+
+    Only the numeric arrays are shared; recipe names and tag sets are deduplicated into small lists
+    that travel with the (picklable) header. Call close() to free the shared memory.
+    """
+
+    def __init__(self, snapshot: PlanSnapshot):
+        names, recipe_ids = _unique(snapshot.names, snapshot.recipe_ids)
+        tag_sets, tag_set_ids = _unique(snapshot.tags)
+        arrays = {
+            "ordinals": snapshot.ordinals,
+            "iso_years": snapshot.iso_years,
+            "iso_weeks": snapshot.iso_weeks,
+            "weekdays": snapshot.weekdays,
+            "recipe_ids": recipe_ids,
+            "tag_set_ids": tag_set_ids,
+        }
+
+        rows = len(snapshot)
+        self._memory = shared_memory.SharedMemory(create=True, size=max(len(_SHARED_ARRAYS) * rows * 8, 1))
+        shared = np.ndarray((len(_SHARED_ARRAYS), rows), dtype=np.int64, buffer=self._memory.buf)
+        for index, array_name in enumerate(_SHARED_ARRAYS):
+            shared[index] = arrays[array_name]
+        del shared
+
+        self.header = {
+            "memory": self._memory.name,
+            "rows": rows,
+            "row_count": snapshot.row_count,
+            "names": names,
+            "tag_sets": [tuple(tags) for tags in tag_sets],
+        }
+        # Number of batches of tasks reading the plan, kept by ParallelRuleRunner
+        self.users = 0
+
+    def close(self) -> None:
+        """Free the shared memory (workers that still have it attached keep their mapping)."""
+        self._memory.close()
+        self._memory.unlink()
+
+
+def _unique(values: Sequence[Any], ids: Optional[np.ndarray] = None) -> Tuple[List[Any], np.ndarray]:
+    """Distinct values and the index of each value among them (ids are reused when already known)."""
+    if ids is not None:
+        distinct: List[Any] = [None] * (int(ids.max()) + 1 if len(ids) else 0)
+        for value, value_id in zip(values, ids, strict=True):
+            if value_id >= 0:
+                distinct[value_id] = value
+        return distinct, ids
+    index: Dict[Any, int] = {}
+    ids = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int64, count=len(values))
+    return list(index), ids
+
+
+def attach(header: Dict[str, Any]) -> PlanSnapshot:
+    """PlanSnapshot of a SharedPlan, built once per plan and process."""
+    memory_name = header["memory"]
+    if memory_name in _attached:
+        return _attached[memory_name][1]
+
+    memory = shared_memory.SharedMemory(name=memory_name)
+    shared = np.ndarray((len(_SHARED_ARRAYS), header["rows"]), dtype=np.int64, buffer=memory.buf)
+    arrays = dict(zip(_SHARED_ARRAYS, shared, strict=True))
+
+    names = np.array(header["names"] + [None], dtype=object)  # Recipe id -1 (no name) maps to the last entry
+    tag_sets = [frozenset(tags) for tags in header["tag_sets"]]
+    snapshot = PlanSnapshot(
+        ordinals=arrays["ordinals"],
+        iso_years=arrays["iso_years"],
+        iso_weeks=arrays["iso_weeks"],
+        weekdays=arrays["weekdays"],
+        names=names[arrays["recipe_ids"]],
+        recipe_ids=arrays["recipe_ids"],
+        tags=tuple(tag_sets[i] for i in arrays["tag_set_ids"]),
+        row_count=header["row_count"],
+    )
+
+    while len(_attached) >= _WORKER_CACHE_SIZE:
+        old_memory, _ = _attached.pop(next(iter(_attached)))
+        try:
+            old_memory.close()
+        except BufferError:
+            # Arrays of the old snapshot are still referenced; the memory is released with them
+            pass
+    _attached[memory_name] = (memory, snapshot)
+    return snapshot
+
+
+def _validate(header: Dict[str, Any], rule, date: Optional[datetime]) -> Tuple[bool, str]:
+    return rule.validate(attach(header), date)
+
+
+def _validate_days(header: Dict[str, Any], rule, start: datetime, end: datetime) -> np.ndarray:
+    return rule.validate_days(attach(header), start, end)
+
+
+class ParallelRuleRunner:
+    """
+    Run rules against a plan in a pool of worker processes.
+
+    Args:
+        workers: Number of worker processes; the pool is started on first use
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # The last shared plan, reused while the same snapshot is validated again (workers keep it attached)
+        self._snapshot: Optional[PlanSnapshot] = None
+        self._shared: Optional[SharedPlan] = None
+        # Guards the pool and the swap of the shared plan only; batches of tasks share the pool concurrently
+        self._lock = threading.Lock()
+
+    def _acquire(self, snapshot: PlanSnapshot) -> Tuple[ProcessPoolExecutor, SharedPlan]:
+        """The pool and the shared plan of a snapshot, registering a batch of tasks as a user of the plan."""
+        with self._lock:
+            if self._pool is None:
+                # Spawned rather than forked, since the app process runs threads
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            if self._snapshot is not snapshot:
+                if self._shared is not None and self._shared.users == 0:
+                    self._shared.close()
+                # A replaced plan that batches still read is freed by the last of them, see _release()
+                self._shared, self._snapshot = SharedPlan(snapshot), snapshot
+            self._shared.users += 1
+            return self._pool, self._shared
+
+    def _release(self, shared: SharedPlan) -> None:
+        """Unregister a batch of tasks, freeing its shared plan if it was replaced and this was the last user."""
+        with self._lock:
+            shared.users -= 1
+            if shared.users == 0 and shared is not self._shared:
+                shared.close()
+
+    def _run(self, snapshot: PlanSnapshot, function, tasks: List[Tuple]) -> List[Any]:
+        """Call function(header, *task) in the workers for every task, returning the results in task order."""
+        pool, shared = self._acquire(snapshot)
+        try:
+            futures = [pool.submit(function, shared.header, *task) for task in tasks]
+            return [future.result() for future in futures]
+        finally:
+            self._release(shared)
+
+    def validate(self, snapshot: PlanSnapshot, rules: Sequence, date: Optional[datetime]) -> List[Tuple[bool, str]]:
+        """
+        Validate a plan against every rule, one task per rule.
+
+        Returns:
+            (is_valid, message) per rule, in the order of the rules
+        """
+        return self._run(snapshot, _validate, [(rule, date) for rule in rules])
+
+    def validate_days(
+        self, snapshot: PlanSnapshot, rules: Sequence, start: datetime, end: datetime
+    ) -> List[np.ndarray]:
+        """
+        Validate every day of a range against every rule, one task per rule and shard of the range.
+
+        Returns:
+            Boolean array of per-day results per rule, in the order of the rules
+        """
+        days = (end - start).days + 1
+        shard_days = -(-days // self.workers)
+        shards = [
+            (start + timedelta(days=offset), start + timedelta(days=min(offset + shard_days, days) - 1))
+            for offset in range(0, days, shard_days)
+        ]
+
+        tasks = [(rule, shard_start, shard_end) for rule in rules for shard_start, shard_end in shards]
+        results = self._run(snapshot, _validate_days, tasks)
+        return [np.concatenate(results[i : i + len(shards)]) for i in range(0, len(results), len(shards))]
+
+    def close(self) -> None:
+        """Stop the worker processes and free the shared plan."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+            if self._shared is not None:
+                if self._shared.users == 0:
+                    self._shared.close()
+                self._shared, self._snapshot = None, None
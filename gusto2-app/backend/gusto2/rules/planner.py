@@ -0,0 +1,268 @@
+"""
+Multi-day meal planner built on the rule engine.
+
+Fills every empty day in a date range so that no CONSTRAINT rule is violated, while meeting as many
+REQUIREMENT rules as possible. Each attempt is a randomized greedy pass over the days followed by a
+local search that swaps single days for meals helping more requirements. Attempts are repeated with
+different tie-breaks until the time budget runs out, and the best plan is returned.
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from gusto2.rules.candidates import CandidateSet
+from gusto2.rules.rule_engine import CandidateEvaluation, Rule, RuleEngine, RuleType
+from gusto2.rules.snapshot import PlanLike, as_plan, to_ordinal
+from gusto2.rules.state import PlanState
+
+# Default time budget of MealPlanner.plan(), in milliseconds
+DEFAULT_TIME_BUDGET_MS = 500
+
+
+class MealPlanner:
+    """
+    Plan meals for a date range against the rules of a rule engine.
+
+    Args:
+        engine: Rule engine whose enabled rules the plan must satisfy
+        time_budget_ms: Time to spend on improving the plan; the first complete attempt always finishes
+        seed: Optional random seed, for reproducible plans
+    """
+
+    def __init__(self, engine: RuleEngine, time_budget_ms: int = DEFAULT_TIME_BUDGET_MS, seed: Optional[int] = None):
+        self.engine = engine
+        self.time_budget_ms = time_budget_ms
+        self.random = random.Random(seed)
+
+    def plan(
+        self,
+        start: datetime,
+        end: datetime,
+        available_meals: Union[List[Dict[str, Any]], CandidateSet],
+        meals_df: PlanLike,
+    ) -> Dict[str, Any]:
+        """
+        Fill all days between start and end (inclusive) that don't have a meal yet.
+
+        The existing meal plan is not modified.
+
+        Args:
+            start: First day to plan
+            end: Last day to plan
+            available_meals: List of available meals, each with 'name' and 'tags', or a CandidateSet of them
+            meals_df: Existing meal plan dataframe, PlanSnapshot or PlanState
+
+        Returns:
+            Dictionary with the planned days (date, meal, requirement score), the days no meal could be
+            planned for, and a per-rule breakdown of how many days in the range satisfy each rule
+        """
+        deadline = time.perf_counter() + self.time_budget_ms / 1000
+
+        days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+        state = PlanState.from_dataframe(as_plan(meals_df))
+        empty_days = [day for day in days if len(state.between(to_ordinal(day), to_ordinal(day))) == 0]
+        candidates = available_meals if isinstance(available_meals, CandidateSet) else CandidateSet(available_meals)
+
+        best_choices, best_objective = None, None
+        attempts = 0
+        while True:
+            choices = self._greedy(state, empty_days, candidates)
+            self._improve(state, empty_days, candidates, choices, deadline)
+            objective = self._objective(state, days, choices)
+            attempts += 1
+
+            if best_objective is None or objective > best_objective:
+                best_choices, best_objective = list(choices), objective
+
+            # Undo the attempt, so the next one starts from the existing plan again
+            self._apply(state, empty_days, candidates, choices, remove=True)
+
+            if time.perf_counter() >= deadline or len(candidates) == 0 or self._is_perfect(objective, empty_days, days):
+                break
+
+        self._apply(state, empty_days, candidates, best_choices)
+        evaluations = self._evaluate_planned(state, empty_days, candidates, best_choices)
+
+        planned = []
+        for day, choice, evaluation in zip(empty_days, best_choices, evaluations, strict=True):
+            if choice is None:
+                planned.append({"date": day, "meal": None, "requirement_score": 0})
+            else:
+                planned.append(
+                    {
+                        "date": day,
+                        "meal": candidates.meals[choice],
+                        "requirement_score": int(evaluation.scores[choice]),
+                    }
+                )
+
+        return {
+            "plan": planned,
+            "unfilled": [day for day, choice in zip(empty_days, best_choices, strict=True) if choice is None],
+            "rule_scores": self._rule_scores(state, days, empty_days, best_choices, evaluations),
+            "attempts": attempts,
+        }
+
+    def _greedy(self, state: PlanState, days: List[datetime], candidates: CandidateSet) -> List[Optional[int]]:
+        """Plan the days in order, each time picking one of the allowed meals that helps most requirements."""
+        choices = []
+        for day in days:
+            choice = self._best_candidate(state, day, candidates)
+            if choice is not None:
+                self._add(state, day, candidates, choice)
+            choices.append(choice)
+        return choices
+
+    def _improve(
+        self,
+        state: PlanState,
+        days: List[datetime],
+        candidates: CandidateSet,
+        choices: List[Optional[int]],
+        deadline: float,
+    ) -> None:
+        """Swap single days for better meals until no swap helps more requirements or time runs out."""
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            order = list(range(len(days)))
+            self.random.shuffle(order)
+            for position in order:
+                if time.perf_counter() >= deadline:
+                    return
+
+                day, current = days[position], choices[position]
+                if current is not None:
+                    self._remove(state, day, candidates, current)
+
+                evaluation = self.engine.evaluate_candidates(candidates, day, state)
+                current_score = -1
+                if current is not None and evaluation.can_add[current]:
+                    current_score = int(evaluation.scores[current])
+
+                choice = evaluation.pick(self.random)
+                if choice is not None and int(evaluation.scores[choice]) > current_score:
+                    choices[position] = choice
+                    improved = True
+                else:
+                    choice = current
+                if choice is not None:
+                    self._add(state, day, candidates, choice)
+
+    def _best_candidate(self, state: PlanState, day: datetime, candidates: CandidateSet) -> Optional[int]:
+        evaluation = self.engine.evaluate_candidates(candidates, day, state)
+        return evaluation.pick(self.random)
+
+    def _objective(self, state: PlanState, days: List[datetime], choices: List[Optional[int]]) -> Tuple[int, int]:
+        """Plans are compared by filled days first, then by satisfied requirement days."""
+        filled = sum(choice is not None for choice in choices)
+        satisfied = sum(self._requirement_days(rule, state, days)[0] for rule in self._requirements())
+        return filled, satisfied
+
+    def _is_perfect(self, objective: Tuple[int, int], empty_days: List[datetime], days: List[datetime]) -> bool:
+        """Whether every empty day is filled and every requirement is met on every day."""
+        filled, satisfied = objective
+        return filled == len(empty_days) and satisfied == len(self._requirements()) * len(days)
+
+    def _requirements(self) -> List[Rule]:
+        return [rule for rule in self.engine.get_enabled_rules() if rule.type == RuleType.REQUIREMENT]
+
+    @staticmethod
+    def _requirement_days(rule: Rule, state: PlanState, days: List[datetime]) -> Tuple[int, Optional[str]]:
+        """Number of days for which a rule validates, and the message of the first day it doesn't."""
+        satisfied = 0
+        message = None
+        for day in days:
+            is_valid, day_message = rule.validate(state, day)
+            if is_valid:
+                satisfied += 1
+            elif message is None:
+                message = day_message
+        return satisfied, message
+
+    def _rule_scores(
+        self,
+        state: PlanState,
+        days: List[datetime],
+        empty_days: List[datetime],
+        choices: List[Optional[int]],
+        evaluations: List[Optional[CandidateEvaluation]],
+    ) -> List[Dict[str, Any]]:
+        """
+        Per-rule breakdown of the final plan.
+
+        Requirements are scored on every day in the range; constraints on every planned meal, by whether
+        that meal can be added next to the rest of the plan.
+        """
+        rule_scores = []
+        for rule in self.engine.get_enabled_rules():
+            if rule.type == RuleType.REQUIREMENT:
+                satisfied, message = self._requirement_days(rule, state, days)
+                total = len(days)
+            else:  # CONSTRAINT
+                satisfied, message, total = 0, None, 0
+                for day, choice, evaluation in zip(empty_days, choices, evaluations, strict=True):
+                    if choice is None:
+                        continue
+                    verdict = evaluation.verdict(rule)
+                    total += 1
+                    if verdict.can_add[choice]:
+                        satisfied += 1
+                    elif message is None:
+                        message = f"{day.strftime('%Y-%m-%d')}: {verdict.reason(choice)}"
+
+            rule_scores.append(
+                {
+                    "rule_name": rule.name,
+                    "rule_type": rule.type.name,
+                    "is_valid": satisfied == total,
+                    "satisfied_days": satisfied,
+                    "total_days": total,
+                    "score": satisfied / total if total else 1.0,
+                    "message": message,
+                }
+            )
+        return rule_scores
+
+    def _evaluate_planned(
+        self, state: PlanState, days: List[datetime], candidates: CandidateSet, choices: List[Optional[int]]
+    ) -> List[Optional[CandidateEvaluation]]:
+        """Evaluate each planned day against the rest of the final plan, as if its meal was added last."""
+        evaluations = []
+        for day, choice in zip(days, choices, strict=True):
+            if choice is None:
+                evaluations.append(None)
+                continue
+            self._remove(state, day, candidates, choice)
+            evaluations.append(self.engine.evaluate_candidates(candidates, day, state))
+            self._add(state, day, candidates, choice)
+        return evaluations
+
+    def _apply(
+        self,
+        state: PlanState,
+        days: List[datetime],
+        candidates: CandidateSet,
+        choices: List[Optional[int]],
+        remove: bool = False,
+    ) -> None:
+        for day, choice in zip(days, choices, strict=True):
+            if choice is None:
+                continue
+            if remove:
+                self._remove(state, day, candidates, choice)
+            else:
+                self._add(state, day, candidates, choice)
+
+    @staticmethod
+    def _row(day: datetime, candidates: CandidateSet, index: int):
+        meal = candidates.meals[index]
+        return day, meal["name"], meal.get("tags", "")
+
+    def _add(self, state: PlanState, day: datetime, candidates: CandidateSet, index: int) -> None:
+        state.apply_changes([(None, self._row(day, candidates, index))])
+
+    def _remove(self, state: PlanState, day: datetime, candidates: CandidateSet, index: int) -> None:
+        state.apply_changes([(self._row(day, candidates, index), None)])
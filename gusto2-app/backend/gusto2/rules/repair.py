@@ -0,0 +1,461 @@
+"""
+Repair suggestions for rule violations in a date range.
+
+Instead of only reporting that the plan breaks a rule, PlanRepairer searches for a short sequence of
+edits to the planned days of a range (swapping the meals of two days, or substituting the meals of a
+day with another recipe) that clears the CONSTRAINT violations, and then meets more REQUIREMENT rules
+where that doesn't break a constraint. The search is greedy: every edit moves a meal a constraint
+doesn't allow on its day, picking the swap or substitution that leaves fewest violations. Edits are
+tried on a private PlanState and only revalidate the days they can affect; which recipes are allowed
+on a day, and which carry a missing tag, comes from the batched candidate evaluation and its
+eligibility matrices.
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from gusto2.rules.candidates import CandidateSet
+from gusto2.rules.rule_engine import Rule, RuleEngine, RuleType
+from gusto2.rules.snapshot import PlanLike, as_plan, to_ordinal
+from gusto2.rules.state import PlanState
+from gusto2.rules.what_if import CLEAR_DAY, SET_MEAL, SWAP_DAYS, PlanEdit, day_rows, undo_changes
+
+# Default time budget of PlanRepairer.repair(), in milliseconds
+DEFAULT_TIME_BUDGET_MS = 500
+
+# Number of days tried per edit
+MAX_CULPRITS = 2
+
+# Number of days a culprit day is tried to swap with, the ones whose meals fit best on the culprit day
+MAX_SWAP_PARTNERS = 6
+
+# Violation counts (constraint days, requirement days), compared constraints first
+Violations = Tuple[int, int]
+
+
+class _RangeRules:
+    """The enabled rules of an engine over a date range, with the days each rule reads per day."""
+
+    def __init__(self, rules: List[Rule], start: datetime, end: datetime):
+        self.rules = rules
+        self.start = start
+        self.end = end
+        self.first = to_ordinal(start)
+        self.days = (end - start).days + 1
+        self.is_constraint = np.array([rule.type == RuleType.CONSTRAINT for rule in rules], dtype=bool)
+        # Per rule, the first and last ordinals validate() reads around every day, or None for the whole plan
+        self.spans: List[Optional[Tuple[np.ndarray, np.ndarray]]] = []
+        for rule in rules:
+            spans = [rule.date_span(start + timedelta(days=offset)) for offset in range(self.days)]
+            if any(span is None for span in spans):
+                self.spans.append(None)
+            else:
+                self.spans.append(
+                    (
+                        np.array([span[0] for span in spans], dtype=np.int64),
+                        np.array([span[1] for span in spans], dtype=np.int64),
+                    )
+                )
+
+    def failures(self, state: PlanState) -> List[np.ndarray]:
+        """Boolean array of the days in the range each rule fails on."""
+        return [~rule.validate_days(state, self.start, self.end) for rule in self.rules]
+
+    def affected(self, index: int, ordinals: List[int]) -> List[Tuple[int, int]]:
+        """
+        Days in the range whose validation by a rule reads any of the given days.
+
+        Returns:
+            Disjoint (first, last) day offsets in the range (inclusive)
+        """
+        spans = self.spans[index]
+        if spans is None:
+            return [(0, self.days - 1)]
+        firsts, lasts = spans
+        windows = []
+        for ordinal in sorted(ordinals):
+            # Spans move forward with the day, so the days reading an ordinal are contiguous
+            low = int(np.searchsorted(lasts, ordinal, side="left"))
+            high = int(np.searchsorted(firsts, ordinal, side="right")) - 1
+            if low > high:
+                continue
+            if windows and low <= windows[-1][1] + 1:
+                windows[-1] = (windows[-1][0], max(windows[-1][1], high))
+            else:
+                windows.append((low, high))
+        return windows
+
+    def read_by(self, index: int, failing: np.ndarray) -> np.ndarray:
+        """Boolean array of the days in the range that a rule reads when validating the failing days."""
+        spans = self.spans[index]
+        if spans is None:
+            return np.ones(self.days, dtype=bool) if failing.any() else np.zeros(self.days, dtype=bool)
+        firsts, lasts = spans
+        coverage = np.zeros(self.days + 1, dtype=np.int64)
+        days = np.flatnonzero(failing)
+        np.add.at(coverage, np.clip(firsts[days] - self.first, 0, self.days), 1)
+        np.add.at(coverage, np.clip(lasts[days] - self.first + 1, 0, self.days), -1)
+        return np.cumsum(coverage[:-1]) > 0
+
+    def violations(
+        self, state: PlanState, failures: List[np.ndarray], ordinals: List[int], constraints_only: bool = False
+    ) -> Tuple[Violations, Violations]:
+        """
+        Violations on the days affected by a change to the given days, before and after the change.
+
+        Args:
+            state: Plan with the change applied
+            failures: Result of failures() for the plan without the change
+            ordinals: Days the change touches
+            constraints_only: Only count constraint violations (requirement counts are 0)
+
+        Returns:
+            Tuple of (before, after) violation counts
+        """
+        windows = {}
+        for index in range(len(self.rules)):
+            if self.is_constraint[index] or not constraints_only:
+                windows[index] = self.affected(index, ordinals)
+
+        # Slice the rows all windows read once, rather than once per rule and window
+        plan: PlanLike = state
+        if windows and all(self.spans[index] is not None for index in windows):
+            reads = [
+                (self.spans[index][0][low], self.spans[index][1][high])
+                for index, index_windows in windows.items()
+                for low, high in index_windows
+            ]
+            if reads:
+                plan = state.between(int(min(read[0] for read in reads)), int(max(read[1] for read in reads)))
+
+        before, after = [0, 0], [0, 0]
+        for index, index_windows in windows.items():
+            kind = 0 if self.is_constraint[index] else 1
+            for low, high in index_windows:
+                before[kind] += int(failures[index][low : high + 1].sum())
+                valid = self.rules[index].validate_days(
+                    plan, self.start + timedelta(days=low), self.start + timedelta(days=high)
+                )
+                after[kind] += int((~valid).sum())
+        return (before[0], before[1]), (after[0], after[1])
+
+
+class PlanRepairer:
+    """
+    Suggest swaps and substitutions that clear the rule violations of a date range.
+
+    Args:
+        engine: Rule engine whose enabled rules the plan must satisfy
+        time_budget_ms: Time to spend on searching for edits; the edit being searched for is always finished
+        seed: Optional random seed, for reproducible suggestions
+    """
+
+    def __init__(self, engine: RuleEngine, time_budget_ms: int = DEFAULT_TIME_BUDGET_MS, seed: Optional[int] = None):
+        self.engine = engine
+        self.time_budget_ms = time_budget_ms
+        self.random = random.Random(seed)
+
+    def repair(
+        self,
+        start: datetime,
+        end: datetime,
+        available_meals: Union[List[Dict[str, Any]], CandidateSet],
+        meals_df: PlanLike,
+    ) -> Dict[str, Any]:
+        """
+        Search for a small set of edits to the planned days between start and end (inclusive) that clears
+        their constraint violations.
+
+        Every edit moves a conflicting meal (one a constraint doesn't allow on its day) away, by swapping
+        its day with a day whose meals fit there or by substituting an allowed recipe, picking the edit
+        that leaves fewest violations; swaps win ties, since they keep the planned recipes. Once no
+        conflicts are left, the remaining time goes to edits that meet more requirements. Edits build on
+        each other, so they are meant to be applied in order. The existing meal plan is not modified.
+
+        Args:
+            start: First day of the range
+            end: Last day of the range
+            available_meals: List of available meals, each with 'name' and 'tags', or a CandidateSet of them
+            meals_df: Existing meal plan dataframe, PlanSnapshot or PlanState
+
+        Returns:
+            Dictionary with the edits, the constraint and requirement violations (failing rule days) in the
+            range before and after the edits, the days each rule still fails on, and whether the search ran
+            to the end rather than out of time
+        """
+        deadline = time.perf_counter() + self.time_budget_ms / 1000
+
+        plan = as_plan(meals_df)
+        first_span, last_span = self.engine.date_span(start), self.engine.date_span(end)
+        if first_span is not None and last_span is not None:
+            # Edits and checks stay within the range, so the rules never read beyond the days around it
+            plan = plan.between(to_ordinal(first_span[0]), to_ordinal(last_span[1]))
+        state = PlanState.from_dataframe(plan)
+        candidates = available_meals if isinstance(available_meals, CandidateSet) else CandidateSet(available_meals)
+        rules = _RangeRules(self.engine.get_enabled_rules(), start, end)
+        constraints = [rule for rule in rules.rules if rule.type == RuleType.CONSTRAINT]
+
+        before = rules.failures(state)
+        # Planned days whose meals were found to break no constraint, or that no edit could be found for
+        cleared = np.zeros(rules.days, dtype=bool)
+
+        edits: List[PlanEdit] = []
+        complete = False
+        while time.perf_counter() < deadline:
+            failures = rules.failures(state)
+            planned = self._planned_days(state, rules)
+            partners = self._partners(state, rules, planned)
+
+            culprits = self._conflicts(state, rules, constraints, failures, planned & ~cleared, cleared)
+            if culprits:
+                edit = self._best_edit(state, rules, constraints, candidates, partners, failures, culprits, deadline)
+                if edit is None:
+                    cleared[[(day - start).days for day in culprits]] = True
+                    continue
+            else:
+                edit = self._improving_edit(state, rules, constraints, candidates, partners, failures, deadline)
+                if edit is None:
+                    complete = time.perf_counter() < deadline
+                    break
+
+            state.apply_changes(edit.changes(state))
+            edits.append(edit)
+            # Days whose constraint checks read the edited days need checking again
+            ordinals = [to_ordinal(date) for date in edit.dates]
+            for index in np.flatnonzero(rules.is_constraint):
+                for low, high in rules.affected(index, ordinals):
+                    cleared[low : high + 1] = False
+        after = rules.failures(state)
+
+        return {
+            "edits": [
+                {"action": edit.kind, "date": edit.date, "other_date": edit.other_date, "recipe": edit.meal_name}
+                for edit in edits
+            ],
+            "violations_before": self._counts(rules, before),
+            "violations_after": self._counts(rules, after),
+            "remaining": [
+                {
+                    "rule_name": rule.name,
+                    "rule_type": rule.type.name,
+                    "dates": [start + timedelta(days=int(offset)) for offset in np.flatnonzero(failing)],
+                }
+                for rule, failing in zip(rules.rules, after, strict=True)
+                if failing.any()
+            ],
+            "all_constraints_met": not any(after[index].any() for index in np.flatnonzero(rules.is_constraint)),
+            "complete": complete,
+        }
+
+    def _conflicts(
+        self,
+        state: PlanState,
+        rules: _RangeRules,
+        constraints: List[Rule],
+        failures: List[np.ndarray],
+        unchecked: np.ndarray,
+        cleared: np.ndarray,
+    ) -> List[datetime]:
+        """
+        The first few planned days whose meals a constraint doesn't allow there, in date order.
+
+        Only days that failing constraint days read can hold such meals, and those are checked until
+        enough are found; days found to be fine are marked in cleared.
+        """
+        conflicts = []
+        for offset in np.flatnonzero(self._read_by_failing(rules, failures, rules.is_constraint) & unchecked):
+            day = rules.start + timedelta(days=int(offset))
+            if self._conflicting(state, constraints, day):
+                conflicts.append(day)
+                if len(conflicts) == MAX_CULPRITS:
+                    break
+            else:
+                cleared[offset] = True
+        return conflicts
+
+    def _improving_edit(
+        self,
+        state: PlanState,
+        rules: _RangeRules,
+        constraints: List[Rule],
+        candidates: CandidateSet,
+        partners: Tuple[CandidateSet, List[int]],
+        failures: List[np.ndarray],
+        deadline: float,
+    ) -> Optional[PlanEdit]:
+        """
+        An edit that leaves fewer violations without adding conflicts.
+
+        Tried first on the planned days that clearing most reduces the failing constraint days for (a rule
+        can fail on meals it would still allow one by one, e.g. repeats just over the window apart), then on
+        the planned days that failing requirements read.
+        """
+        planned = self._planned_days(state, rules)
+        blamed = []
+        for offset in np.flatnonzero(self._read_by_failing(rules, failures, rules.is_constraint) & planned):
+            day = rules.start + timedelta(days=int(offset))
+            changes = PlanEdit(CLEAR_DAY, day).changes(state)
+            state.apply_changes(changes)
+            try:
+                (before, _), (after, _) = rules.violations(state, failures, [to_ordinal(day)], constraints_only=True)
+            finally:
+                state.apply_changes(undo_changes(changes))
+            if before > after:
+                blamed.append((before - after, int(offset)))
+            if time.perf_counter() >= deadline:
+                return None
+        blamed.sort(key=lambda blame: (-blame[0], blame[1]))
+        chunks = [[offset for _, offset in blamed[:MAX_CULPRITS]]] if blamed else []
+
+        offsets = [
+            int(offset)
+            for offset in np.flatnonzero(self._read_by_failing(rules, failures, ~rules.is_constraint) & planned)
+        ]
+        self.random.shuffle(offsets)
+        chunks += [offsets[chunk : chunk + MAX_CULPRITS] for chunk in range(0, len(offsets), MAX_CULPRITS)]
+
+        for chunk in chunks:
+            days = [rules.start + timedelta(days=offset) for offset in chunk]
+            edit = self._best_edit(
+                state, rules, constraints, candidates, partners, failures, days, deadline, require_gain=True
+            )
+            if edit is not None or time.perf_counter() >= deadline:
+                return edit
+        return None
+
+    @staticmethod
+    def _read_by_failing(rules: _RangeRules, failures: List[np.ndarray], selected: np.ndarray) -> np.ndarray:
+        """Boolean array of the days in the range that the selected rules read on the days they fail."""
+        read = np.zeros(rules.days, dtype=bool)
+        for index in np.flatnonzero(selected):
+            read |= rules.read_by(index, failures[index])
+        return read
+
+    def _best_edit(
+        self,
+        state: PlanState,
+        rules: _RangeRules,
+        constraints: List[Rule],
+        candidates: CandidateSet,
+        partners: Tuple[CandidateSet, List[int]],
+        failures: List[np.ndarray],
+        days: List[datetime],
+        deadline: float,
+        require_gain: bool = False,
+    ) -> Optional[PlanEdit]:
+        """
+        The edit of one of the days that leaves fewest violations, constraints first.
+
+        Args:
+            require_gain: Only return an edit that clears violations
+
+        Returns:
+            The edit, or None if none of the days can be edited without conflicts (or with a gain)
+        """
+        best, best_gain = None, None
+        for day in days:
+            for edit in self._edits(state, rules, candidates, partners, day):
+                changes = edit.changes(state)
+                ordinals = [to_ordinal(date) for date in edit.dates]
+                state.apply_changes(changes)
+                try:
+                    # The day's new meals are allowed; for a swap, the meals moved to the other day must be too
+                    if edit.kind == SWAP_DAYS and self._conflicting(state, constraints, edit.other_date):
+                        continue
+                    # Count constraints first; requirements only matter for edits that are at least as good
+                    (before, _), (after, _) = rules.violations(state, failures, ordinals, constraints_only=True)
+                    if best_gain is not None and before - after < best_gain[0]:
+                        continue
+                    before_all, after_all = rules.violations(state, failures, ordinals)
+                finally:
+                    state.apply_changes(undo_changes(changes))
+
+                gain = (before_all[0] - after_all[0], before_all[1] - after_all[1])
+                if (best_gain is None or gain > best_gain) and (not require_gain or gain > (0, 0)):
+                    best, best_gain = edit, gain
+            if time.perf_counter() >= deadline:
+                break
+        return best
+
+    def _edits(
+        self,
+        state: PlanState,
+        rules: _RangeRules,
+        candidates: CandidateSet,
+        partners: Tuple[CandidateSet, List[int]],
+        day: datetime,
+    ) -> Iterator[PlanEdit]:
+        """Swaps of a day with the days whose meals are allowed on it, then the best recipe to substitute."""
+        partner_meals, partner_offsets = partners
+        changes = PlanEdit(CLEAR_DAY, day).changes(state)
+        state.apply_changes(changes)
+        try:
+            evaluation = self.engine.evaluate_candidates(candidates, day, state)
+            partner_evaluation = self.engine.evaluate_candidates(partner_meals, day, state)
+        finally:
+            state.apply_changes(undo_changes(changes))
+
+        # A day fits if all of its meals are allowed, and fits better the more requirements they help
+        own_offset = (day - rules.start).days
+        fits: Dict[int, Tuple[bool, int]] = {}
+        for offset, can_add, score in zip(
+            partner_offsets, partner_evaluation.can_add, partner_evaluation.scores, strict=True
+        ):
+            if offset != own_offset:
+                fit, best_score = fits.get(offset, (True, 0))
+                fits[offset] = (fit and bool(can_add), max(best_score, int(score)))
+        fitting = [(score, self.random.random(), offset) for offset, (fit, score) in fits.items() if fit]
+        fitting.sort(reverse=True)
+        for _, _, offset in fitting[:MAX_SWAP_PARTNERS]:
+            yield PlanEdit(SWAP_DAYS, day, other_date=rules.start + timedelta(days=offset))
+
+        substitute = evaluation.pick(self.random)
+        if substitute is not None:
+            meal = candidates.meals[substitute]
+            yield PlanEdit(SET_MEAL, day, meal_name=meal["name"], meal_tags=meal.get("tags", ""))
+
+    @staticmethod
+    def _partners(state: PlanState, rules: _RangeRules, planned: np.ndarray) -> Tuple[CandidateSet, List[int]]:
+        """The meals of the planned days in the range as candidates, and the day offset of each."""
+        meals, offsets = [], []
+        for offset in np.flatnonzero(planned):
+            for _, name, tags in day_rows(state, rules.start + timedelta(days=int(offset))):
+                meals.append({"name": name, "tags": tags})
+                offsets.append(int(offset))
+        return CandidateSet(meals), offsets
+
+    @staticmethod
+    def _conflicting(state: PlanState, constraints: List[Rule], day: datetime) -> bool:
+        """Whether a constraint doesn't allow one of the meals of a day next to the rest of the plan."""
+        rows = day_rows(state, day)
+        if not rows:
+            return False
+        changes = [(row, None) for row in rows]
+        state.apply_changes(changes)
+        try:
+            return any(
+                not rule.can_add_meal(name, tags.split(",") if tags else [], day, state)[0]
+                for _, name, tags in rows
+                for rule in constraints
+            )
+        finally:
+            state.apply_changes(undo_changes(changes))
+
+    @staticmethod
+    def _planned_days(state: PlanState, rules: _RangeRules) -> np.ndarray:
+        """Boolean array of the days in the range that have meals."""
+        planned = np.zeros(rules.days, dtype=bool)
+        planned[np.unique(state.between(rules.first, rules.first + rules.days - 1).ordinals) - rules.first] = True
+        return planned
+
+    @staticmethod
+    def _counts(rules: _RangeRules, failures: List[np.ndarray]) -> Dict[str, int]:
+        failing = np.array([int(day_failures.sum()) for day_failures in failures], dtype=np.int64)
+        return {
+            "constraints": int(failing[rules.is_constraint].sum()),
+            "requirements": int(failing[~rules.is_constraint].sum()),
+        }
@@ -7,12 +7,33 @@ This module defines:
 3. Functions to consider rules when suggesting new meals
 """
 
-from collections import defaultdict
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from enum import Enum, auto
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from gusto2.rules.candidates import CandidateSet, CandidateVerdicts
+from gusto2.rules.eligibility import NEVER, days_since
+from gusto2.rules.parallel import ParallelRuleRunner
+from gusto2.rules.snapshot import (
+    SKIP_VALIDATION_TAG,
+    PlanLike,
+    PlanSnapshot,
+    as_plan,
+    format_ordinal,
+    iso_calendar,
+    months,
+    to_ordinal,
+)
+from gusto2.rules.trace import ValidationTrace, record
 
-import pandas as pd
+logger = logging.getLogger(__name__)
 
 
 class RuleType(Enum):
@@ -27,6 +48,7 @@ class RuleScope(Enum):
 
     DAY = auto()
     WEEK = auto()
+    MONTH = auto()
     SLIDING_WINDOW = auto()  # For rules like "don't repeat within 3 weeks"
 
 
@@ -40,12 +62,12 @@ class Rule:
         self.scope = scope
         self.enabled = enabled
 
-    def validate(self, meals_df: pd.DataFrame, date: Optional[datetime] = None) -> Tuple[bool, str]:
+    def validate(self, meals_df: PlanLike, date: Optional[datetime] = None) -> Tuple[bool, str]:
         """
         Validate the rule against a meal plan.
 
         Args:
-            meals_df: DataFrame containing meal plans
+            meals_df: DataFrame containing meal plans, or a PlanSnapshot/PlanState of it
             date: Optional date to focus validation around
 
         Returns:
@@ -53,8 +75,39 @@ class Rule:
         """
         raise NotImplementedError("Subclasses must implement validate()")
 
+    def validate_days(self, meals_df: PlanLike, start: datetime, end: datetime) -> np.ndarray:
+        """
+        Validate the rule around every day from start to end (inclusive) at once.
+
+        Rules should override this with a vectorized implementation; the default falls back to calling
+        validate() for every day.
+
+        Args:
+            meals_df: Existing meal plan dataframe, PlanSnapshot or PlanState
+            start: First day
+            end: Last day
+
+        Returns:
+            Boolean array with, for every day, the is_valid result of validate() around that day
+        """
+        plan = as_plan(meals_df)
+        days = (end - start).days + 1
+        return np.fromiter((self.validate(plan, start + timedelta(days=i))[0] for i in range(days)), bool, days)
+
+    def date_span(self, date: datetime) -> Optional[Tuple[int, int]]:
+        """
+        Dates that validate() reads when validating around a date.
+
+        Args:
+            date: Date to validate around
+
+        Returns:
+            Tuple of (first, last) date ordinals (inclusive), or None if the rule needs the whole plan
+        """
+        return None
+
     def can_add_meal(
-        self, meal_name: str, meal_tags: List[str], date: datetime, meals_df: pd.DataFrame
+        self, meal_name: str, meal_tags: List[str], date: datetime, meals_df: PlanLike
     ) -> Tuple[bool, str]:
         """
         Check if adding a specific meal on a date would violate this rule.
@@ -63,13 +116,37 @@ class Rule:
             meal_name: Name of the meal to add
             meal_tags: Tags associated with the meal
             date: Date to add the meal
-            meals_df: Existing meal plan dataframe
+            meals_df: Existing meal plan dataframe, PlanSnapshot or PlanState
 
         Returns:
             Tuple of (can_add, reason)
         """
         raise NotImplementedError("Subclasses must implement can_add_meal()")
 
+    def evaluate_candidates(self, candidates: CandidateSet, date: datetime, meals_df: PlanLike) -> CandidateVerdicts:
+        """
+        Check all candidate meals for a date at once.
+
+        Rules should override this with a vectorized implementation; the default falls back to calling
+        can_add_meal() for every candidate.
+
+        Args:
+            candidates: Parsed candidate meals
+            date: Date to add the meal
+            meals_df: Existing meal plan dataframe, PlanSnapshot or PlanState
+
+        Returns:
+            CandidateVerdicts with per-candidate results
+        """
+        plan = as_plan(meals_df)
+        outcomes = [
+            self.can_add_meal(meal_name, meal_tags, date, plan)
+            for meal_name, meal_tags in zip(candidates.names, candidates.tag_lists, strict=True)
+        ]
+        can_add = np.array([can_add for can_add, _ in outcomes], dtype=bool)
+        helps = np.array(["helps meet" in reason for _, reason in outcomes], dtype=bool)
+        return CandidateVerdicts(can_add, helps, lambda i: outcomes[i][1])
+
 
 class NoRepeatInWindowRule(Rule):
     """Don't repeat the same meal within a sliding window of days."""
@@ -78,82 +155,50 @@ class NoRepeatInWindowRule(Rule):
         super().__init__(name=name, description=description, type=RuleType.CONSTRAINT, scope=RuleScope.SLIDING_WINDOW)
         self.window_days = window_days
 
-    def validate(self, meals_df: pd.DataFrame, date: Optional[datetime] = None) -> Tuple[bool, str]:
+    def date_span(self, date: datetime) -> Optional[Tuple[int, int]]:
+        target = to_ordinal(date)
+        return target - self.window_days, target + self.window_days
+
+    def validate(self, meals_df: PlanLike, date: Optional[datetime] = None) -> Tuple[bool, str]:
         """Check if any meals are repeated within the window."""
-        if meals_df.empty:
+        plan = as_plan(meals_df)
+        if plan.is_empty:
             return True, "No meals to validate"
 
-        # Ensure tags are case insensitive by converting to lowercase
-        if "Tags" in meals_df.columns:
-            meals_df = meals_df.copy()
-            meals_df["Tags"] = meals_df["Tags"].str.lower()
-
-        # Helper to check if a meal should be excluded
-        def has_skip_validation(tags):
-            if pd.isna(tags):
-                return False
-            return any(tag.strip() == "skip-validation" for tag in tags.split(","))
-
-        # If no date specified, check the entire dataframe
+        # If no date specified, check the entire plan
         if date is None:
-            meal_occurrences = defaultdict(list)
-
-            # Ensure the Date column is in datetime format
-            meals_df = meals_df.copy()
-            meals_df["Date"] = pd.to_datetime(meals_df["Date"])
-
-            # Sort by date
-            meals_df = meals_df.sort_values("Date")
-
-            # Check each meal
-            for _, row in meals_df.iterrows():
-                if pd.isna(row["Name"]) or pd.isna(row["Date"]):
-                    continue
-                if has_skip_validation(row.get("Tags", "")):
-                    continue
-                meal_name = row["Name"]
-                meal_date = row["Date"]
-
-                # Check this meal against previous occurrences
-                for prev_date in meal_occurrences[meal_name]:
-                    days_diff = (meal_date - prev_date).days
-
-                    if 0 < days_diff <= self.window_days:
-                        # Find all occurrences of this meal within the window
-                        all_dates = [
-                            d.strftime("%Y-%m-%d")
-                            for d in meal_occurrences[meal_name]
-                            if 0 <= (meal_date - d).days <= self.window_days
-                        ]
-                        return (
-                            False,
-                            f"'{meal_name}' repeats on dates: {', '.join(all_dates)}, which includes repeats within {self.window_days} days",
-                        )
-
-                # Add this occurrence
-                meal_occurrences[meal_name].append(meal_date)
+            snapshot = plan.snapshot()
+            record("rows_scanned", len(snapshot))
+            repeats = self._find_repeats(snapshot)
+            if repeats:
+                repeat_details = [
+                    f"'{meal_name}' repeats on dates: {', '.join(format_ordinal(d) for d in meal_dates)}"
+                    for meal_name, meal_dates in repeats
+                ]
+                return (
+                    False,
+                    f"{'; '.join(repeat_details)}, which includes repeats within {self.window_days} days",
+                )
 
             return True, "No meals repeat within the sliding window"
         else:
             # For a specific date, check just the window around it
-            start_date = date - timedelta(days=self.window_days)
-            end_date = date + timedelta(days=self.window_days)
+            target = to_ordinal(date)
+            window = plan.between(target - self.window_days, target + self.window_days)
+            record("windows_evaluated")
 
-            # Ensure the Date column is in datetime format
-            meals_df = meals_df.copy()
-            meals_df["Date"] = pd.to_datetime(meals_df["Date"])
+            # Exclude meals with 'skip-validation' tag and rows without a name
+            checked = ~window.skip_mask & (window.recipe_ids >= 0)
+            recipe_ids = window.recipe_ids[checked]
+            meal_dates = window.ordinals[checked]
 
-            # Filter to the relevant date range and exclude meals with 'skip-validation' tag
-            window_meals = meals_df[(meals_df["Date"] >= start_date) & (meals_df["Date"] <= end_date)]
-            window_meals = window_meals[~window_meals["Tags"].apply(has_skip_validation)]
-
-            # Find repeating meals with their dates
+            # Find repeating meals, most frequent first (ties in order of first appearance)
+            unique_ids, first_index, counts = np.unique(recipe_ids, return_index=True, return_counts=True)
             repeat_details = []
-            for meal_name, count in window_meals["Name"].value_counts().items():
-                if count > 1:
-                    # Get all dates this meal appears on
-                    meal_dates = window_meals[window_meals["Name"] == meal_name]["Date"]
-                    formatted_dates = [d.strftime("%Y-%m-%d") for d in meal_dates]
+            for i in np.lexsort((first_index, -counts)):
+                if counts[i] > 1:
+                    meal_name = window.names[checked][first_index[i]]
+                    formatted_dates = [format_ordinal(d) for d in meal_dates[recipe_ids == unique_ids[i]]]
                     repeat_details.append(f"'{meal_name}' on dates: {', '.join(formatted_dates)}")
 
             if repeat_details:
@@ -164,53 +209,157 @@ class NoRepeatInWindowRule(Rule):
 
             return True, "No meals repeat within the sliding window around the specified date"
 
+    def validate_days(self, meals_df: PlanLike, start: datetime, end: datetime) -> np.ndarray:
+        """A day is invalid if two occurrences of a meal lie within the window around it."""
+        plan = as_plan(meals_df)
+        first, last = to_ordinal(start), to_ordinal(end)
+        if plan.is_empty:
+            return np.ones(last - first + 1, dtype=bool)
+
+        rows = plan.between(first - self.window_days, last + self.window_days)
+        checked = ~rows.skip_mask & (rows.recipe_ids >= 0)
+        recipe_ids = rows.recipe_ids[checked]
+        meal_dates = rows.ordinals[checked]
+        order = np.lexsort((meal_dates, recipe_ids))
+        recipe_ids, meal_dates = recipe_ids[order], meal_dates[order]
+
+        # Consecutive occurrences d1 <= d2 of a meal both fall in the window around days d2 - window to d1 + window
+        pairs = (recipe_ids[1:] == recipe_ids[:-1]) & (np.diff(meal_dates) <= 2 * self.window_days)
+        lo = np.clip(meal_dates[1:][pairs] - self.window_days - first, 0, last - first + 1)
+        hi = np.clip(meal_dates[:-1][pairs] + self.window_days - first + 1, 0, last - first + 1)
+        coverage = np.zeros(last - first + 2, dtype=np.int64)
+        np.add.at(coverage, lo, 1)
+        np.add.at(coverage, hi, -1)
+        return np.cumsum(coverage[:-1]) == 0
+
+    def _find_repeats(self, plan: PlanSnapshot) -> List[Tuple[str, np.ndarray]]:
+        """
+        Find every meal that is planned again within the window anywhere in the plan.
+
+        Occurrences are sorted by (recipe, date) once, so a meal repeats iff two consecutive occurrences are
+        between 1 and window_days apart; the occurrences involved are found with a binary search.
+
+        Returns:
+            List of (meal name, sorted unique date ordinals involved in repeats), ordered by first repeat
+        """
+        # Meals with the 'skip-validation' tag and rows without a name are excluded
+        checked = ~plan.skip_mask & (plan.recipe_ids >= 0)
+        recipe_ids = plan.recipe_ids[checked]
+        meal_dates = plan.ordinals[checked]
+        names = plan.names[checked]
+
+        order = np.lexsort((meal_dates, recipe_ids))
+        recipe_ids, meal_dates, names = recipe_ids[order], meal_dates[order], names[order]
+
+        gaps = np.diff(meal_dates)
+        repeated = np.flatnonzero((recipe_ids[1:] == recipe_ids[:-1]) & (gaps > 0) & (gaps <= self.window_days)) + 1
+        if len(repeated) == 0:
+            return []
+
+        # Mark the repeated occurrence plus every earlier occurrence of the same meal within the window
+        keys = recipe_ids * (int(meal_dates.max()) + self.window_days + 1) + meal_dates
+        first_involved = np.searchsorted(keys, keys[repeated] - self.window_days, side="left")
+        coverage = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.add.at(coverage, first_involved, 1)
+        np.add.at(coverage, repeated + 1, -1)
+        involved = np.cumsum(coverage[:-1]) > 0
+
+        # Report meals in order of the date of their first repeat
+        first_repeat = {}
+        for i in repeated[np.argsort(meal_dates[repeated], kind="stable")]:
+            first_repeat.setdefault(recipe_ids[i], i)
+
+        # Occurrences of one meal are contiguous after sorting
+        starts = np.searchsorted(recipe_ids, list(first_repeat), side="left")
+        ends = np.searchsorted(recipe_ids, list(first_repeat), side="right")
+        return [
+            (names[start], np.unique(meal_dates[start:end][involved[start:end]]))
+            for start, end in zip(starts, ends, strict=True)
+        ]
+
     def can_add_meal(
-        self, meal_name: str, meal_tags: List[str], date: datetime, meals_df: pd.DataFrame
+        self, meal_name: str, meal_tags: List[str], date: datetime, meals_df: PlanLike
     ) -> Tuple[bool, str]:
         """Check if adding this meal would violate the no-repeat rule."""
-        if meals_df.empty:
+        plan = as_plan(meals_df)
+        if plan.is_empty:
             return True, "No existing meals to check against"
 
         # Convert tags to lowercase
         meal_tags = [tag.lower() for tag in meal_tags] if meal_tags else []
         # If this meal has the skip-validation rule tag, skip the check
-        if "skip-validation" in [tag.strip() for tag in meal_tags]:
+        if SKIP_VALIDATION_TAG in [tag.strip() for tag in meal_tags]:
             return True, "Meal has 'skip-validation' tag, skipping repeat check"
 
-        # Ensure the Date column is in datetime format
-        meals_df = meals_df.copy()
-        meals_df["Date"] = pd.to_datetime(meals_df["Date"])
-
-        # Make a copy to avoid modifying the original dataframe
-        if "Tags" in meals_df.columns:
-            meals_df["Tags"] = meals_df["Tags"].str.lower()
-
-        # Helper to check if a meal should be excluded
-        def has_skip_validation(tags):
-            if pd.isna(tags):
-                return False
-            return any(tag.strip() == "skip-validation" for tag in tags.split(","))
-
-        # Get the window bounds
-        start_date = date - timedelta(days=self.window_days)
-        end_date = date + timedelta(days=self.window_days)
-
-        # Filter to the relevant date range and exclude meals with 'skip-validation rule' tag
-        window_meals = meals_df[
-            (meals_df["Date"] >= start_date) & (meals_df["Date"] <= end_date) & (meals_df["Name"] == meal_name)
-        ]
-        window_meals = window_meals[~window_meals["Tags"].apply(has_skip_validation)]
+        # Filter to the window around the date, excluding meals with the 'skip-validation' tag
+        target = to_ordinal(date)
+        window = plan.between(target - self.window_days, target + self.window_days)
+        occurrences = window.ordinals[(window.names == meal_name) & ~window.skip_mask]
 
-        if not window_meals.empty:
-            first_occurrence = window_meals.iloc[0]
-            days_diff = abs((date - pd.to_datetime(first_occurrence["Date"])).days)
+        if len(occurrences):
+            first_occurrence = int(occurrences[0])
+            days_diff = abs(target - first_occurrence)
             return (
                 False,
-                f"'{meal_name}' already planned on {first_occurrence['Date'].strftime('%Y-%m-%d')}, which is only {days_diff} days away (window is {self.window_days} days)",
+                f"'{meal_name}' already planned on {format_ordinal(first_occurrence)}, which is only {days_diff} days "
+                f"away (window is {self.window_days} days)",
             )
 
         return True, "Meal can be added without violating the sliding window constraint"
 
+    def evaluate_candidates(self, candidates: CandidateSet, date: datetime, meals_df: PlanLike) -> CandidateVerdicts:
+        """Block every candidate that is already planned (without 'skip-validation') inside the window."""
+        plan = as_plan(meals_df)
+        if plan.is_empty:
+            return CandidateVerdicts.uniform(len(candidates), True, "No existing meals to check against")
+
+        target = to_ordinal(date)
+        first_planned: Dict[str, int] = {}
+        matrix = plan.eligibility(candidates, self.window_days, target)
+        if matrix is not None:
+            # Maintained by the plan, so the window only needs scanning to explain blocked meals
+            blocked = matrix.blocked(target) & ~candidates.skip_mask
+            days_since_served = matrix.days_since_last_planned(target)
+        else:
+            first_planned = self._first_planned(plan, target)
+            blocked = np.fromiter((name in first_planned for name in candidates.names), bool, len(candidates))
+            blocked &= ~candidates.skip_mask
+            days_since_served = days_since(self._last_planned(plan, candidates), target)
+
+        def reason(i: int) -> str:
+            if candidates.skip_mask[i]:
+                return "Meal has 'skip-validation' tag, skipping repeat check"
+            if blocked[i]:
+                meal_name = candidates.names[i]
+                if not first_planned:
+                    first_planned.update(self._first_planned(plan, target))
+                first_occurrence = first_planned[meal_name]
+                return (
+                    f"'{meal_name}' already planned on {format_ordinal(first_occurrence)}, which is only "
+                    f"{abs(target - first_occurrence)} days away (window is {self.window_days} days)"
+                )
+            return "Meal can be added without violating the sliding window constraint"
+
+        return CandidateVerdicts(~blocked, np.zeros(len(candidates), dtype=bool), reason, days_since_served)
+
+    @staticmethod
+    def _last_planned(plan: PlanLike, candidates: CandidateSet) -> np.ndarray:
+        """Last date each candidate is planned (NEVER if it isn't), like EligibilityMatrix.last_planned."""
+        snapshot = plan.snapshot()
+        # Rows are sorted by date, so the last occurrence of a name wins
+        last_planned = dict(zip(snapshot.names.tolist(), snapshot.ordinals.tolist(), strict=True))
+        return np.fromiter((last_planned.get(name, NEVER) for name in candidates.names), np.int64, len(candidates))
+
+    def _first_planned(self, plan: PlanLike, target: int) -> Dict[str, int]:
+        """First date of every meal planned (without 'skip-validation') inside the window around a date."""
+        window = plan.between(target - self.window_days, target + self.window_days)
+        first_planned = {}
+        for meal_name, meal_date in zip(
+            window.names[~window.skip_mask], window.ordinals[~window.skip_mask], strict=True
+        ):
+            first_planned.setdefault(meal_name, int(meal_date))
+        return first_planned
+
 
 class WeeklyRequirementRule(Rule):
     """Require a specific tag to appear a minimum number of times in a week."""
@@ -221,54 +370,35 @@ class WeeklyRequirementRule(Rule):
         self.tag = tag.lower()
         self.occurrences = occurrences
 
-    def validate(self, meals_df: pd.DataFrame, date: Optional[datetime] = None) -> Tuple[bool, str]:
+    def _match_tags(self) -> Tuple[str, ...]:
+        """Tags of which a meal needs at least one to count towards the requirement."""
+        return (self.tag,)
+
+    def date_span(self, date: datetime) -> Optional[Tuple[int, int]]:
+        # The week number of the date counts in every year, so any date of the plan can matter
+        return None
+
+    def validate(self, meals_df: PlanLike, date: Optional[datetime] = None) -> Tuple[bool, str]:
         """Check if the tag appears the required number of times in the week."""
-        if meals_df.empty:
+        plan = as_plan(meals_df)
+        if plan.is_empty:
             return False, f"No meals to validate for {self.tag} requirement"
 
-        # Ensure the Date column is in datetime format
-        meals_df = meals_df.copy()
-        meals_df["Date"] = pd.to_datetime(meals_df["Date"])
-
-        # If no date specified, group by ISO week and check each week
+        # If no date specified, check each ISO week (Monday-based)
         if date is None:
-            # Group by ISO week (Monday-based)
-            meals_df["Week"] = meals_df["Date"].dt.isocalendar().week
-            meals_df["Year"] = meals_df["Date"].dt.isocalendar().year
-
-            # Each (year, week) tuple is a complete Monday-Sunday week
-            weeks = meals_df.groupby(["Year", "Week"])
-
-            for (year, week), week_meals in weeks:
-                # Count meals with the required tag
-                tag_count = 0
-                for _, row in week_meals.iterrows():
-                    if pd.notna(row["Tags"]):
-                        meal_tags = [t.strip().lower() for t in row["Tags"].split(",")]
-                        if self.tag in meal_tags:
-                            tag_count += 1
-
-                if tag_count < self.occurrences:
-                    # Get Monday's date for this week
-                    monday_date = week_meals["Date"].min().strftime("%Y-%m-%d")
-                    return (
-                        False,
-                        f"Week starting {monday_date} has only {tag_count} meals with tag '{self.tag}', but {self.occurrences} are required",
-                    )
+            short_week = plan.first_short_week(self._match_tags(), self.occurrences)
+            if short_week is not None:
+                monday_ordinal, tag_count = short_week
+                return (
+                    False,
+                    f"Week starting {format_ordinal(monday_ordinal)} has only {tag_count} meals with tag '{self.tag}', "
+                    f"but {self.occurrences} are required",
+                )
 
             return True, f"All weeks have at least {self.occurrences} meals with tag '{self.tag}'"
         else:
             # For a specific date, check just that ISO week (Monday-Sunday)
-            iso_calendar = date.isocalendar()
-            week_meals = meals_df[meals_df["Date"].dt.isocalendar().week == iso_calendar.week]
-
-            # Count meals with the required tag
-            tag_count = 0
-            for _, row in week_meals.iterrows():
-                if pd.notna(row["Tags"]):
-                    meal_tags = [t.strip().lower() for t in row["Tags"].split(",")]
-                    if self.tag in meal_tags:
-                        tag_count += 1
+            tag_count = plan.week_number_count(self._match_tags(), date.isocalendar().week)
 
             if tag_count < self.occurrences:
                 # Get Monday's date for this week
@@ -280,8 +410,22 @@ class WeeklyRequirementRule(Rule):
 
             return True, f"Week has at least {self.occurrences} meals with tag '{self.tag}'"
 
+    def validate_days(self, meals_df: PlanLike, start: datetime, end: datetime) -> np.ndarray:
+        """Count the tagged meals of every ISO week number in the range once, and spread the result over its days."""
+        plan = as_plan(meals_df)
+        first, last = to_ordinal(start), to_ordinal(end)
+        if plan.is_empty:
+            return np.zeros(last - first + 1, dtype=bool)
+
+        _, weeks = iso_calendar(np.arange(first, last + 1))
+        is_met = {
+            week: plan.week_number_count(self._match_tags(), week) >= self.occurrences
+            for week in np.unique(weeks).tolist()
+        }
+        return np.fromiter((is_met[week] for week in weeks.tolist()), bool, len(weeks))
+
     def can_add_meal(
-        self, meal_name: str, meal_tags: List[str], date: datetime, meals_df: pd.DataFrame
+        self, meal_name: str, meal_tags: List[str], date: datetime, meals_df: PlanLike
     ) -> Tuple[bool, str]:
         """
         Check how adding this meal affects the weekly requirement.
@@ -292,42 +436,43 @@ class WeeklyRequirementRule(Rule):
         # But we'll check if it helps meet the requirement
 
         meal_tags = [t.lower() for t in meal_tags] if meal_tags else []
+        has_required_tag = any(tag in meal_tags for tag in self._match_tags())
 
-        if not meal_tags:
-            return True, f"Meal doesn't have the '{self.tag}' tag, so doesn't help meet the weekly requirement"
+        if not has_required_tag:
+            return True, self._contribution(False, 0)
 
-        has_required_tag = self.tag in meal_tags
+        # Count existing meals with the required tag in the ISO week for this date (Monday-based)
+        plan = as_plan(meals_df)
+        tag_count = plan.week_number_count(self._match_tags(), date.isocalendar().week)
 
-        if not has_required_tag:
-            return True, f"Meal doesn't have the '{self.tag}' tag, so doesn't help meet the weekly requirement"
+        return True, self._contribution(True, tag_count)
+
+    def evaluate_candidates(self, candidates: CandidateSet, date: datetime, meals_df: PlanLike) -> CandidateVerdicts:
+        """Count the week's tagged meals once and mark the candidates that would help meet the requirement."""
+        plan = as_plan(meals_df)
+        tag_count = plan.week_number_count(self._match_tags(), date.isocalendar().week)
 
-        # Ensure the Date column is in datetime format
-        meals_df = meals_df.copy()
-        meals_df["Date"] = pd.to_datetime(meals_df["Date"])
+        has_required_tag = candidates.tag_mask(self._match_tags())
+        helps = has_required_tag & (tag_count < self.occurrences)
 
-        # Get the ISO week for this date (Monday-based)
-        iso_calendar = date.isocalendar()
-        week_meals = meals_df[meals_df["Date"].dt.isocalendar().week == iso_calendar.week]
+        return CandidateVerdicts(
+            np.ones(len(candidates), dtype=bool),
+            helps,
+            lambda i: self._contribution(bool(has_required_tag[i]), tag_count),
+        )
 
-        # Count existing meals with the required tag
-        tag_count = 0
-        for _, row in week_meals.iterrows():
-            if pd.notna(row["Tags"]):
-                week_meal_tags = [t.strip().lower() for t in row["Tags"].split(",")]
-                if self.tag in week_meal_tags:
-                    tag_count += 1
+    def _contribution(self, has_required_tag: bool, tag_count: int) -> str:
+        """Describe how a meal contributes to the requirement, given the week's current tag count."""
+        if not has_required_tag:
+            return f"Meal doesn't have the '{self.tag}' tag, so doesn't help meet the weekly requirement"
 
         if tag_count >= self.occurrences:
-            return (
-                True,
-                f"Weekly requirement for '{self.tag}' ({self.occurrences} meals) already met ({tag_count} meals)",
-            )
-        else:
-            # This meal would help meet the requirement
-            return (
-                True,
-                f"Adding this meal helps meet the weekly requirement for '{self.tag}' ({tag_count + 1}/{self.occurrences})",
-            )
+            return f"Weekly requirement for '{self.tag}' ({self.occurrences} meals) already met ({tag_count} meals)"
+
+        # This meal would help meet the requirement
+        return (
+            f"Adding this meal helps meet the weekly requirement for '{self.tag}' ({tag_count + 1}/{self.occurrences})"
+        )
 
 
 class SpecificDayRequirementRule(Rule):
@@ -339,40 +484,26 @@ class SpecificDayRequirementRule(Rule):
         # Store tag in lowercase to ensure case-insensitive comparison
         self.tag = tag.lower()
 
-    def validate(self, meals_df: pd.DataFrame, date: Optional[datetime] = None) -> Tuple[bool, str]:
+    def date_span(self, date: datetime) -> Optional[Tuple[int, int]]:
+        return to_ordinal(date), to_ordinal(date)
+
+    def validate(self, meals_df: PlanLike, date: Optional[datetime] = None) -> Tuple[bool, str]:
         """Check if the specified day has a meal with the required tag."""
-        if meals_df.empty:
+        plan = as_plan(meals_df)
+        if plan.is_empty:
             return False, f"No meals to validate for {self.tag} on {self._day_name()} requirement"
 
-        # Ensure the Date column is in datetime format
-        meals_df = meals_df.copy()
-        meals_df["Date"] = pd.to_datetime(meals_df["Date"])
-
         # If no date specified, check all instances of the specified day
         if date is None:
-            # Filter to the relevant day of week
-            day_meals = meals_df[meals_df["Date"].dt.weekday == self.day_of_week]
+            # Check every instance of the day, grouped by ISO week
+            has_instances, missing_ordinal = plan.weekday_instances(self.day_of_week, self.tag)
 
-            if day_meals.empty:
+            if not has_instances:
                 return False, f"No meals found for {self._day_name()}"
 
-            # Group by week
-            day_meals["Week"] = day_meals["Date"].dt.isocalendar().week
-            day_meals["Year"] = day_meals["Date"].dt.isocalendar().year
-
-            # Check each instance of the day
-            for (year, week), day_instance in day_meals.groupby(["Year", "Week"]):
-                has_tag = False
-                for _, row in day_instance.iterrows():
-                    if pd.notna(row["Tags"]):
-                        meal_tags = [t.strip().lower() for t in row["Tags"].split(",")]
-                        if self.tag in meal_tags:
-                            has_tag = True
-                            break
-
-                if not has_tag:
-                    instance_date = day_instance.iloc[0]["Date"].strftime("%Y-%m-%d")
-                    return False, f"{self._day_name()} on {instance_date} doesn't have a meal with tag '{self.tag}'"
+            if missing_ordinal is not None:
+                instance_date = format_ordinal(missing_ordinal)
+                return False, f"{self._day_name()} on {instance_date} doesn't have a meal with tag '{self.tag}'"
 
             return True, f"All {self._day_name()}s have a meal with tag '{self.tag}'"
         else:
@@ -381,20 +512,13 @@ class SpecificDayRequirementRule(Rule):
                 return True, f"Date {date.strftime('%Y-%m-%d')} is not a {self._day_name()}, so this rule doesn't apply"
 
             # Filter to just this date
-            day_meal = meals_df[meals_df["Date"] == date]
+            target = to_ordinal(date)
+            day_meal = plan.between(target, target)
 
-            if day_meal.empty:
+            if len(day_meal) == 0:
                 return False, f"No meal found for {date.strftime('%Y-%m-%d')}"
 
-            has_tag = False
-            for _, row in day_meal.iterrows():
-                if pd.notna(row["Tags"]):
-                    meal_tags = [t.strip().lower() for t in row["Tags"].split(",")]
-                    if self.tag in meal_tags:
-                        has_tag = True
-                        break
-
-            if not has_tag:
+            if not day_meal.tag_mask((self.tag,)).any():
                 return (
                     False,
                     f"{self._day_name()} on {date.strftime('%Y-%m-%d')} doesn't have a meal with tag '{self.tag}'",
@@ -402,8 +526,18 @@ class SpecificDayRequirementRule(Rule):
 
             return True, f"{self._day_name()} has a meal with tag '{self.tag}'"
 
+    def validate_days(self, meals_df: PlanLike, start: datetime, end: datetime) -> np.ndarray:
+        """Days other than the required weekday are valid; those need a meal with the tag."""
+        plan = as_plan(meals_df)
+        first, last = to_ordinal(start), to_ordinal(end)
+        if plan.is_empty:
+            return np.zeros(last - first + 1, dtype=bool)
+
+        weekdays = (np.arange(first, last + 1) - 1) % 7  # Ordinal 1 (0001-01-01) is a Monday
+        return (weekdays != self.day_of_week) | (plan.daily_counts((self.tag,), first, last) > 0)
+
     def can_add_meal(
-        self, meal_name: str, meal_tags: List[str], date: datetime, meals_df: pd.DataFrame
+        self, meal_name: str, meal_tags: List[str], date: datetime, meals_df: PlanLike
     ) -> Tuple[bool, str]:
         """
         Check if adding this meal would help meet the day-specific requirement.
@@ -423,6 +557,22 @@ class SpecificDayRequirementRule(Rule):
         else:
             return True, f"Meal doesn't have the '{self.tag}' tag, which is recommended for {self._day_name()}"
 
+    def evaluate_candidates(self, candidates: CandidateSet, date: datetime, meals_df: PlanLike) -> CandidateVerdicts:
+        """Report which candidates carry the tag required for this day."""
+        if date.weekday() != self.day_of_week:
+            return CandidateVerdicts.uniform(
+                len(candidates), True, f"Date is not a {self._day_name()}, so rule for '{self.tag}' doesn't apply"
+            )
+
+        has_required_tag = candidates.tag_mask((self.tag,))
+
+        def reason(i: int) -> str:
+            if has_required_tag[i]:
+                return f"Meal has the '{self.tag}' tag, which is required for {self._day_name()}"
+            return f"Meal doesn't have the '{self.tag}' tag, which is recommended for {self._day_name()}"
+
+        return CandidateVerdicts(np.ones(len(candidates), dtype=bool), np.zeros(len(candidates), dtype=bool), reason)
+
     def _day_name(self) -> str:
         """Get the name of the day of week."""
         days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
@@ -437,54 +587,30 @@ class MultiTagWeeklyRequirementRule(WeeklyRequirementRule):
         super().__init__(name=name, description=description, tag=tags[0], occurrences=occurrences)
         self.tags = [t.lower() for t in tags]  # Store all tags in lowercase
 
-    def validate(self, meals_df: pd.DataFrame, date: Optional[datetime] = None) -> Tuple[bool, str]:
+    def _match_tags(self) -> Tuple[str, ...]:
+        return tuple(self.tags)
+
+    def validate(self, meals_df: PlanLike, date: Optional[datetime] = None) -> Tuple[bool, str]:
         """Check if any of the tags appears the required number of times in the week."""
-        if meals_df.empty:
+        plan = as_plan(meals_df)
+        if plan.is_empty:
             return False, f"No meals to validate for {' or '.join(self.tags)} requirement"
 
-        # Ensure the Date column is in datetime format
-        meals_df = meals_df.copy()
-        meals_df["Date"] = pd.to_datetime(meals_df["Date"])
-
-        # If no date specified, group by ISO week and check each week
+        # If no date specified, check each ISO week (Monday-based)
         if date is None:
-            # Group by ISO week (Monday-based)
-            meals_df["Week"] = meals_df["Date"].dt.isocalendar().week
-            meals_df["Year"] = meals_df["Date"].dt.isocalendar().year
-
-            # Each (year, week) tuple is a complete Monday-Sunday week
-            weeks = meals_df.groupby(["Year", "Week"])
-
-            for (year, week), week_meals in weeks:
-                # Count meals with any of the required tags
-                tag_count = 0
-                for _, row in week_meals.iterrows():
-                    if pd.notna(row["Tags"]):
-                        meal_tags = [t.strip().lower() for t in row["Tags"].split(",")]
-                        if any(tag in meal_tags for tag in self.tags):
-                            tag_count += 1
-
-                if tag_count < self.occurrences:
-                    # Get Monday's date for this week
-                    monday_date = week_meals["Date"].min().strftime("%Y-%m-%d")
-                    return (
-                        False,
-                        f"Week starting {monday_date} has only {tag_count} meals with tags '{' or '.join(self.tags)}', but {self.occurrences} are required",
-                    )
+            short_week = plan.first_short_week(self._match_tags(), self.occurrences)
+            if short_week is not None:
+                monday_ordinal, tag_count = short_week
+                return (
+                    False,
+                    f"Week starting {format_ordinal(monday_ordinal)} has only {tag_count} meals with tags "
+                    f"'{' or '.join(self.tags)}', but {self.occurrences} are required",
+                )
 
             return True, f"All weeks have at least {self.occurrences} meals with tags '{' or '.join(self.tags)}'"
         else:
             # For a specific date, check just that ISO week (Monday-Sunday)
-            iso_calendar = date.isocalendar()
-            week_meals = meals_df[meals_df["Date"].dt.isocalendar().week == iso_calendar.week]
-
-            # Count meals with any of the required tags
-            tag_count = 0
-            for _, row in week_meals.iterrows():
-                if pd.notna(row["Tags"]):
-                    meal_tags = [t.strip().lower() for t in row["Tags"].split(",")]
-                    if any(tag in meal_tags for tag in self.tags):
-                        tag_count += 1
+            tag_count = plan.week_number_count(self._match_tags(), date.isocalendar().week)
 
             if tag_count < self.occurrences:
                 # Get Monday's date for this week
@@ -496,71 +622,588 @@ class MultiTagWeeklyRequirementRule(WeeklyRequirementRule):
 
             return True, f"Week has at least {self.occurrences} meals with tags '{' or '.join(self.tags)}'"
 
+    def _contribution(self, has_required_tag: bool, tag_count: int) -> str:
+        if not has_required_tag:
+            return (
+                f"Meal doesn't have any of the required tags ({' or '.join(self.tags)}), so doesn't help meet the "
+                "weekly requirement"
+            )
+
+        if tag_count >= self.occurrences:
+            return (
+                f"Weekly requirement for {' or '.join(self.tags)} ({self.occurrences} meals) "
+                f"already met ({tag_count} meals)"
+            )
+
+        # This meal would help meet the requirement
+        return (
+            f"Adding this meal helps meet the weekly requirement for {' or '.join(self.tags)} "
+            f"({tag_count + 1}/{self.occurrences})"
+        )
+
+
+class MonthlyRequirementRule(Rule):
+    """Require a specific tag to appear a minimum number of times in a calendar month."""
+
+    def __init__(self, name: str, description: str, tag: str, occurrences: int):
+        super().__init__(name=name, description=description, type=RuleType.REQUIREMENT, scope=RuleScope.MONTH)
+        # Store tag in lowercase to ensure case-insensitive comparison
+        self.tag = tag.lower()
+        self.occurrences = occurrences
+
+    def date_span(self, date: datetime) -> Optional[Tuple[int, int]]:
+        first = date.replace(day=1)
+        next_first = first.replace(year=first.year + first.month // 12, month=first.month % 12 + 1)
+        return to_ordinal(first), to_ordinal(next_first) - 1
+
+    def validate(self, meals_df: PlanLike, date: Optional[datetime] = None) -> Tuple[bool, str]:
+        """Check if the tag appears the required number of times in the month."""
+        plan = as_plan(meals_df)
+        if plan.is_empty:
+            return False, f"No meals to validate for {self.tag} requirement"
+
+        # If no date specified, check each calendar month that has meals
+        if date is None:
+            short_month = plan.first_short_month((self.tag,), self.occurrences)
+            if short_month is not None:
+                first_ordinal, tag_count = short_month
+                return (
+                    False,
+                    f"Month {format_ordinal(first_ordinal)[:7]} has only {tag_count} meals with tag '{self.tag}', but "
+                    f"{self.occurrences} are required",
+                )
+
+            return True, f"All months have at least {self.occurrences} meals with tag '{self.tag}'"
+        else:
+            tag_count = plan.month_count((self.tag,), date.year, date.month)
+
+            if tag_count < self.occurrences:
+                return (
+                    False,
+                    f"Month {date.strftime('%Y-%m')} has only {tag_count} meals with tag '{self.tag}', but "
+                    f"{self.occurrences} are required",
+                )
+
+            return True, f"Month has at least {self.occurrences} meals with tag '{self.tag}'"
+
+    def validate_days(self, meals_df: PlanLike, start: datetime, end: datetime) -> np.ndarray:
+        """Count the tagged meals of every month in the range once, and spread the result over its days."""
+        plan = as_plan(meals_df)
+        first, last = to_ordinal(start), to_ordinal(end)
+        if plan.is_empty:
+            return np.zeros(last - first + 1, dtype=bool)
+
+        month_first, month_last = self.date_span(start)[0], self.date_span(end)[1]
+        day_months = months(np.arange(month_first, month_last + 1))
+        day_months -= day_months[0]
+        monthly = np.bincount(day_months, weights=plan.daily_counts((self.tag,), month_first, month_last))
+        record("months_evaluated", len(monthly))
+        return (monthly >= self.occurrences)[day_months[first - month_first : last - month_first + 1]]
+
     def can_add_meal(
-        self, meal_name: str, meal_tags: List[str], date: datetime, meals_df: pd.DataFrame
+        self, meal_name: str, meal_tags: List[str], date: datetime, meals_df: PlanLike
     ) -> Tuple[bool, str]:
         """
-        Check how adding this meal affects the weekly requirement.
+        Check how adding this meal affects the monthly requirement.
         Since this is a requirement not a constraint, it's always allowed to add a meal,
         but we return information about whether it helps meet the requirement.
         """
-        # This is a requirement, not a constraint, so meals can always be added
-        # But we'll check if it helps meet the requirement
-
         meal_tags = [t.lower() for t in meal_tags] if meal_tags else []
+        if self.tag not in meal_tags:
+            return True, self._contribution(False, 0)
+
+        plan = as_plan(meals_df)
+        tag_count = plan.month_count((self.tag,), date.year, date.month)
+
+        return True, self._contribution(True, tag_count)
+
+    def evaluate_candidates(self, candidates: CandidateSet, date: datetime, meals_df: PlanLike) -> CandidateVerdicts:
+        """Count the month's tagged meals once and mark the candidates that would help meet the requirement."""
+        plan = as_plan(meals_df)
+        tag_count = plan.month_count((self.tag,), date.year, date.month)
+
+        has_required_tag = candidates.tag_mask((self.tag,))
+        helps = has_required_tag & (tag_count < self.occurrences)
+
+        return CandidateVerdicts(
+            np.ones(len(candidates), dtype=bool),
+            helps,
+            lambda i: self._contribution(bool(has_required_tag[i]), tag_count),
+        )
+
+    def _contribution(self, has_required_tag: bool, tag_count: int) -> str:
+        """Describe how a meal contributes to the requirement, given the month's current tag count."""
+        if not has_required_tag:
+            return f"Meal doesn't have the '{self.tag}' tag, so doesn't help meet the monthly requirement"
+
+        if tag_count >= self.occurrences:
+            return f"Monthly requirement for '{self.tag}' ({self.occurrences} meals) already met ({tag_count} meals)"
+
+        # This meal would help meet the requirement
+        return (
+            f"Adding this meal helps meet the monthly requirement for '{self.tag}' ({tag_count + 1}/{self.occurrences})"
+        )
+
+
+class RollingWindowTagCountRule(Rule):
+    """
+    Require at least, or allow at most, a number of meals with a tag in any window of consecutive days.
+
+    A maximum (e.g. at most 2 comfort food meals per 10 days) is a constraint, a minimum (e.g. steak
+    at least once per 30 days) a requirement. Windows are counted with prefix sums over a daily tag
+    count array, so checking every window costs O(days) however long the history is.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        tags: List[str],
+        window_days: int,
+        min_count: Optional[int] = None,
+        max_count: Optional[int] = None,
+    ):
+        if (min_count is None) == (max_count is None):
+            raise ValueError("Exactly one of min_count and max_count must be given")
+        rule_type = RuleType.CONSTRAINT if max_count is not None else RuleType.REQUIREMENT
+        super().__init__(name=name, description=description, type=rule_type, scope=RuleScope.SLIDING_WINDOW)
+        self.tags = [t.lower() for t in tags]  # Store all tags in lowercase
+        self.window_days = window_days
+        self.min_count = min_count
+        self.max_count = max_count
+
+    def _tag_label(self) -> str:
+        return " or ".join(f"'{tag}'" for tag in self.tags)
+
+    def _window_label(self, start: int) -> str:
+        return (
+            f"{self.window_days}-day window {format_ordinal(start)} to {format_ordinal(start + self.window_days - 1)}"
+        )
+
+    def _window_counts(self, plan: PlanLike, first_start: int, last_start: int) -> np.ndarray:
+        """Number of tagged meals in each window starting from first_start to last_start (inclusive)."""
+        daily = plan.daily_counts(self.tags, first_start, last_start + self.window_days - 1)
+        record("windows_evaluated", last_start - first_start + 1)
+        prefix = np.concatenate(([0], np.cumsum(daily)))
+        return prefix[self.window_days :] - prefix[: -self.window_days]
+
+    def date_span(self, date: datetime) -> Optional[Tuple[int, int]]:
+        target = to_ordinal(date)
+        if self.max_count is not None:
+            # Every window containing the date
+            return target - self.window_days + 1, target + self.window_days - 1
+        # The window ending on the date
+        return target - self.window_days + 1, target
+
+    def validate(self, meals_df: PlanLike, date: Optional[datetime] = None) -> Tuple[bool, str]:
+        """Check the windows of the whole plan, or the windows around a date."""
+        plan = as_plan(meals_df)
+        if plan.is_empty:
+            if self.max_count is not None:
+                return True, "No meals to validate"
+            return False, f"No meals to validate for {self._tag_label()} requirement"
 
-        if not meal_tags:
+        if date is None:
+            return self._validate_plan(plan.snapshot())
+
+        target = to_ordinal(date)
+        if self.max_count is not None:
+            # Every window containing the date
+            first_start = target - self.window_days + 1
+            counts = self._window_counts(plan, first_start, target)
+            worst = int(np.argmax(counts))
+            if counts[worst] > self.max_count:
+                return (
+                    False,
+                    f"{self._window_label(first_start + worst)} has {counts[worst]} meals with tag "
+                    f"{self._tag_label()}, but at most {self.max_count} are allowed",
+                )
             return (
                 True,
-                f"Meal doesn't have any of the required tags ({' or '.join(self.tags)}), so doesn't help meet the weekly requirement",
+                f"No {self.window_days}-day window around this date has more than {self.max_count} meals with tag "
+                f"{self._tag_label()}",
             )
 
-        has_required_tag = any(tag in meal_tags for tag in self.tags)
-
-        if not has_required_tag:
+        # The window ending on the date
+        start = target - self.window_days + 1
+        tag_count = int(self._window_counts(plan, start, start)[0])
+        if tag_count < self.min_count:
+            return (
+                False,
+                f"{self._window_label(start)} has only {tag_count} meals with tag {self._tag_label()}, but "
+                f"{self.min_count} are required",
+            )
+        return (
+            True,
+            f"The {self.window_days} days up to this date have at least {self.min_count} meals with tag "
+            f"{self._tag_label()}",
+        )
+
+    def validate_days(self, meals_df: PlanLike, start: datetime, end: datetime) -> np.ndarray:
+        """Count all windows touching the range once; each day then takes its windows from the counts."""
+        plan = as_plan(meals_df)
+        first, last = to_ordinal(start), to_ordinal(end)
+        if plan.is_empty:
+            return np.full(last - first + 1, self.max_count is not None)
+
+        if self.max_count is not None:
+            # The busiest window containing each day
+            counts = self._window_counts(plan, first - self.window_days + 1, last)
+            return np.lib.stride_tricks.sliding_window_view(counts, self.window_days).max(axis=1) <= self.max_count
+
+        # The window ending on each day
+        counts = self._window_counts(plan, first - self.window_days + 1, last - self.window_days + 1)
+        return counts >= self.min_count
+
+    def _validate_plan(self, plan: PlanSnapshot) -> Tuple[bool, str]:
+        first, last = int(plan.ordinals[0]), int(plan.ordinals[-1])
+
+        if self.max_count is not None:
+            # Every window overlapping the plan
+            first_start = first - self.window_days + 1
+            counts = self._window_counts(plan, first_start, last)
+            over = np.flatnonzero(counts > self.max_count)
+            if len(over):
+                return (
+                    False,
+                    f"{self._window_label(first_start + int(over[0]))} has {counts[over[0]]} meals with tag "
+                    f"{self._tag_label()}, but at most {self.max_count} are allowed",
+                )
             return (
                 True,
-                f"Meal doesn't have any of the required tags ({' or '.join(self.tags)}), so doesn't help meet the weekly requirement",
+                f"No {self.window_days}-day window has more than {self.max_count} meals with tag {self._tag_label()}",
             )
 
-        # Ensure the Date column is in datetime format
-        meals_df = meals_df.copy()
-        meals_df["Date"] = pd.to_datetime(meals_df["Date"])
+        # Only windows that lie completely within the planned period
+        if last - first + 1 < self.window_days:
+            return True, f"Less than {self.window_days} days planned, so there is no complete window to check"
+
+        counts = self._window_counts(plan, first, last - self.window_days + 1)
+        short = np.flatnonzero(counts < self.min_count)
+        if len(short):
+            return (
+                False,
+                f"{self._window_label(first + int(short[0]))} has only {counts[short[0]]} meals with tag "
+                f"{self._tag_label()}, but {self.min_count} are required",
+            )
+        return (
+            True,
+            f"Every {self.window_days}-day window has at least {self.min_count} meals with tag {self._tag_label()}",
+        )
+
+    def _date_count(self, plan: PlanLike, date: datetime) -> int:
+        """Tagged meals in the busiest window containing the date (maximum) or the window ending on it (minimum)."""
+        target = to_ordinal(date)
+        if self.max_count is not None:
+            return int(self._window_counts(plan, target - self.window_days + 1, target).max())
+        start = target - self.window_days + 1
+        return int(self._window_counts(plan, start, start)[0])
+
+    def can_add_meal(
+        self, meal_name: str, meal_tags: List[str], date: datetime, meals_df: PlanLike
+    ) -> Tuple[bool, str]:
+        """Check whether a meal would exceed the maximum, or helps meet the minimum."""
+        meal_tags = [t.lower() for t in meal_tags] if meal_tags else []
+        has_tag = any(tag in meal_tags for tag in self.tags)
+        if not has_tag:
+            return True, self._contribution(False, 0)
+
+        tag_count = self._date_count(as_plan(meals_df), date)
+        return self._allowed(tag_count), self._contribution(True, tag_count)
 
-        # Get the ISO week for this date (Monday-based)
-        iso_calendar = date.isocalendar()
-        week_meals = meals_df[meals_df["Date"].dt.isocalendar().week == iso_calendar.week]
+    def evaluate_candidates(self, candidates: CandidateSet, date: datetime, meals_df: PlanLike) -> CandidateVerdicts:
+        """Count the windows around the date once and apply the result to all tagged candidates."""
+        tag_count = self._date_count(as_plan(meals_df), date)
+        has_tag = candidates.tag_mask(self.tags)
 
-        # Count existing meals with any of the required tags
-        tag_count = 0
-        for _, row in week_meals.iterrows():
-            if pd.notna(row["Tags"]):
-                week_meal_tags = [t.strip().lower() for t in row["Tags"].split(",")]
-                if any(tag in week_meal_tags for tag in self.tags):
-                    tag_count += 1
+        if self.max_count is not None:
+            can_add = ~has_tag | self._allowed(tag_count)
+            helps = np.zeros(len(candidates), dtype=bool)
+        else:
+            can_add = np.ones(len(candidates), dtype=bool)
+            helps = has_tag & (tag_count < self.min_count)
 
-        if tag_count >= self.occurrences:
+        return CandidateVerdicts(can_add, helps, lambda i: self._contribution(bool(has_tag[i]), tag_count))
+
+    def _allowed(self, tag_count: int) -> bool:
+        return self.max_count is None or tag_count + 1 <= self.max_count
+
+    def _contribution(self, has_tag: bool, tag_count: int) -> str:
+        """Describe the effect of adding a meal, given the relevant window's current tag count."""
+        if not has_tag:
+            return f"Meal doesn't have tag {self._tag_label()}, so this rule doesn't apply"
+
+        if self.max_count is not None:
+            if not self._allowed(tag_count):
+                return (
+                    f"Adding this meal would exceed {self.max_count} meals with tag {self._tag_label()} within "
+                    f"{self.window_days} days"
+                )
             return (
-                True,
-                f"Weekly requirement for {' or '.join(self.tags)} ({self.occurrences} meals) already met ({tag_count} meals)",
+                f"Meal with tag {self._tag_label()} fits within {self.max_count} per {self.window_days} days "
+                f"({tag_count + 1}/{self.max_count})"
             )
-        else:
-            # This meal would help meet the requirement
+
+        if tag_count >= self.min_count:
             return (
-                True,
-                f"Adding this meal helps meet the weekly requirement for {' or '.join(self.tags)} ({tag_count + 1}/{self.occurrences})",
+                f"Requirement for {self._tag_label()} ({self.min_count} per {self.window_days} days) already met "
+                f"({tag_count} meals)"
             )
 
+        # This meal would help meet the requirement
+        return (
+            f"Adding this meal helps meet the requirement for {self._tag_label()} ({tag_count + 1}/{self.min_count} "
+            f"per {self.window_days} days)"
+        )
+
+
+# Penalty for suggesting a meal with the same tags as a better suggestion
+SUGGESTION_DIVERSITY = 0.5
+# Candidates ranked for diversity per requested suggestion
+SUGGESTION_POOL_FACTOR = 8
+# Bonus for suggesting a meal that wasn't served recently, reached after SUGGESTION_RECENCY_DAYS days
+SUGGESTION_RECENCY = 0.25
+SUGGESTION_RECENCY_DAYS = 90
+
+
+class CandidateEvaluation:
+    """Combined outcome of all enabled rules for every candidate meal."""
+
+    def __init__(self, candidates: CandidateSet, verdicts: List[Tuple[Rule, CandidateVerdicts]]):
+        self.candidates = candidates
+        self.verdicts = verdicts
+
+        # A meal can be added if it doesn't violate any constraints; its score is the number of requirements it
+        # helps meet
+        self.can_add = np.ones(len(candidates), dtype=bool)
+        self.scores = np.zeros(len(candidates), dtype=np.int64)
+        for rule, verdict in verdicts:
+            if rule.type == RuleType.CONSTRAINT:
+                self.can_add &= verdict.can_add
+            else:  # REQUIREMENT
+                self.scores += verdict.helps
+
+        # Days since each candidate was last served, from the rules that track it
+        self.days_since_served: Optional[np.ndarray] = None
+        for _, verdict in verdicts:
+            if verdict.days_since_served is not None:
+                if self.days_since_served is None:
+                    self.days_since_served = verdict.days_since_served
+                else:
+                    self.days_since_served = np.minimum(self.days_since_served, verdict.days_since_served)
+
+    def pick(self, rng: random.Random) -> Optional[int]:
+        """Randomly pick one of the allowed candidates with the highest score, or None if none is allowed."""
+        allowed = np.flatnonzero(self.can_add)
+        if len(allowed) == 0:
+            return None
+        allowed_scores = self.scores[allowed]
+        best = allowed[allowed_scores == allowed_scores.max()]
+        return int(best[rng.randrange(len(best))])
+
+    def verdict(self, rule: Rule) -> CandidateVerdicts:
+        """Verdicts of a single rule."""
+        return next(verdict for verdict_rule, verdict in self.verdicts if verdict_rule is rule)
+
+    def top(
+        self, count: int, diversity: float = SUGGESTION_DIVERSITY, rng: Optional[np.random.Generator] = None
+    ) -> List[int]:
+        """
+        Pick the best candidates that can be added, preferring ones that don't share tags with each other.
+
+        Within a score, candidates that weren't served for longer come first (when a rule tracks when
+        meals were last served), in random order otherwise. Only a pool of the highest ranked candidates
+        is ranked for diversity, so the work after scoring depends on count rather than on the number
+        of candidates.
+
+        Args:
+            count: Number of candidates to pick
+            diversity: Penalty for a candidate whose tags are identical to an already picked one (scaled
+                by their tag overlap); below 1, it only reorders candidates with the same score
+            rng: Random generator for ordering candidates with the same score
+
+        Returns:
+            Indexes of the picked candidates, best first
+        """
+        allowed = np.flatnonzero(self.can_add)
+        if count <= 0 or len(allowed) == 0:
+            return []
+        rng = rng or np.random.default_rng()
+
+        # Recency bonus and random tie-break add up to less than 0.5, so they never cross into the next score
+        priorities = self.scores[allowed] + rng.random(len(allowed)) * (0.5 - SUGGESTION_RECENCY)
+        if self.days_since_served is not None:
+            recency = np.clip(self.days_since_served[allowed], 0, SUGGESTION_RECENCY_DAYS) / SUGGESTION_RECENCY_DAYS
+            priorities += SUGGESTION_RECENCY * recency
+        pool_size = min(len(allowed), count * SUGGESTION_POOL_FACTOR)
+        if pool_size < len(allowed):
+            pool = np.argpartition(-priorities, pool_size - 1)[:pool_size]
+        else:
+            pool = np.arange(len(allowed))
+        pool = list(pool[np.argsort(-priorities[pool])])
+
+        # Greedily take the best remaining candidate, penalized by its overlap with those already picked
+        tags = self.candidates.tags
+        overlap = dict.fromkeys(pool, 0.0)
+        picked = []
+        while pool and len(picked) < count:
+            best = max(pool, key=lambda i: priorities[i] - diversity * overlap[i])
+            pool.remove(best)
+            picked.append(int(allowed[best]))
+            best_tags = tags[allowed[best]]
+            for i in pool:
+                union = len(tags[allowed[i]] | best_tags)
+                if union:
+                    overlap[i] = max(overlap[i], len(tags[allowed[i]] & best_tags) / union)
+        return picked
+
+    def validation_result(self, index: int) -> Dict[str, Any]:
+        """Build the RuleEngine.can_add_meal() result for a single candidate."""
+        constraint_results = []
+        requirement_results = []
+
+        for rule, verdict in self.verdicts:
+            result = {"rule_name": rule.name, "can_add": bool(verdict.can_add[index]), "reason": verdict.reason(index)}
+
+            if rule.type == RuleType.CONSTRAINT:
+                constraint_results.append(result)
+            else:  # REQUIREMENT
+                requirement_results.append(result)
+
+        return {
+            "can_add": bool(self.can_add[index]),
+            "constraint_results": constraint_results,
+            "requirement_results": requirement_results,
+        }
+
+
+# Maximum number of validation results kept by RuleEngine.validate_meal_plan()
+VALIDATION_CACHE_SIZE = 256
+
+# Plans (in dated rows) and day ranges from which validation is worth fanning out to worker processes
+PARALLEL_MIN_ROWS = 20000
+PARALLEL_MIN_DAYS = 3650
+
 
 class RuleEngine:
     """Engine to manage and evaluate mealplan rules."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        cache_size: int = VALIDATION_CACHE_SIZE,
+        rule_time_budget_ms: Optional[float] = None,
+        workers: Optional[int] = None,
+    ):
         self.rules: List[Rule] = []
+        # Bumped whenever the rule set changes; part of the validation cache key
+        self.version = 0
+        self._cache_size = cache_size
+        self._validation_cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Rules taking longer than this to validate are logged
+        self.rule_time_budget_ms = rule_time_budget_ms
+        self._trace_listeners: List[Callable[[ValidationTrace], None]] = []
+        # Worker processes for validating large plans, if more than one is configured
+        self._parallel = ParallelRuleRunner(workers) if workers and workers > 1 else None
+
+    def close(self) -> None:
+        """Stop the worker processes, if any; they are started again when needed."""
+        if self._parallel is not None:
+            self._parallel.close()
 
     def add_rule(self, rule: Rule) -> None:
         """Add a rule to the engine."""
         self.rules.append(rule)
+        self.rules_changed()
+
+    def set_rules(self, rules: List[Rule]) -> None:
+        """Replace all rules of the engine, e.g. after reloading the rule definitions."""
+        self.rules = list(rules)
+        self.rules_changed()
+
+    def rules_changed(self) -> None:
+        """Mark the rule set as changed (e.g. after enabling/disabling a rule), dropping cached results."""
+        self.version += 1
+        self.clear_validation_cache()
+
+    def clear_validation_cache(self) -> None:
+        """Drop all cached validation results."""
+        with self._cache_lock:
+            self._validation_cache.clear()
+
+    def add_trace_listener(self, listener: Callable[[ValidationTrace], None]) -> None:
+        """
+        Register a function (e.g. a metrics sink) that is called with the trace of every validation.
+
+        Validations are only traced while there are listeners, or when a trace is asked for explicitly.
+        """
+        self._trace_listeners.append(listener)
+
+    def date_span(self, date: datetime) -> Optional[Tuple[datetime, datetime]]:
+        """
+        Dates the enabled rules read when validating around a date, so callers can load just that range.
+
+        Args:
+            date: Date to validate around
+
+        Returns:
+            Tuple of (first, last) dates (inclusive), or None if any rule needs the whole plan
+        """
+        first = last = to_ordinal(date)
+        for rule in self.get_enabled_rules():
+            span = rule.date_span(date)
+            if span is None:
+                return None
+            first, last = min(first, span[0]), max(last, span[1])
+        return datetime.fromordinal(first), datetime.fromordinal(last)
+
+    def validate_days(self, meals_df: PlanLike, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """
+        Validate every day from start to end (inclusive) against all enabled rules in one pass per rule.
+
+        Args:
+            meals_df: DataFrame containing meal plans, or a PlanSnapshot/PlanState of it
+            start: First day
+            end: Last day
+
+        Returns:
+            List of results, one per rule, each with rule info and a boolean array of the per-day
+            is_valid results, as validate_meal_plan(meals_df, date) would give them for every date
+        """
+        # Parse the plan once and share it between all rules
+        plan = as_plan(meals_df)
+        rules = self.get_enabled_rules()
+
+        day_results = None
+        if (end - start).days + 1 >= PARALLEL_MIN_DAYS:
+            day_results = self._run_parallel(
+                plan, lambda runner, snapshot: runner.validate_days(snapshot, rules, start, end)
+            )
+        if day_results is None:
+            day_results = [rule.validate_days(plan, start, end) for rule in rules]
+
+        return [
+            {"rule_name": rule.name, "rule_type": rule.type.name, "is_valid": is_valid}
+            for rule, is_valid in zip(rules, day_results, strict=True)
+        ]
+
+    def _run_parallel(self, plan: PlanLike, run: Callable[[ParallelRuleRunner, PlanSnapshot], List]) -> Optional[List]:
+        """
+        Run rules in the worker processes if there are any and the plan is large enough.
+
+        Returns:
+            The results of run(), or None if the rules should be run in this process instead
+        """
+        if self._parallel is None:
+            return None
+        snapshot = plan.snapshot()
+        if len(snapshot) < PARALLEL_MIN_ROWS:
+            return None
+        try:
+            return run(self._parallel, snapshot)
+        except Exception as e:
+            logger.error(f"Parallel rule evaluation failed, evaluating in process instead: {str(e)}")
+            return None
 
     def get_rules(self) -> List[Rule]:
         """Get all rules."""
@@ -570,38 +1213,106 @@ class RuleEngine:
         """Get only enabled rules."""
         return [rule for rule in self.rules if rule.enabled]
 
-    def validate_meal_plan(self, meals_df: pd.DataFrame, date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    def validate_meal_plan(
+        self,
+        meals_df: PlanLike,
+        date: Optional[datetime] = None,
+        plan_version: Optional[int] = None,
+        trace: Optional[ValidationTrace] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Validate a meal plan against all enabled rules.
 
         Args:
-            meals_df: DataFrame containing meal plans
+            meals_df: DataFrame containing meal plans, or a PlanSnapshot/PlanState of it
             date: Optional date to focus validation around
+            plan_version: Version of the meal plan; when given, results are cached per (plan version,
+                rule set version, date) so repeated validations of an unchanged plan are a lookup
+            trace: Optional trace to record per-rule timings and counters in; traced validations
+                always run the rules instead of returning cached results
 
         Returns:
             List of validation results, each with rule info and validation status
         """
-        results = []
+        if plan_version is None or trace is not None:
+            return self._validate_meal_plan(meals_df, date, trace)
+
+        key = (plan_version, self.version, date)
+        with self._cache_lock:
+            results = self._validation_cache.get(key)
+            if results is not None:
+                self._validation_cache.move_to_end(key)
+                return [dict(result) for result in results]
+
+        results = self._validate_meal_plan(meals_df, date)
+
+        with self._cache_lock:
+            self._validation_cache[key] = [dict(result) for result in results]
+            while len(self._validation_cache) > self._cache_size:
+                self._validation_cache.popitem(last=False)
+        return results
 
-        for rule in self.get_enabled_rules():
-            is_valid, message = rule.validate(meals_df, date)
-
-            results.append(
-                {
-                    "rule_name": rule.name,
-                    "rule_description": rule.description,
-                    "rule_type": rule.type.name,
-                    "rule_scope": rule.scope.name,
-                    "is_valid": is_valid,
-                    "message": message,
-                }
-            )
+    def _validate_meal_plan(
+        self, meals_df: PlanLike, date: Optional[datetime], trace: Optional[ValidationTrace] = None
+    ) -> List[Dict[str, Any]]:
+        if trace is None and (self._trace_listeners or self.rule_time_budget_ms is not None):
+            trace = ValidationTrace()
+        if trace is None:
+            plan = as_plan(meals_df)
+            rules = self.get_enabled_rules()
+            outcomes = None
+            if date is None:
+                # Only validating the whole plan reads enough rows to be worth the worker round trip
+                outcomes = self._run_parallel(plan, lambda runner, snapshot: runner.validate(snapshot, rules, date))
+            if outcomes is None:
+                outcomes = [rule.validate(plan, date) for rule in rules]
+            return [self._validation_result(rule, *outcome) for rule, outcome in zip(rules, outcomes, strict=True)]
+
+        start = time.perf_counter()
+        trace.date = date.strftime("%Y-%m-%d") if date else None
+
+        # Parse the plan once and share it between all rules
+        plan = as_plan(meals_df)
+        trace.parse_ms = (time.perf_counter() - start) * 1000
 
+        results = []
+        for rule in self.get_enabled_rules():
+            with trace.rule(rule.name):
+                is_valid, message = rule.validate(plan, date)
+            results.append(self._validation_result(rule, is_valid, message))
+        trace.total_ms = (time.perf_counter() - start) * 1000
+
+        self._check_rule_time_budget(trace)
+        for listener in self._trace_listeners:
+            try:
+                listener(trace)
+            except Exception as e:
+                logger.error(f"Trace listener failed: {str(e)}")
         return results
 
-    def can_add_meal(
-        self, meal_name: str, meal_tags: List[str], date: datetime, meals_df: pd.DataFrame
-    ) -> Dict[str, Any]:
+    @staticmethod
+    def _validation_result(rule: Rule, is_valid: bool, message: str) -> Dict[str, Any]:
+        return {
+            "rule_name": rule.name,
+            "rule_description": rule.description,
+            "rule_type": rule.type.name,
+            "rule_scope": rule.scope.name,
+            "is_valid": is_valid,
+            "message": message,
+        }
+
+    def _check_rule_time_budget(self, trace: ValidationTrace) -> None:
+        """Log the rules of a traced validation that took longer than the rule time budget."""
+        if self.rule_time_budget_ms is None:
+            return
+        for rule_trace in trace.rules:
+            if rule_trace.elapsed_ms > self.rule_time_budget_ms:
+                logger.warning(
+                    f"Rule '{rule_trace.rule_name}' took {rule_trace.elapsed_ms:.1f}ms to validate"
+                    f" (budget {self.rule_time_budget_ms}ms, date {trace.date or 'all'}): {rule_trace.counters}"
+                )
+
+    def can_add_meal(self, meal_name: str, meal_tags: List[str], date: datetime, meals_df: PlanLike) -> Dict[str, Any]:
         """
         Check if a meal can be added without violating constraints, and how it affects requirements.
 
@@ -609,7 +1320,7 @@ class RuleEngine:
             meal_name: Name of the meal to add
             meal_tags: Tags for the meal
             date: Date to add the meal
-            meals_df: Existing meal plan dataframe
+            meals_df: Existing meal plan dataframe, PlanSnapshot or PlanState
 
         Returns:
             Dictionary with validation results
@@ -617,8 +1328,10 @@ class RuleEngine:
         constraint_results = []
         requirement_results = []
 
+        plan = as_plan(meals_df)
+
         for rule in self.get_enabled_rules():
-            can_add, reason = rule.can_add_meal(meal_name, meal_tags, date, meals_df)
+            can_add, reason = rule.can_add_meal(meal_name, meal_tags, date, plan)
 
             result = {"rule_name": rule.name, "can_add": can_add, "reason": reason}
 
@@ -636,99 +1349,53 @@ class RuleEngine:
             "requirement_results": requirement_results,
         }
 
+    def evaluate_candidates(self, candidates: CandidateSet, date: datetime, meals_df: PlanLike) -> CandidateEvaluation:
+        """
+        Evaluate all candidate meals for a date against every enabled rule in one pass.
+
+        Args:
+            candidates: Parsed candidate meals
+            date: Date to add the meal
+            meals_df: Existing meal plan dataframe, PlanSnapshot or PlanState
+
+        Returns:
+            CandidateEvaluation with per-candidate verdicts and requirement scores
+        """
+        plan = as_plan(meals_df)
+        verdicts = [(rule, rule.evaluate_candidates(candidates, date, plan)) for rule in self.get_enabled_rules()]
+        return CandidateEvaluation(candidates, verdicts)
+
     def suggest_meals_for_date(
-        self, date: datetime, available_meals: List[Dict[str, Any]], meals_df: pd.DataFrame, count: int = 3
+        self,
+        date: datetime,
+        available_meals: Union[List[Dict[str, Any]], CandidateSet],
+        meals_df: PlanLike,
+        count: int = 3,
+        diversity: float = SUGGESTION_DIVERSITY,
     ) -> List[Dict[str, Any]]:
         """
         Suggest meals for a date that satisfy constraints and best meet requirements.
 
         Args:
             date: Date to suggest meals for
-            available_meals: List of available meals, each with 'name' and 'tags'
-            meals_df: Existing meal plan dataframe
+            available_meals: List of available meals, each with 'name' and 'tags', or a CandidateSet of them
+            meals_df: Existing meal plan dataframe, PlanSnapshot or PlanState
             count: Number of suggestions to return
+            diversity: How strongly to avoid suggestions that share tags (see CandidateEvaluation.top())
 
         Returns:
             List of suggested meals, ranked by how well they meet requirements
         """
-        suggestions = []
-
-        import random
-
-        # Shuffle available meals first to introduce initial randomness
-        available_meals = available_meals.copy()
-        random.shuffle(available_meals)
-
-        for meal in available_meals:
-            meal_name = meal["name"]
-            meal_tags = meal.get("tags", "").split(",") if meal.get("tags") else []
-
-            # Check if this meal can be added
-            result = self.can_add_meal(meal_name, meal_tags, date, meals_df)
-
-            if result["can_add"]:
-                # Calculate a score based on how many requirements it helps meet
-                requirement_score = sum(1 for req in result["requirement_results"] if "helps meet" in req["reason"])
-
-                suggestions.append({"meal": meal, "requirement_score": requirement_score, "validation_result": result})
-
-        # Group suggestions by score
-        score_groups = {}
-        for suggestion in suggestions:
-            score = suggestion["requirement_score"]
-            if score not in score_groups:
-                score_groups[score] = []
-            score_groups[score].append(suggestion)
-
-        # Shuffle each group of same-scored suggestions
-        for score in score_groups:
-            random.shuffle(score_groups[score])
-
-        # Reconstruct the suggestions list maintaining score order but with shuffled same-score items
-        suggestions = []
-        for score in sorted(score_groups.keys(), reverse=True):
-            suggestions.extend(score_groups[score])
-
-        # Return the top suggestions
-        return suggestions[:count]
-
-
-# Create a default instance with common rules
-default_rule_engine = RuleEngine()
-
-# Add default rules
-default_rule_engine.add_rule(
-    NoRepeatInWindowRule(
-        name="No repeat within 3 weeks",
-        description="Don't plan the same meal twice in a 3 week sliding window",
-        window_days=21,
-    )
-)
-
-default_rule_engine.add_rule(
-    WeeklyRequirementRule(name="Weekly fish", description="Have fish at least once a week", tag="fish", occurrences=1)
-)
-
-default_rule_engine.add_rule(
-    MultiTagWeeklyRequirementRule(
-        name="Weekly rice/asian",
-        description="Have rice or asian food at least once a week",
-        tags=["rice", "asian"],
-        occurrences=1,
-    )
-)
-
-default_rule_engine.add_rule(
-    WeeklyRequirementRule(
-        name="Weekly pasta", description="Have pasta at least once a week", tag="pasta", occurrences=1
-    )
-)
-
-default_rule_engine.add_rule(
-    SpecificDayRequirementRule(
-        name="Friday comfort food",
-        description="Friday = indulging = comfort food",
-        day_of_week=4,  # 0 is Monday, so 4 is Friday
-        tag="comfort food",
-    )
-)
+        # Check every meal against all rules at once
+        candidates = available_meals if isinstance(available_meals, CandidateSet) else CandidateSet(available_meals)
+        evaluation = self.evaluate_candidates(candidates, date, meals_df)
+
+        # Only build the detailed results for the picked suggestions
+        return [
+            {
+                "meal": candidates.meals[index],
+                "requirement_score": int(evaluation.scores[index]),
+                "validation_result": evaluation.validation_result(index),
+            }
+            for index in evaluation.top(count, diversity)
+        ]
@@ -0,0 +1,362 @@
+"""
+Pre-parsed meal plan snapshot shared by all rules.
+
+Parsing the meals DataFrame (dates, ISO weeks, lowercased/split tags) is done once per request
+by the rule engine; every rule then works on the resulting read-only arrays.
+"""
+
+from datetime import date as date_type
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from gusto2.rules.trace import record
+from gusto2.tags import TagMatrix, parse_tags
+
+# Meals carrying this tag are ignored by the no-repeat rule
+SKIP_VALIDATION_TAG = "skip-validation"
+
+# Ordinal (as in date.toordinal()) of the unix epoch, used to convert datetime64[D] values
+_EPOCH_ORDINAL = date_type(1970, 1, 1).toordinal()
+
+
+def to_ordinal(day: Union[datetime, date_type]) -> int:
+    """Convert a date or datetime to its proleptic Gregorian ordinal."""
+    return day.toordinal()
+
+
+def format_ordinal(ordinal: int) -> str:
+    """Format a date ordinal as YYYY-MM-DD, matching the rule messages."""
+    return date_type.fromordinal(int(ordinal)).strftime("%Y-%m-%d")
+
+
+def iso_calendar(ordinals: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ISO (year, week) arrays for an array of date ordinals."""
+    # The ISO year of a week is the calendar year of its Thursday; ordinal 1 (0001-01-01) is a Monday
+    thursdays = ordinals - (ordinals - 1) % 7 + 3
+    years = (thursdays - _EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[Y]")
+    january_firsts = years.astype("datetime64[D]").astype(np.int64) + _EPOCH_ORDINAL
+    return years.astype(np.int64) + 1970, (thursdays - january_firsts) // 7 + 1
+
+
+def months(ordinals: np.ndarray) -> np.ndarray:
+    """Calendar month numbers (months since 1970-01) for an array of date ordinals."""
+    return (np.asarray(ordinals) - _EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+class PlanView:
+    """
+    Queries the rules run against a meal plan.
+
+    Implemented by PlanSnapshot (parsed once per request) and PlanState (kept up to date incrementally),
+    so rules don't need to know where the plan came from. Tags passed in must be lowercase.
+    """
+
+    @property
+    def is_empty(self) -> bool:
+        """Whether the plan has no rows at all (mirrors DataFrame.empty)."""
+        raise NotImplementedError("Subclasses must implement is_empty")
+
+    def between(self, start: int, end: int) -> "PlanSnapshot":
+        """Rows with a date ordinal in [start, end] (inclusive)."""
+        raise NotImplementedError("Subclasses must implement between()")
+
+    def week_number_count(self, tags: Iterable[str], week: int) -> int:
+        """Count meals carrying any of the tags in the given ISO week number, across all years."""
+        raise NotImplementedError("Subclasses must implement week_number_count()")
+
+    def first_short_week(self, tags: Iterable[str], occurrences: int) -> Optional[Tuple[int, int]]:
+        """
+        Find the first ISO (year, week) with meals that has fewer than `occurrences` meals carrying any of the tags.
+
+        Returns:
+            Tuple of (earliest date ordinal in that week, matching meal count), or None if all weeks pass
+        """
+        raise NotImplementedError("Subclasses must implement first_short_week()")
+
+    def daily_counts(self, tags: Iterable[str], start: int, end: int) -> np.ndarray:
+        """Number of meals carrying any of the tags on each day from start to end (inclusive)."""
+        rows = self.between(start, end)
+        return np.bincount(rows.ordinals[rows.tag_mask(tags)] - start, minlength=end - start + 1)
+
+    def month_count(self, tags: Iterable[str], year: int, month: int) -> int:
+        """Count meals carrying any of the tags in the given calendar month."""
+        first = date_type(year, month, 1)
+        last = date_type(year + month // 12, month % 12 + 1, 1)
+        record("months_evaluated")
+        return int(np.count_nonzero(self.between(first.toordinal(), last.toordinal() - 1).tag_mask(tags)))
+
+    def first_short_month(self, tags: Iterable[str], occurrences: int) -> Optional[Tuple[int, int]]:
+        """
+        Find the first calendar month with meals that has fewer than `occurrences` meals carrying any of the tags.
+
+        Returns:
+            Tuple of (earliest date ordinal in that month, matching meal count), or None if all months pass
+        """
+        return self.snapshot().first_short_month(tags, occurrences)
+
+    def weekday_instances(self, weekday: int, tag: str) -> Tuple[bool, Optional[int]]:
+        """
+        Check every week's meals on a weekday for a tag.
+
+        Returns:
+            Tuple of (whether any meals fall on that weekday, date ordinal of the first instance without the tag)
+        """
+        raise NotImplementedError("Subclasses must implement weekday_instances()")
+
+    def eligibility(self, candidates, window_days: int, ordinal: int):
+        """
+        Maintained EligibilityMatrix of the candidates for a no-repeat window, covering a day.
+
+        Returns:
+            The matrix, or None if the plan doesn't maintain one (rules then scan the plan instead)
+        """
+        return None
+
+    def snapshot(self) -> "PlanSnapshot":
+        """The whole plan as a PlanSnapshot."""
+        raise NotImplementedError("Subclasses must implement snapshot()")
+
+
+class PlanSnapshot(PlanView):
+    """
+    Immutable, pre-parsed view of a meal plan.
+
+    Rows without a valid date are dropped (none of the rules consider them) and the remaining rows
+    are sorted by date, so date ranges can be sliced with a binary search.
+    """
+
+    def __init__(
+        self,
+        ordinals: np.ndarray,
+        iso_years: np.ndarray,
+        iso_weeks: np.ndarray,
+        weekdays: np.ndarray,
+        names: np.ndarray,
+        recipe_ids: np.ndarray,
+        tags: Tuple[FrozenSet[str], ...],
+        row_count: Optional[int] = None,
+        tag_matrix: Optional[TagMatrix] = None,
+    ):
+        self.ordinals = _readonly(ordinals)
+        self.iso_years = _readonly(iso_years)
+        self.iso_weeks = _readonly(iso_weeks)
+        self.weekdays = _readonly(weekdays)
+        self.names = _readonly(names)
+        self.recipe_ids = _readonly(recipe_ids)
+        self.tags = tags
+        self._tag_matrix = tag_matrix
+        # Number of rows in the source plan, including rows without a date
+        self.row_count = len(ordinals) if row_count is None else row_count
+        self._tag_masks: Dict[Tuple[str, ...], np.ndarray] = {}
+
+    @classmethod
+    def from_dataframe(cls, meals_df: pd.DataFrame, row_count: Optional[int] = None) -> "PlanSnapshot":
+        """
+        Parse a meals DataFrame (Date, Name, Tags columns) into a snapshot.
+
+        Args:
+            meals_df: Meals to parse
+            row_count: Number of rows of the whole plan, when meals_df is only a date range of it
+        """
+        row_count = len(meals_df) if row_count is None else row_count
+        if len(meals_df) == 0 or "Date" not in meals_df.columns:
+            return cls.empty(row_count)
+
+        dates = pd.to_datetime(meals_df["Date"], errors="coerce")
+        valid = dates.notna().to_numpy()
+        ordinals = dates[valid].to_numpy().astype("datetime64[D]").astype(np.int64) + _EPOCH_ORDINAL
+
+        if "Name" in meals_df.columns:
+            names = meals_df["Name"][valid].to_numpy(dtype=object, copy=True)
+            names[pd.isna(names)] = None
+        else:
+            names = np.full(len(ordinals), None, dtype=object)
+
+        if "Tags" in meals_df.columns:
+            tags = [parse_tags(value) for value in meals_df["Tags"][valid].to_numpy(dtype=object)]
+        else:
+            tags = [frozenset()] * len(ordinals)
+
+        return cls.from_records(ordinals, names, tags, row_count=row_count)
+
+    @classmethod
+    def from_records(
+        cls,
+        ordinals: Iterable[int],
+        names: Iterable[Optional[str]],
+        tags: Iterable[FrozenSet[str]],
+        row_count: Optional[int] = None,
+    ) -> "PlanSnapshot":
+        """Build a snapshot from already parsed rows (date ordinal, name or None, tag set), in any order."""
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        names = np.asarray(names, dtype=object).reshape(len(ordinals))
+        tags = list(tags)
+        if len(ordinals) == 0:
+            return cls.empty(row_count or 0)
+
+        order = np.argsort(ordinals, kind="stable")
+        ordinals = ordinals[order]
+        names = names[order]
+        recipe_ids, _ = pd.factorize(names)
+        iso_years, iso_weeks = iso_calendar(ordinals)
+
+        return cls(
+            ordinals=ordinals,
+            iso_years=iso_years,
+            iso_weeks=iso_weeks,
+            weekdays=(ordinals - 1) % 7,  # Ordinal 1 (0001-01-01) is a Monday
+            names=names,
+            recipe_ids=recipe_ids.astype(np.int64),
+            tags=tuple(tags[i] for i in order),
+            row_count=row_count,
+        )
+
+    @classmethod
+    def empty(cls, row_count: int = 0) -> "PlanSnapshot":
+        """Create a snapshot without any dated meals."""
+        ints = np.empty(0, dtype=np.int64)
+        return cls(
+            ordinals=ints.copy(),
+            iso_years=ints.copy(),
+            iso_weeks=ints.copy(),
+            weekdays=ints.copy(),
+            names=np.empty(0, dtype=object),
+            recipe_ids=ints.copy(),
+            tags=(),
+            row_count=row_count,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ordinals)
+
+    @property
+    def is_empty(self) -> bool:
+        return self.row_count == 0
+
+    def _take(self, index: Union[slice, np.ndarray]) -> "PlanSnapshot":
+        if isinstance(index, slice):
+            tags = self.tags[index]
+        else:
+            tags = tuple(self.tags[i] for i in index)
+        return PlanSnapshot(
+            ordinals=self.ordinals[index],
+            iso_years=self.iso_years[index],
+            iso_weeks=self.iso_weeks[index],
+            weekdays=self.weekdays[index],
+            names=self.names[index],
+            recipe_ids=self.recipe_ids[index],
+            tags=tags,
+            tag_matrix=self._tag_matrix.take(index) if self._tag_matrix is not None else None,
+        )
+
+    def between(self, start: int, end: int) -> "PlanSnapshot":
+        lo = int(np.searchsorted(self.ordinals, start, side="left"))
+        hi = int(np.searchsorted(self.ordinals, end, side="right"))
+        record("rows_scanned", max(hi - lo, 0))
+        return self._take(slice(lo, hi))
+
+    def where(self, mask: np.ndarray) -> "PlanSnapshot":
+        """Rows for which the boolean mask is set."""
+        return self._take(np.flatnonzero(mask))
+
+    @property
+    def tag_matrix(self) -> TagMatrix:
+        """Tag ids of every row, built on first use."""
+        if self._tag_matrix is None:
+            self._tag_matrix = TagMatrix.from_tag_sets(self.tags)
+        return self._tag_matrix
+
+    def tag_mask(self, tags: Iterable[str]) -> np.ndarray:
+        """Boolean array marking rows that carry any of the given (lowercase) tags."""
+        key = tuple(sorted(tags))
+        mask = self._tag_masks.get(key)
+        if mask is None:
+            mask = _readonly(self.tag_matrix.has_any(key))
+            self._tag_masks[key] = mask
+        return mask
+
+    @property
+    def skip_mask(self) -> np.ndarray:
+        """Rows tagged to be skipped by validation."""
+        return self.tag_mask((SKIP_VALIDATION_TAG,))
+
+    def dates(self) -> List[str]:
+        """All row dates formatted as YYYY-MM-DD."""
+        return [format_ordinal(ordinal) for ordinal in self.ordinals]
+
+    def week_number_count(self, tags: Iterable[str], week: int) -> int:
+        record("rows_scanned", len(self))
+        return int(np.count_nonzero(self.tag_mask(tags) & (self.iso_weeks == week)))
+
+    def first_short_week(self, tags: Iterable[str], occurrences: int) -> Optional[Tuple[int, int]]:
+        if len(self) == 0:
+            return None
+
+        # Each (year, week) key is a complete Monday-Sunday week; keys sort chronologically
+        keys = self.iso_years * 100 + self.iso_weeks
+        weeks, first_index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        counts = np.bincount(inverse, weights=self.tag_mask(tags), minlength=len(weeks))
+        record("rows_scanned", len(self))
+        record("weeks_evaluated", len(weeks))
+
+        short_weeks = np.flatnonzero(counts < occurrences)
+        if len(short_weeks) == 0:
+            return None
+
+        week = short_weeks[0]
+        return int(self.ordinals[first_index[week]]), int(counts[week])
+
+    def first_short_month(self, tags: Iterable[str], occurrences: int) -> Optional[Tuple[int, int]]:
+        if len(self) == 0:
+            return None
+
+        unique_months, first_index, inverse = np.unique(months(self.ordinals), return_index=True, return_inverse=True)
+        counts = np.bincount(inverse, weights=self.tag_mask(tags), minlength=len(unique_months))
+        record("rows_scanned", len(self))
+        record("months_evaluated", len(unique_months))
+
+        short_months = np.flatnonzero(counts < occurrences)
+        if len(short_months) == 0:
+            return None
+
+        month = short_months[0]
+        return int(self.ordinals[first_index[month]]), int(counts[month])
+
+    def weekday_instances(self, weekday: int, tag: str) -> Tuple[bool, Optional[int]]:
+        on_day = self.weekdays == weekday
+        if not on_day.any():
+            return False, None
+
+        # Group by ISO week; an instance passes if any of its meals has the tag
+        keys = (self.iso_years * 100 + self.iso_weeks)[on_day]
+        weeks, first_index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        tagged = np.bincount(inverse, weights=self.tag_mask((tag,))[on_day], minlength=len(weeks)) > 0
+        record("rows_scanned", len(self))
+        record("weeks_evaluated", len(weeks))
+
+        missing = np.flatnonzero(~tagged)
+        if len(missing) == 0:
+            return True, None
+        return True, int(self.ordinals[on_day][first_index[missing[0]]])
+
+    def snapshot(self) -> "PlanSnapshot":
+        return self
+
+
+def as_plan(meals_df: Union[pd.DataFrame, PlanView]) -> PlanView:
+    """Return the plan itself if it can already be queried by the rules, otherwise parse the DataFrame."""
+    if isinstance(meals_df, PlanView):
+        return meals_df
+    return PlanSnapshot.from_dataframe(meals_df)
+
+
+# Anything the rules accept as a meal plan
+PlanLike = Union[pd.DataFrame, PlanView]
@@ -0,0 +1,313 @@
+"""
+Incrementally maintained meal plan state.
+
+PlanState keeps per-week tag counters, per-recipe sorted date lists and per-weekday tag presence in
+memory. The database write paths report changed meals to it, so validating a single date or window
+costs time proportional to the rows involved rather than to the whole meal history.
+"""
+
+import bisect
+import threading
+from collections import Counter, defaultdict
+from datetime import date as date_type
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from gusto2.rules.candidates import CandidateSet
+from gusto2.rules.eligibility import HORIZON_LEAD_DAYS, EligibilityMatrix
+from gusto2.rules.snapshot import PlanLike, PlanSnapshot, PlanView, as_plan
+from gusto2.rules.trace import record
+from gusto2.tags import parse_tags
+
+# A meal row as reported by the database: (date, recipe name, comma-separated tags)
+MealRow = Tuple[Optional[date_type], Optional[str], Optional[str]]
+
+# A change to a single meal: (old row, new row); old is None for inserts, new is None for deletes
+MealChange = Tuple[Optional[MealRow], Optional[MealRow]]
+
+WeekKey = Tuple[int, int]
+
+# Number of eligibility matrices (candidate sets and windows) a PlanState keeps up to date
+MAX_ELIGIBILITY_MATRICES = 4
+
+
+def _iso_parts(ordinal: int) -> Tuple[int, int, int]:
+    """ISO (year, week, weekday) of a date ordinal, with Monday as weekday 0."""
+    iso = date_type.fromordinal(ordinal).isocalendar()
+    return iso.year, iso.week, iso.weekday - 1
+
+
+class PlanState(PlanView):
+    """
+    In-process index of the meal plan, loaded once and then kept up to date with apply_changes().
+
+    Args:
+        loader: Callable returning the full meals DataFrame; used for the initial load and after full reloads
+    """
+
+    def __init__(self, loader: Optional[Callable[[], pd.DataFrame]] = None):
+        self._loader = loader
+        self._lock = threading.RLock()
+        self._loaded = False
+        # Bumped on every change, so callers can tell whether the plan changed
+        self.version = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._row_count = 0
+        self._meals_by_date: Dict[int, List[Tuple[Optional[str], FrozenSet[str]]]] = defaultdict(list)
+        # (ISO year, week) -> tag -> number of meals with that tag
+        self._week_tag_counts: Dict[WeekKey, Counter] = defaultdict(Counter)
+        # (ISO year, week) -> tag set -> number of meals with exactly that tag set (for "any of" counts)
+        self._week_tag_sets: Dict[WeekKey, Counter] = defaultdict(Counter)
+        # ISO week number -> ISO year -> number of meals
+        self._week_number_years: Dict[int, Counter] = defaultdict(Counter)
+        # Recipe name -> sorted date ordinals it's planned on
+        self._recipe_dates: Dict[str, List[int]] = defaultdict(list)
+        # Weekday -> (ISO year, week) -> number of meals on that weekday
+        self._weekday_weeks: Dict[int, Counter] = defaultdict(Counter)
+        # Weekday -> tag -> (ISO year, week) -> number of meals on that weekday with the tag
+        self._weekday_tag_weeks: Dict[int, Dict[str, Counter]] = defaultdict(lambda: defaultdict(Counter))
+        self._snapshot: Optional[PlanSnapshot] = None
+        # (candidate set id, no-repeat window) -> eligibility matrix, see eligibility()
+        self._eligibility: Dict[Tuple[int, int], EligibilityMatrix] = {}
+
+    @classmethod
+    def from_dataframe(cls, meals_df: PlanLike) -> "PlanState":
+        """Create a state loaded with the given meals (a DataFrame or any other plan, which is copied)."""
+        state = cls()
+        state.load(meals_df)
+        return state
+
+    def load(self, meals_df: PlanLike) -> None:
+        """Replace the whole state with the given meals."""
+        snapshot = as_plan(meals_df).snapshot()
+        with self._lock:
+            self._reset()
+            for ordinal, name, tags in zip(snapshot.ordinals, snapshot.names, snapshot.tags, strict=True):
+                self._add(int(ordinal), name, tags)
+            self._row_count = snapshot.row_count
+            self._snapshot = snapshot
+            self._loaded = True
+            self.version += 1
+
+    def invalidate(self) -> None:
+        """Drop the state; it is reloaded from the loader on next use."""
+        with self._lock:
+            self._loaded = False
+            self._reset()
+            self.version += 1
+
+    def apply_changes(self, changes: Optional[Sequence[MealChange]]) -> None:
+        """
+        Apply changed meal rows to the state.
+
+        Args:
+            changes: List of (old row, new row) changes, or None if the whole plan was replaced
+        """
+        with self._lock:
+            if changes is None:
+                self.invalidate()
+                return
+            if not self._loaded:
+                # Nothing to update, the next query loads the current plan
+                return
+
+            for old, new in changes:
+                if old is not None:
+                    self._apply_row(old, -1)
+                if new is not None:
+                    self._apply_row(new, 1)
+                if not self._loaded:
+                    # A change didn't match the state and invalidated it
+                    return
+            self._snapshot = None
+            self.version += 1
+
+    def _apply_row(self, row: MealRow, sign: int) -> None:
+        meal_date, name, tags = row
+        self._row_count += sign
+        if meal_date is None or pd.isna(meal_date):
+            return
+
+        name = None if name is None or pd.isna(name) else name
+        ordinal = pd.Timestamp(meal_date).toordinal()
+        if sign > 0:
+            self._add(ordinal, name, parse_tags(tags))
+        else:
+            self._remove(ordinal, name, parse_tags(tags))
+
+    def _add(self, ordinal: int, name: Optional[str], tags: FrozenSet[str]) -> None:
+        year, week, weekday = _iso_parts(ordinal)
+        key = (year, week)
+
+        self._meals_by_date[ordinal].append((name, tags))
+        self._week_tag_sets[key][tags] += 1
+        self._week_number_years[week][year] += 1
+        self._weekday_weeks[weekday][key] += 1
+        for tag in tags:
+            self._week_tag_counts[key][tag] += 1
+            self._weekday_tag_weeks[weekday][tag][key] += 1
+        if name is not None:
+            bisect.insort(self._recipe_dates[name], ordinal)
+            for matrix in self._eligibility.values():
+                matrix.update(ordinal, name, tags, 1, self._recipe_dates[name])
+
+    def _remove(self, ordinal: int, name: Optional[str], tags: FrozenSet[str]) -> None:
+        meals = self._meals_by_date.get(ordinal)
+        if not meals or (name, tags) not in meals:
+            # Unknown row: the state is out of sync, reload it on next use
+            self.invalidate()
+            return
+
+        year, week, weekday = _iso_parts(ordinal)
+        key = (year, week)
+
+        meals.remove((name, tags))
+        if not meals:
+            del self._meals_by_date[ordinal]
+        _decrement(self._week_tag_sets, key, tags)
+        _decrement(self._week_number_years, week, year)
+        _decrement(self._weekday_weeks, weekday, key)
+        for tag in tags:
+            _decrement(self._week_tag_counts, key, tag)
+            _decrement(self._weekday_tag_weeks[weekday], tag, key)
+        if name is not None:
+            dates = self._recipe_dates[name]
+            del dates[bisect.bisect_left(dates, ordinal)]
+            for matrix in self._eligibility.values():
+                matrix.update(ordinal, name, tags, -1, dates)
+            if not dates:
+                del self._recipe_dates[name]
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded and self._loader is not None:
+            self.load(self._loader())
+
+    def recipe_dates(self, name: str) -> List[int]:
+        """Sorted date ordinals on which a recipe is planned."""
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._recipe_dates.get(name, ()))
+
+    def meals_on(self, ordinal: int) -> List[Tuple[Optional[str], FrozenSet[str]]]:
+        """(recipe name, tags) of the meals planned on a day."""
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._meals_by_date.get(ordinal, ()))
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the plan is currently held in memory (otherwise the next query loads it)."""
+        return self._loaded
+
+    @property
+    def is_empty(self) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return self._row_count == 0
+
+    def between(self, start: int, end: int) -> PlanSnapshot:
+        with self._lock:
+            self._ensure_loaded()
+            if end - start > len(self._meals_by_date):
+                # Wide ranges are cheaper to slice from the full snapshot
+                return self.snapshot().between(start, end)
+
+            ordinals, names, tags = [], [], []
+            for ordinal in range(start, end + 1):
+                for name, meal_tags in self._meals_by_date.get(ordinal, ()):
+                    ordinals.append(ordinal)
+                    names.append(name)
+                    tags.append(meal_tags)
+            record("rows_scanned", len(ordinals))
+            return PlanSnapshot.from_records(ordinals, names, tags)
+
+    def week_number_count(self, tags: Iterable[str], week: int) -> int:
+        tags = frozenset(tags)
+        with self._lock:
+            self._ensure_loaded()
+            years = self._week_number_years.get(week, ())
+            record("weeks_evaluated", len(years))
+            if len(tags) == 1:
+                (tag,) = tags
+                return sum(self._week_tag_counts[(year, week)].get(tag, 0) for year in years)
+            return sum(
+                count
+                for year in years
+                for tag_set, count in self._week_tag_sets[(year, week)].items()
+                if not tags.isdisjoint(tag_set)
+            )
+
+    def first_short_week(self, tags: Iterable[str], occurrences: int) -> Optional[Tuple[int, int]]:
+        tags = frozenset(tags)
+        with self._lock:
+            self._ensure_loaded()
+            for key in sorted(self._week_tag_sets):
+                record("weeks_evaluated")
+                count = sum(c for tag_set, c in self._week_tag_sets[key].items() if not tags.isdisjoint(tag_set))
+                if count < occurrences:
+                    return self._first_meal_in_week(key), count
+            return None
+
+    def weekday_instances(self, weekday: int, tag: str) -> Tuple[bool, Optional[int]]:
+        with self._lock:
+            self._ensure_loaded()
+            weeks = self._weekday_weeks.get(weekday)
+            if not weeks:
+                return False, None
+
+            tagged_weeks = self._weekday_tag_weeks.get(weekday, {}).get(tag, {})
+            record("weeks_evaluated", len(weeks))
+            missing = [key for key in weeks if key not in tagged_weeks]
+            if not missing:
+                return True, None
+
+            year, week = min(missing)
+            return True, date_type.fromisocalendar(year, week, weekday + 1).toordinal()
+
+    def eligibility(self, candidates: CandidateSet, window_days: int, ordinal: int) -> EligibilityMatrix:
+        """Eligibility matrix of the candidates, built on first use and then kept up to date with every change."""
+        with self._lock:
+            self._ensure_loaded()
+            key = (id(candidates), window_days)
+            matrix = self._eligibility.get(key)
+            if matrix is None or matrix.candidates is not candidates or not matrix.covers(ordinal):
+                # Keep the matrices of the few most recent candidate sets only
+                self._eligibility.pop(key, None)
+                while len(self._eligibility) >= MAX_ELIGIBILITY_MATRICES:
+                    self._eligibility.pop(next(iter(self._eligibility)))
+
+                matrix = EligibilityMatrix(candidates, window_days, ordinal - HORIZON_LEAD_DAYS)
+                rows = self.between(matrix.start - window_days, matrix.start + matrix.days + window_days)
+                matrix.load(rows, self._recipe_dates)
+                self._eligibility[key] = matrix
+            return matrix
+
+    def snapshot(self) -> PlanSnapshot:
+        with self._lock:
+            self._ensure_loaded()
+            if self._snapshot is None:
+                ordinals, names, tags = [], [], []
+                for ordinal in sorted(self._meals_by_date):
+                    for name, meal_tags in self._meals_by_date[ordinal]:
+                        ordinals.append(ordinal)
+                        names.append(name)
+                        tags.append(meal_tags)
+                self._snapshot = PlanSnapshot.from_records(ordinals, names, tags, row_count=self._row_count)
+            return self._snapshot
+
+    def _first_meal_in_week(self, key: WeekKey) -> int:
+        monday = date_type.fromisocalendar(key[0], key[1], 1).toordinal()
+        return next(ordinal for ordinal in range(monday, monday + 7) if ordinal in self._meals_by_date)
+
+
+def _decrement(counters: Dict, key, item) -> None:
+    """Decrement a nested counter, dropping entries that reach zero."""
+    counter = counters[key]
+    counter[item] -= 1
+    if counter[item] <= 0:
+        del counter[item]
+    if not counter:
+        del counters[key]
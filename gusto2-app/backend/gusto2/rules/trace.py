@@ -0,0 +1,65 @@
+"""
+Opt-in tracing of rule evaluation.
+
+A ValidationTrace records the wall time of every rule in a validation, plus counters of the work
+each rule did (rows scanned, windows/weeks/months evaluated). Counters are reported with record()
+from wherever the work happens; the rule being traced is tracked in a context variable, so
+record() is a no-op outside traced validations and safe to call from concurrent requests.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+_active_rule: ContextVar[Optional["RuleTrace"]] = ContextVar("active_rule_trace", default=None)
+
+
+def record(counter: str, amount: int = 1) -> None:
+    """Add to a counter of the rule that is currently being traced, if any."""
+    rule_trace = _active_rule.get()
+    if rule_trace is not None:
+        rule_trace.counters[counter] = rule_trace.counters.get(counter, 0) + int(amount)
+
+
+class RuleTrace:
+    """Wall time and work counters of a single rule."""
+
+    def __init__(self, rule_name: str):
+        self.rule_name = rule_name
+        self.elapsed_ms = 0.0
+        self.counters: Dict[str, int] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"rule_name": self.rule_name, "elapsed_ms": round(self.elapsed_ms, 3), **self.counters}
+
+
+class ValidationTrace:
+    """Per-rule timings and counters of one validation."""
+
+    def __init__(self):
+        self.date: Optional[str] = None
+        self.parse_ms = 0.0
+        self.total_ms = 0.0
+        self.rules: List[RuleTrace] = []
+
+    @contextmanager
+    def rule(self, rule_name: str) -> Iterator[RuleTrace]:
+        """Time the block and attribute counters reported inside it to the rule."""
+        rule_trace = RuleTrace(rule_name)
+        token = _active_rule.set(rule_trace)
+        start = time.perf_counter()
+        try:
+            yield rule_trace
+        finally:
+            rule_trace.elapsed_ms = (time.perf_counter() - start) * 1000
+            _active_rule.reset(token)
+            self.rules.append(rule_trace)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "date": self.date,
+            "parse_ms": round(self.parse_ms, 3),
+            "total_ms": round(self.total_ms, 3),
+            "rules": [rule_trace.to_dict() for rule_trace in self.rules],
+        }
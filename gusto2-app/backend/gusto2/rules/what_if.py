@@ -0,0 +1,154 @@
+"""
+What-if evaluation of hypothetical meal plan edits.
+
+Every edit is applied to a private, incrementally updated copy of the meal plan, validated around
+the dates it touches, and undone again, so many edits can be previewed against the same base plan
+without re-reading or re-validating the whole plan, and without writing to the database.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from gusto2.rules.rule_engine import RuleEngine, RuleType
+from gusto2.rules.snapshot import PlanLike, as_plan, to_ordinal
+from gusto2.rules.state import MealChange, MealRow, PlanState
+
+# Kinds of edits
+SET_MEAL = "set"
+SWAP_DAYS = "swap"
+CLEAR_DAY = "clear"
+
+
+class PlanEdit:
+    """
+    A hypothetical change to the meal plan.
+
+    Args:
+        kind: SET_MEAL (plan a recipe on date, replacing its meals), SWAP_DAYS (swap the meals of date
+            and other_date) or CLEAR_DAY (remove the meals of date)
+        date: Day to change
+        other_date: Second day, for SWAP_DAYS
+        meal_name: Recipe to plan, for SET_MEAL
+        meal_tags: Comma-separated tags of the recipe, for SET_MEAL
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        date: datetime,
+        other_date: Optional[datetime] = None,
+        meal_name: Optional[str] = None,
+        meal_tags: Optional[str] = None,
+    ):
+        if kind not in (SET_MEAL, SWAP_DAYS, CLEAR_DAY):
+            raise ValueError(f"Unknown edit '{kind}', expected one of: {SET_MEAL}, {SWAP_DAYS}, {CLEAR_DAY}")
+        if kind == SWAP_DAYS and other_date is None:
+            raise ValueError("A swap needs a second date")
+        if kind == SET_MEAL and not meal_name:
+            raise ValueError("Setting a meal needs a recipe")
+        self.kind = kind
+        self.date = date
+        self.other_date = other_date
+        self.meal_name = meal_name
+        self.meal_tags = meal_tags
+
+    @property
+    def dates(self) -> List[datetime]:
+        """Days changed by the edit."""
+        if self.kind == SWAP_DAYS and to_ordinal(self.other_date) != to_ordinal(self.date):
+            return [self.date, self.other_date]
+        return [self.date]
+
+    def changes(self, state: PlanState) -> List[MealChange]:
+        """Meal changes that apply the edit to a plan state, in the format PlanState.apply_changes() takes."""
+        changes = [(row, None) for row in day_rows(state, self.date)]
+        if self.kind == SET_MEAL:
+            changes.append((None, (self.date, self.meal_name, self.meal_tags)))
+        elif self.kind == SWAP_DAYS and len(self.dates) == 2:
+            other_rows = day_rows(state, self.other_date)
+            changes += [(row, None) for row in other_rows]
+            changes += [(None, (self.other_date, name, tags)) for _, name, tags in day_rows(state, self.date)]
+            changes += [(None, (self.date, name, tags)) for _, name, tags in other_rows]
+        elif self.kind == SWAP_DAYS:
+            # Swapping a day with itself changes nothing
+            changes = []
+        return changes
+
+
+def day_rows(state: PlanState, date: datetime) -> List[MealRow]:
+    """Current meal rows of a day, in the format PlanState.apply_changes() takes."""
+    return [(date, name, ",".join(sorted(tags))) for name, tags in state.meals_on(to_ordinal(date))]
+
+
+def undo_changes(changes: List[MealChange]) -> List[MealChange]:
+    """Changes that revert the given changes."""
+    return [(new, old) for old, new in reversed(changes)]
+
+
+class WhatIfEvaluator:
+    """
+    Evaluate hypothetical edits of a meal plan against the rules of a rule engine.
+
+    Args:
+        engine: Rule engine to validate with
+        meals_df: Base meal plan (dataframe, PlanSnapshot or PlanState); it is copied, never modified
+    """
+
+    def __init__(self, engine: RuleEngine, meals_df: PlanLike):
+        self.engine = engine
+        self.state = PlanState.from_dataframe(as_plan(meals_df))
+        self._base_results: Dict[int, List[Dict[str, Any]]] = {}
+
+    def evaluate(self, edits: Sequence[PlanEdit]) -> List[Dict[str, Any]]:
+        """
+        Evaluate every edit on its own against the base plan.
+
+        Returns:
+            One result per edit, with the per-rule outcome around the changed days (see evaluate_edit())
+        """
+        return [self.evaluate_edit(edit) for edit in edits]
+
+    def evaluate_edit(self, edit: PlanEdit) -> Dict[str, Any]:
+        """
+        Apply an edit, validate the plan around the changed days, and undo the edit.
+
+        Returns:
+            Dictionary with, for every enabled rule, whether it holds around all changed days after the
+            edit (is_valid), whether it did before (was_valid) and the message of the first failing day
+        """
+        changes = edit.changes(self.state)
+        self.state.apply_changes(changes)
+        try:
+            results = [self.engine.validate_meal_plan(self.state, date) for date in edit.dates]
+        finally:
+            self.state.apply_changes(undo_changes(changes))
+        base_results = [self._base(date) for date in edit.dates]
+
+        rule_results = []
+        for index, rule_result in enumerate(results[0]):
+            failing = [day_results[index] for day_results in results if not day_results[index]["is_valid"]]
+            rule_results.append(
+                {
+                    "rule_name": rule_result["rule_name"],
+                    "rule_type": rule_result["rule_type"],
+                    "is_valid": not failing,
+                    "was_valid": all(day_results[index]["is_valid"] for day_results in base_results),
+                    "message": failing[0]["message"] if failing else rule_result["message"],
+                }
+            )
+
+        constraints = [result for result in rule_results if result["rule_type"] == RuleType.CONSTRAINT.name]
+        requirements = [result for result in rule_results if result["rule_type"] == RuleType.REQUIREMENT.name]
+        return {
+            "constraints": constraints,
+            "requirements": requirements,
+            "all_constraints_met": all(result["is_valid"] for result in constraints),
+            "all_requirements_met": all(result["is_valid"] for result in requirements),
+        }
+
+    def _base(self, date: datetime) -> List[Dict[str, Any]]:
+        """Validation results of the unedited plan around a date, computed once per date."""
+        ordinal = to_ordinal(date)
+        if ordinal not in self._base_results:
+            self._base_results[ordinal] = self.engine.validate_meal_plan(self.state, date)
+        return self._base_results[ordinal]
@@ -25,6 +25,15 @@ class Settings(BaseModel):
     # Application Configuration
     debug: bool = Field(False, description="Debug mode flag")
 
+    # Rules Configuration
+    rules_file: Optional[str] = Field(None, description="JSON rule definitions file, defaults to the bundled rules")
+    planner_time_budget_ms: int = Field(500, description="Time budget of the meal planner, in milliseconds")
+    repair_time_budget_ms: int = Field(500, description="Time budget of plan repair suggestions, in milliseconds")
+    rule_time_budget_ms: Optional[float] = Field(
+        None, description="Log rules that take longer than this to validate, in milliseconds"
+    )
+    rule_workers: Optional[int] = Field(None, description="Worker processes for validating large meal plans")
+
     class Config:
         """Pydantic config"""
 
@@ -54,4 +63,9 @@ settings = Settings(
     notion_api_token=os.environ.get("NOTION_API_TOKEN"),
     notion_mealplan_page_id=os.environ.get("NOTION_MEALPLAN_PAGE_ID"),
     debug=os.environ.get("GUSTO2_DEBUG", "").lower() == "true",
+    rules_file=os.environ.get("GUSTO2_RULES_FILE"),
+    planner_time_budget_ms=int(os.environ.get("GUSTO2_PLANNER_TIME_BUDGET_MS", "500")),
+    repair_time_budget_ms=int(os.environ.get("GUSTO2_REPAIR_TIME_BUDGET_MS", "500")),
+    rule_time_budget_ms=os.environ.get("GUSTO2_RULE_TIME_BUDGET_MS") or None,
+    rule_workers=os.environ.get("GUSTO2_RULE_WORKERS") or None,
 )
@@ -0,0 +1,159 @@
+"""
+Tag parsing and interning.
+
+Tags are stored as comma-separated strings on recipes. This module parses each distinct tag string
+only once, and interns tags as small integer ids, so rules can test "has tag fish / rice / asian"
+with array operations on tag ids instead of splitting strings in Python loops.
+"""
+
+import threading
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+def normalize_tag(tag: str) -> str:
+    """Normalize a single tag: trimmed and lowercase."""
+    return tag.strip().lower()
+
+
+@lru_cache(maxsize=8192)
+def _split_tags(tags: str) -> Tuple[str, ...]:
+    normalized = (normalize_tag(tag) for tag in tags.split(","))
+    # dict.fromkeys drops duplicates while keeping the original order
+    return tuple(dict.fromkeys(tag for tag in normalized if tag))
+
+
+def split_tags(tags) -> Tuple[str, ...]:
+    """Split a comma-separated tag string into normalized tags, without duplicates or empty tags."""
+    if tags is None or (not isinstance(tags, str) and pd.isna(tags)):
+        return ()
+    return _split_tags(str(tags))
+
+
+@lru_cache(maxsize=8192)
+def tag_set(tags: str) -> FrozenSet[str]:
+    """Normalized tags of a comma-separated tag string, as a (shared) frozenset."""
+    return frozenset(_split_tags(tags))
+
+
+def parse_tags(tags) -> FrozenSet[str]:
+    """Normalized tags of a comma-separated tag string (or None/NA) as a frozenset."""
+    if tags is None or (not isinstance(tags, str) and pd.isna(tags)):
+        return frozenset()
+    return tag_set(str(tags))
+
+
+def normalize_tags(tags) -> Optional[str]:
+    """Normalize a comma-separated tag string for storage, e.g. ' Fish, rice,fish' -> 'fish,rice'."""
+    if tags is None or (not isinstance(tags, str) and pd.isna(tags)):
+        return tags
+    return ",".join(split_tags(tags))
+
+
+class TagVocabulary:
+    """Maps every tag to a small integer id, assigned the first time a tag is seen."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._tags: List[str] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+    def id(self, tag: str) -> int:
+        """Id of a tag, interning it if it's new."""
+        tag_id = self._ids.get(tag)
+        if tag_id is None:
+            with self._lock:
+                tag_id = self._ids.get(tag)
+                if tag_id is None:
+                    tag_id = len(self._tags)
+                    self._tags.append(tag)
+                    self._ids[tag] = tag_id
+        return tag_id
+
+    def ids(self, tags: Iterable[str]) -> np.ndarray:
+        """Sorted array of the ids of the given tags, interning new ones."""
+        return np.unique(np.fromiter((self.id(tag) for tag in tags), dtype=np.int32))
+
+    def known_ids(self, tags: Iterable[str]) -> np.ndarray:
+        """Sorted array of the ids of the given tags, skipping tags that were never interned."""
+        return np.unique(np.fromiter((self._ids[tag] for tag in tags if tag in self._ids), dtype=np.int32))
+
+    def tag(self, tag_id: int) -> str:
+        """Tag with the given id."""
+        return self._tags[tag_id]
+
+
+class TagMatrix:
+    """
+    Sparse (CSR-style) matrix of tag ids per row: the ids of row i are ids[indptr[i]:indptr[i + 1]].
+
+    Rows are typically recipes or meals; has_any() tests all rows for a set of tags at once. Every matrix
+    interns its tags in a vocabulary of its own (shared only with the matrices take() derives from it), so
+    the vocabulary never holds more tags than the rows it was built from and goes away with the matrix.
+    """
+
+    def __init__(self, indptr: np.ndarray, ids: np.ndarray, vocabulary: TagVocabulary):
+        self.indptr = indptr
+        self.ids = ids
+        self.vocabulary = vocabulary
+        self._rows: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_tag_sets(cls, tag_sets: Sequence[FrozenSet[str]]) -> "TagMatrix":
+        """Build a matrix from one (already normalized) tag set per row."""
+        vocabulary = TagVocabulary()
+        # Rows mostly repeat a few distinct tag sets, so each distinct set is converted only once
+        distinct: Dict[FrozenSet[str], np.ndarray] = {}
+        row_ids = []
+        for tags in tag_sets:
+            ids = distinct.get(tags)
+            if ids is None:
+                ids = distinct[tags] = vocabulary.ids(tags)
+            row_ids.append(ids)
+        lengths = np.fromiter((len(ids) for ids in row_ids), dtype=np.int64, count=len(row_ids))
+        indptr = np.zeros(len(row_ids) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        ids = np.concatenate(row_ids) if row_ids else np.empty(0, dtype=np.int32)
+        return cls(indptr, ids.astype(np.int32, copy=False), vocabulary)
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Row number of every entry in ids."""
+        if self._rows is None:
+            self._rows = np.repeat(np.arange(len(self)), np.diff(self.indptr))
+        return self._rows
+
+    def has_any(self, tags: Iterable[str]) -> np.ndarray:
+        """Boolean array marking rows that carry any of the given (normalized) tags."""
+        wanted = self.vocabulary.known_ids(tags)
+        if len(wanted) == 0 or len(self.ids) == 0:
+            return np.zeros(len(self), dtype=bool)
+        hits = np.isin(self.ids, wanted)
+        return np.bincount(self.rows[hits], minlength=len(self)) > 0
+
+    def take(self, index: Union[slice, np.ndarray]) -> "TagMatrix":
+        """Matrix with only the selected rows."""
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                stop = max(start, stop)
+                indptr = self.indptr[start : stop + 1]
+                return TagMatrix(indptr - indptr[0], self.ids[indptr[0] : indptr[-1]], self.vocabulary)
+            index = np.arange(start, stop, step)
+
+        index = np.asarray(index, dtype=np.int64)
+        starts = self.indptr[index]
+        lengths = self.indptr[index + 1] - starts
+        indptr = np.zeros(len(index) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        positions = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return TagMatrix(indptr, self.ids[positions], self.vocabulary)